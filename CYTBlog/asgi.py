@@ -0,0 +1,8 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'CYTBlog.settings')
+
+# 生产环境：gunicorn CYTBlog.asgi:application -k uvicorn_worker.UvicornWorker
+# 本地调试：uvicorn CYTBlog.asgi:application --reload
+application = get_asgi_application()
@@ -1,4 +1,5 @@
 import os
+import sys
 import dj_database_url
 from pathlib import Path
 from dotenv import load_dotenv
@@ -33,14 +34,17 @@ INSTALLED_APPS = [
 
 # 中间件配置
 MIDDLEWARE = [
+    'blog.middleware.RequestTimingMiddleware',  # 请求耗时统计与慢请求日志，放在最前面以覆盖全部中间件
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # 添加 WhiteNoise
+    'blog.middleware.AsyncWhiteNoiseMiddleware',  # WhiteNoise 静态文件，ASGI 下可异步调用
+    'blog.middleware.ReplicaPinningMiddleware',  # 写入后短期内改读主库，需在会话与认证之前
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.middleware.AnonymousPageCacheMiddleware',  # 匿名用户整页缓存
 ]
 
 ROOT_URLCONF = 'CYTBlog.urls'
@@ -56,18 +60,35 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'blog.context_processors.user_display',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'CYTBlog.wsgi.application'
+ASGI_APPLICATION = 'CYTBlog.asgi.application'
 
 # 数据库配置
+# 连接复用（均可用环境变量覆盖）：
+#   DB_POOL：使用进程内连接池（blog/db/pool.py），生产环境默认开启。各线程共用连接池，
+#       连接数不超过 DB_POOL_MAX_SIZE，借出前对空闲超过 DB_POOL_CHECK_IDLE 秒的连接做健康检查，
+#       创建超过 DB_POOL_MAX_LIFETIME 秒的连接会被替换。ASGI 下每个请求在新的线程中执行，
+#       CONN_MAX_AGE 保留在线程上的连接无法被后续请求复用，需要使用连接池。
+#   DB_CONN_MAX_AGE：不使用连接池时连接在请求之间保留的秒数，默认 60；
+#       DB_CONN_HEALTH_CHECKS 为 True 时复用前先检查连接是否可用。
+DB_POOL = os.environ.get('DB_POOL', 'True' if 'DATABASE_URL' in os.environ else 'False').lower() == 'true'
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+DB_CONN_HEALTH_CHECKS = os.environ.get('DB_CONN_HEALTH_CHECKS', 'True').lower() == 'true'
+
 if 'DATABASE_URL' in os.environ:
     # 生产环境使用 PostgreSQL
     DATABASES = {
-        'default': dj_database_url.parse(os.environ.get('DATABASE_URL'))
+        'default': dj_database_url.parse(
+            os.environ.get('DATABASE_URL'),
+            conn_max_age=DB_CONN_MAX_AGE,
+            conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        )
     }
 else:
     # 开发环境使用 SQLite
@@ -78,6 +99,117 @@ else:
         }
     }
 
+# 只读副本：DATABASE_REPLICA_URLS 为逗号分隔的数据库 URL，依次注册为 replica_1、replica_2……
+# 配置后读取分摊到副本、写入发往主库（blog/db/routers.py）；用户写入后 DATABASE_REPLICA_PIN_SECONDS 秒内
+# 由 Cookie 标记改读主库；其他用户仍读副本，任何写入后 DATABASE_REPLICA_MAX_LAG_SECONDS 秒内从副本读取的页面
+# 不写入缓存、不带验证器（标记保存在缓存中，多进程部署需使用 REDIS_URL）
+DATABASE_REPLICAS = []
+for url in filter(None, (item.strip() for item in os.environ.get('DATABASE_REPLICA_URLS', '').split(','))):
+    alias = f'replica_{len(DATABASE_REPLICAS) + 1}'
+    DATABASES[alias] = dj_database_url.parse(url, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=DB_CONN_HEALTH_CHECKS)
+    # 运行测试时副本直接使用主库的测试数据库
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['blog.db.routers.ReplicaRouter']
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get('DATABASE_REPLICA_PIN_SECONDS', 5))
+# 副本的最大复制延迟：任何写入之后这段时间内，从副本读取的页面不发送 ETag/Last-Modified，也不写入页面与片段缓存
+DATABASE_REPLICA_MAX_LAG_SECONDS = int(os.environ.get('DATABASE_REPLICA_MAX_LAG_SECONDS', 30))
+DATABASE_PIN_COOKIE = 'use_primary_db'
+
+if DB_POOL:
+    POOLED_ENGINES = {
+        'django.db.backends.postgresql': 'blog.db.backends.postgresql',
+        'django.db.backends.sqlite3': 'blog.db.backends.sqlite3',
+    }
+    for database in DATABASES.values():
+        if database['ENGINE'] in POOLED_ENGINES:
+            database['ENGINE'] = POOLED_ENGINES[database['ENGINE']]
+            # 每个请求结束时把连接归还给连接池，由连接池负责复用与健康检查
+            database['CONN_MAX_AGE'] = 0
+            database['CONN_HEALTH_CHECKS'] = False
+            database['POOL'] = {
+                'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+                'MAX_LIFETIME': int(os.environ.get('DB_POOL_MAX_LIFETIME', 1800)),
+                'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+                'CHECK_IDLE': float(os.environ.get('DB_POOL_CHECK_IDLE', 1)),
+            }
+
+# 缓存配置
+# 多进程部署时请配置 REDIS_URL 使用共享缓存，否则各 worker 的缓存版本号互不可见，失效无法跨进程生效
+if 'REDIS_URL' in os.environ:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'cyt-blog',
+        }
+    }
+
+# 会话存储（SESSION_BACKEND 环境变量）：
+#   cached_db：读取先查缓存，未命中再查数据库，写入同时写入两者；配置 REDIS_URL 时默认使用。
+#       本地内存缓存各进程独立，退出登录只能清除当前 worker 的缓存，因此未配置 REDIS_URL 时默认使用 db。
+#   signed_cookies：会话内容签名后保存在 Cookie 中，完全不访问数据库；服务端无法让会话提前失效，
+#       且内容受 Cookie 大小限制，更换 SECRET_KEY 会让全部用户退出登录。
+#   db：Django 默认的数据库会话。
+# 匿名用户没有会话 Cookie 时不会加载或创建会话，其提示消息只保存在 Cookie 中（blog/message_storage.py）；
+# 旧的 django_session 表中的过期记录用 clear_expired_sessions 命令分批清理。
+SESSION_ENGINES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'db': 'django.contrib.sessions.backends.db',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('SESSION_BACKEND', 'cached_db' if 'REDIS_URL' in os.environ else 'db')]
+MESSAGE_STORAGE = 'blog.message_storage.AnonymousCookieStorage'
+
+# 匿名用户整页缓存的过期时间（秒）；内容变化时通过命名空间版本号即时失效，过期时间只是兜底
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', 600))
+
+# 异步视图是否在独立线程与数据库连接中并发执行互不依赖的查询（见 blog/aio.py 的 concurrent）
+ASYNC_CONCURRENT_QUERIES = os.environ.get('ASYNC_CONCURRENT_QUERIES', 'True').lower() == 'true'
+
+# 慢请求日志：总耗时不低于该毫秒数的请求连同其 SQL 语句写入日志，设为空字符串时关闭；运行测试时始终关闭
+SLOW_REQUEST_THRESHOLD_MS = os.environ.get('SLOW_REQUEST_THRESHOLD_MS', '500')
+SLOW_REQUEST_THRESHOLD_MS = float(SLOW_REQUEST_THRESHOLD_MS) if SLOW_REQUEST_THRESHOLD_MS else None
+if sys.argv[1:2] == ['test']:
+    SLOW_REQUEST_THRESHOLD_MS = None
+SLOW_REQUEST_MAX_SQL = 20
+# 设置 SLOW_REQUEST_LOG 时写入该文件，否则输出到标准错误（由进程管理器收集）
+SLOW_REQUEST_LOG = os.environ.get('SLOW_REQUEST_LOG', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_requests': {
+            'class': 'logging.FileHandler',
+            'filename': SLOW_REQUEST_LOG,
+            'formatter': 'message',
+            'encoding': 'utf-8',
+            'delay': True,
+        } if SLOW_REQUEST_LOG else {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'blog.slow_requests': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -105,7 +237,8 @@ STATICFILES_DIRS = [BASE_DIR / 'blog' / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 # WhiteNoise 配置
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# 在 WhiteNoise 的哈希与压缩之外，collectstatic 时为打包图片生成 AVIF/WebP 与按宽度缩放的变体
+STATICFILES_STORAGE = 'blog.storage.OptimizedImageStaticFilesStorage'
 
 # 媒体文件配置
 MEDIA_URL = '/media/'
@@ -113,7 +246,8 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 # 生产环境安全设置
 if not DEBUG:
-    SECURE_SSL_REDIRECT = True
+    # 本机以 http 直接压测 gunicorn 时可设置 SECURE_SSL_REDIRECT=False（见 benchmark_servers 命令）
+    SECURE_SSL_REDIRECT = os.environ.get('SECURE_SSL_REDIRECT', 'True').lower() == 'true'
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
     SECURE_BROWSER_XSS_FILTER = True
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Post, Category, About, Contact, Comment, AnimeNavigation, WebsiteNavigation
+from .comments import delete_comments, reconcile_comment_counts, record_new_comment, touch_comment_posts
+from .models import Post, Category, About, Contact, Comment, AnimeNavigation, WebsiteNavigation, Tag
 
 # 文章管理配置
 @admin.register(Post)
@@ -14,6 +15,13 @@ class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'is_predefined')
     search_fields = ('name',)
 
+# 标签管理配置
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'post_count')
+    search_fields = ('name',)
+    readonly_fields = ('post_count',)
+
 # 评论管理配置
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
@@ -21,6 +29,24 @@ class CommentAdmin(admin.ModelAdmin):
     list_filter = ('created_at',)
     search_fields = ('content',)
 
+    # Comment 没有逐行信号，与前台视图一样通过 blog.comments 维护计数并使缓存失效
+    def save_model(self, request, obj, form, change):
+        previous_post_id = Comment.objects.filter(pk=obj.pk).values_list('post_id', flat=True).first() if change else None
+        super().save_model(request, obj, form, change)
+        if change:
+            if previous_post_id != obj.post_id:
+                # 评论被移到另一篇文章时按实际行数修正两篇文章的计数
+                reconcile_comment_counts(post_ids=[previous_post_id, obj.post_id])
+            touch_comment_posts({obj.post_id, previous_post_id} - {None})
+        else:
+            record_new_comment(obj)
+
+    def delete_model(self, request, obj):
+        delete_comments([obj.pk])
+
+    def delete_queryset(self, request, queryset):
+        delete_comments(queryset.values_list('pk', flat=True))
+
 # 关于我们管理配置
 @admin.register(About)
 class AboutAdmin(admin.ModelAdmin):
@@ -43,4 +69,6 @@ class WebsiteNavigationAdmin(admin.ModelAdmin):
     list_display = ('title', 'url', 'created_at')
     search_fields = ('title',)
 
-# 修改记录：添加了 AnimeNavigation 和 WebsiteNavigation 模型的管理员配置。
\ No newline at end of file
+# 修改记录：添加了 AnimeNavigation 和 WebsiteNavigation 模型的管理员配置。
+# 修改记录：添加了 Tag 模型的管理员配置。
+# 修改记录：CommentAdmin 的保存与删除改用 blog.comments 中的函数，维护评论计数并使相关缓存失效。
@@ -0,0 +1,68 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+_DONE = object()
+
+
+def _in_transaction():
+    return connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+def _with_own_connection(func):
+    # 线程池中的线程不经过请求的开始与结束信号，按 CONN_MAX_AGE 自行关闭过期或不可用的连接
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return wrapper
+
+
+async def concurrent(func, *args, **kwargs):
+    """
+    在线程池的独立线程中执行同步查询函数，可与其他协程一起交给 asyncio.gather 并发执行。
+
+    Django 的异步 ORM（aget、async for 等）在同一请求中总是回到同一个线程依次执行，
+    多个查询放进 asyncio.gather 也不会重叠；这里让 func 使用该线程自己的数据库连接，
+    与请求线程上的异步 ORM 查询真正同时进行。请求线程的连接处于事务中（例如测试用例）时，
+    其他连接看不到未提交的数据，改为在请求线程中执行；ASYNC_CONCURRENT_QUERIES 为 False 时同样如此。
+    """
+    if settings.ASYNC_CONCURRENT_QUERIES and not await sync_to_async(_in_transaction)():
+        return await sync_to_async(_with_own_connection(func), thread_sensitive=False)(*args, **kwargs)
+    return await sync_to_async(func)(*args, **kwargs)
+
+
+async def alist(queryset):
+    """用 async for 在请求线程中取出查询集的全部结果。"""
+    return [item async for item in queryset]
+
+
+async def iterate_in_thread(iterable):
+    """
+    把同步迭代器包装为异步迭代器，每次取下一块时回到请求线程执行。
+
+    ASGI 下 StreamingHttpResponse 遇到同步迭代器会先把全部内容读入内存再发送；
+    逐块在请求线程中取数据，服务端游标仍在同一个数据库连接上，内存占用保持不变。
+    """
+    iterator = iter(iterable)
+    next_chunk = sync_to_async(next)
+    while True:
+        chunk = await next_chunk(iterator, _DONE)
+        if chunk is _DONE:
+            return
+        yield chunk
+
+
+def streaming_content(request, iterable):
+    """按服务器接口返回流式响应的内容：ASGI 请求使用异步迭代器，WSGI 请求原样返回。"""
+    return iterate_in_thread(iterable) if isinstance(request, ASGIRequest) else iterable
+
+# 修改记录：
+# 1. 新建 aio.py，提供异步视图使用的 concurrent（在独立线程与数据库连接中并发执行查询）、alist，
+#    以及 ASGI 下逐块输出流式响应的 streaming_content。
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class BlogConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'blog'
+
+    def ready(self):
+        # 注册模型信号处理函数
+        from . import signals  # noqa: F401
+
+# 修改记录：添加 BlogConfig，在 ready() 中注册 signals.py 中的信号处理函数。
\ No newline at end of file
@@ -0,0 +1,324 @@
+import http.client
+import math
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+
+from . import timing
+from .models import AnimeNavigation, Category, Comment, Post, Tag, WebsiteNavigation
+
+PERCENTILES = (50, 90, 95, 99)
+BENCHMARK_USERNAME = 'benchmark_admin'
+
+
+def percentile(values, pct):
+    """按线性插值计算百分位数，values 需已排序。"""
+    if not values:
+        return 0.0
+    rank = (len(values) - 1) * pct / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def build_cases():
+    """
+    列出要测量的页面：(名称, URL, 是否以超级用户身份访问)。
+
+    公开页面以匿名用户访问，自定义后台与需要登录的页面以超级用户访问；
+    文章详情选评论最多的文章，以覆盖最深的评论树。
+    """
+    post = Post.objects.order_by('-comment_count', '-pk').first()
+    category = Category.objects.order_by('pk').first()
+    tag = Tag.objects.order_by('-post_count', 'pk').first()
+    comment = Comment.objects.order_by('-pk').first()
+    anime = AnimeNavigation.objects.order_by('-pk').first()
+    website = WebsiteNavigation.objects.order_by('-pk').first()
+    if not all([post, category, tag, comment, anime, website]):
+        raise ValueError('数据不足，请先运行 seed_blog 生成数据。')
+    month = post.created_date
+
+    cases = [
+        ('home', reverse('home'), False),
+        ('home_category', f"{reverse('home')}?category={category.pk}", False),
+        ('home_by_comments', f"{reverse('home')}?sort=comments", False),
+        ('post_detail', reverse('post_detail', args=[post.pk]), False),
+        ('categories', reverse('categories'), False),
+        ('archive', reverse('archive'), False),
+        ('archive_month', reverse('archive_month', args=[month.year, month.month]), False),
+        ('archive_all', reverse('archive_all'), False),
+        ('tag_detail', reverse('tag_detail', args=[tag.slug]), False),
+        ('search', f"{reverse('search')}?q={post.title[:4]}", False),
+        ('about', reverse('about'), False),
+        ('contact', reverse('contact'), False),
+        ('login', reverse('login'), False),
+        ('register', reverse('register'), False),
+        ('post_new', reverse('post_new'), True),
+        ('password_change', reverse('password_change'), True),
+        ('admin_login', reverse('admin_login'), False),
+        ('admin_dashboard', reverse('admin_dashboard'), True),
+        ('admin_post_list', reverse('admin_post_list'), True),
+        ('admin_post_list_by_comments', f"{reverse('admin_post_list')}?sort=comments", True),
+        ('admin_post_create', reverse('admin_post_create'), True),
+        ('admin_post_update', reverse('admin_post_update', args=[post.pk]), True),
+        ('admin_post_delete', reverse('admin_post_delete', args=[post.pk]), True),
+        ('admin_category_list', reverse('admin_category_list'), True),
+        ('admin_category_create', reverse('admin_category_create'), True),
+        ('admin_category_update', reverse('admin_category_update', args=[category.pk]), True),
+        ('admin_category_delete', reverse('admin_category_delete', args=[category.pk]), True),
+        ('admin_comment_list', reverse('admin_comment_list'), True),
+        ('admin_comment_list_by_post', f"{reverse('admin_comment_list')}?post={post.pk}", True),
+        ('admin_comment_delete', reverse('admin_comment_delete', args=[comment.pk]), True),
+        ('admin_export_data', reverse('admin_export_data'), True),
+        ('admin_about_update', reverse('admin_about_update'), True),
+        ('admin_contact_update', reverse('admin_contact_update'), True),
+        ('admin_password_change', reverse('admin_password_change'), True),
+        ('admin_anime_navigation_list', reverse('admin_anime_navigation_list'), True),
+        ('admin_anime_navigation_create', reverse('admin_anime_navigation_create'), True),
+        ('admin_anime_navigation_update', reverse('admin_anime_navigation_update', args=[anime.pk]), True),
+        ('admin_anime_navigation_delete', reverse('admin_anime_navigation_delete', args=[anime.pk]), True),
+        ('admin_website_navigation_list', reverse('admin_website_navigation_list'), True),
+        ('admin_website_navigation_create', reverse('admin_website_navigation_create'), True),
+        ('admin_website_navigation_update', reverse('admin_website_navigation_update', args=[website.pk]), True),
+        ('admin_website_navigation_delete', reverse('admin_website_navigation_delete', args=[website.pk]), True),
+    ]
+    return cases
+
+
+def measure(client, url, iterations, warmup=1, clear_cache=True):
+    """
+    请求 url 共 warmup + iterations 次，只统计后 iterations 次。
+
+    返回：
+        包含状态码、延迟百分位数（毫秒）、SQL 查询数（中位数）与响应字节数的字典。
+    """
+    # 异步视图会在线程池的其他数据库连接上并发查询，CaptureQueriesContext 只能看到当前连接，改用 RequestTiming 统计
+    timing.install()
+    latencies, query_counts = [], []
+    status = size = 0
+    for index in range(warmup + iterations):
+        if clear_cache:
+            cache.clear()
+        with timing.RequestTiming().activate() as captured:
+            start = time.perf_counter()
+            response = client.get(url, secure=True)
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            elapsed = (time.perf_counter() - start) * 1000
+        status = response.status_code
+        if index >= warmup:
+            latencies.append(elapsed)
+            query_counts.append(captured.sql_count)
+    latencies.sort()
+    latency = {'min': round(latencies[0], 3), 'max': round(latencies[-1], 3), 'mean': round(statistics.fmean(latencies), 3)}
+    latency.update({f'p{pct}': round(percentile(latencies, pct), 3) for pct in PERCENTILES})
+    return {
+        'status': status,
+        'latency_ms': latency,
+        'queries': int(statistics.median(query_counts)),
+        'bytes': size,
+    }
+
+
+def run_benchmark(iterations=20, warmup=1, clear_cache=True, only=None, progress=None):
+    """
+    在当前数据库上逐个测量 build_cases() 列出的页面。
+
+    参数：
+        clear_cache：每次请求前清空缓存，测量未命中缓存时的开销；为 False 时测量缓存命中后的表现。
+        only：只测量名称包含其中任一子串的页面。
+        progress：可选回调，每测完一个页面以其结果调用。
+    返回：
+        结果字典列表，每项包含 view、url 以及 measure() 返回的指标。
+    """
+    admin, _ = User.objects.get_or_create(username=BENCHMARK_USERNAME, defaults={'is_superuser': True, 'is_staff': True})
+    if not admin.is_superuser:
+        raise ValueError(f'用户 {BENCHMARK_USERNAME} 已存在但不是超级用户。')
+    anonymous, superuser = Client(), Client()
+    superuser.force_login(admin)
+
+    results = []
+    for name, url, as_superuser in build_cases():
+        if only and not any(part in name for part in only):
+            continue
+        result = {'view': name, 'url': url}
+        result.update(measure(superuser if as_superuser else anonymous, url, iterations, warmup, clear_cache))
+        results.append(result)
+        if progress:
+            progress(result)
+    return results
+
+
+def compare_results(results, baseline, threshold=20.0):
+    """
+    与基线结果比较，找出查询数增加或 p50 延迟增长超过 threshold 百分比的页面。
+
+    两组结果都是 {'size': ..., 'view': ..., ...} 字典的列表，按 (size, view) 对应。
+    返回：
+        (size, view, 说明) 元组的列表。
+    """
+    previous = {(item['size'], item['view']): item for item in baseline}
+    regressions = []
+    for item in results:
+        before = previous.get((item['size'], item['view']))
+        if before is None:
+            continue
+        if item['queries'] > before['queries']:
+            regressions.append((item['size'], item['view'], f"查询数 {before['queries']} -> {item['queries']}"))
+        old, new = before['latency_ms']['p50'], item['latency_ms']['p50']
+        if old and (new - old) / old * 100 > threshold:
+            regressions.append((item['size'], item['view'], f'p50 {old:.1f}ms -> {new:.1f}ms'))
+    return regressions
+
+
+def server_urls():
+    """压测真实服务器时请求的页面：首页、按分类筛选的首页和评论最多的文章详情，均为匿名访问。"""
+    post = Post.objects.order_by('-comment_count', '-pk').first()
+    category = Category.objects.order_by('pk').first()
+    if post is None or category is None:
+        raise ValueError('数据不足，请先运行 seed_blog 生成数据。')
+    return [
+        reverse('home'),
+        f"{reverse('home')}?{urlencode({'category': category.pk})}",
+        reverse('post_detail', args=[post.pk]),
+    ]
+
+
+class GunicornServer:
+    """
+    在子进程中以项目根目录为工作目录运行 gunicorn，进入 with 块时等待端口可连接，退出时结束进程。
+
+    压测直接走 http，为服务器关闭 HTTPS 跳转与慢请求日志，避免重定向和写日志干扰结果。
+    """
+
+    def __init__(self, args, port, env=None):
+        self.command = [sys.executable, '-m', 'gunicorn', *args, '--bind', f'127.0.0.1:{port}']
+        self.env = dict(os.environ, SECURE_SSL_REDIRECT='False', SLOW_REQUEST_THRESHOLD_MS='', **(env or {}))
+        self.env.setdefault('DJANGO_SETTINGS_MODULE', 'CYTBlog.settings')
+        self.port = port
+        self.process = None
+        self.started_at = None
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        self.process = subprocess.Popen(self.command, env=self.env, cwd=settings.BASE_DIR)
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'服务器启动失败：{" ".join(self.command)}')
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=1).close()
+                return self
+            except OSError:
+                time.sleep(0.05)
+        self.__exit__(None, None, None)
+        raise RuntimeError(f'服务器在 60 秒内没有开始监听端口 {self.port}。')
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def worker_pids(self):
+        """gunicorn 主进程的子进程（即各 worker）的 PID，读取 /proc，仅支持 Linux。"""
+        with open(f'/proc/{self.process.pid}/task/{self.process.pid}/children') as source:
+            return [int(pid) for pid in source.read().split()]
+
+
+def fetch(port, url):
+    """请求一次 url，返回状态码。"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        conn.request('GET', url)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def check_server_urls(port, urls):
+    # 压测只统计 200 响应，先确认每个页面都能正常返回，避免把错误页的速度当作结果
+    for url in urls:
+        status = fetch(port, url)
+        if status != 200:
+            raise RuntimeError(f'{url} 返回状态码 {status}，请确认已运行 collectstatic 且数据库可用。')
+
+
+def load_server(port, urls, concurrency, duration, bust_cache=True):
+    """
+    用 concurrency 个线程（各自保持一条 keep-alive 连接）循环请求 urls，持续 duration 秒。
+
+    参数：
+        bust_cache：为每个请求附加不重复的查询参数，绕过匿名整页缓存、真正执行视图。
+    返回：
+        包含请求数、错误数、每秒请求数与延迟百分位数（毫秒）的字典。
+    """
+    deadline = time.perf_counter() + duration
+    counter = iter(range(sys.maxsize))
+    lock = threading.Lock()
+
+    def client(index):
+        latencies, errors = [], 0
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        position = index
+        while time.perf_counter() < deadline:
+            url = urls[position % len(urls)]
+            position += 1
+            if bust_cache:
+                with lock:
+                    serial = next(counter)
+                url = f'{url}{"&" if "?" in url else "?"}_={serial}'
+            start = time.perf_counter()
+            try:
+                conn.request('GET', url)
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            if response.status != 200:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+        conn.close()
+        return latencies, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(client, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(value for values, _ in outcomes for value in values)
+    latency = {'mean': round(statistics.fmean(latencies), 3) if latencies else 0.0}
+    latency.update({f'p{pct}': round(percentile(latencies, pct), 3) for pct in (50, 90, 99)})
+    return {
+        'requests': len(latencies),
+        'errors': sum(count for _, count in outcomes),
+        'rps': round(len(latencies) / elapsed, 1),
+        'latency_ms': latency,
+    }
+
+# 修改记录：
+# 1. 新建 benchmark.py，用测试客户端逐个请求全部公开页面与自定义后台页面，统计延迟百分位数、SQL 查询数与响应字节数，
+#    并可与基线结果比较找出回归。
+# 2. measure 改用 RequestTiming 统计 SQL 查询数，计入异步视图在其他线程中执行的查询。
+# 3. 从 benchmark_servers 命令移入启动 gunicorn 子进程与 HTTP 压测的函数，供 measure_workers 命令共用。
@@ -0,0 +1,109 @@
+import time
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from .db.routers import replica_may_be_stale
+
+# 版本号缓存键前缀：递增某个命名空间的版本号即可让该命名空间下的所有缓存条目失效
+VERSION_KEY_PREFIX = 'blog:version:'
+# 命名空间最近一次变化的时间戳，供条件请求的 Last-Modified 使用
+CHANGED_KEY_PREFIX = 'blog:changed:'
+
+
+def get_version(namespace):
+    """读取命名空间的当前版本号，缓存中不存在时以当前时间初始化。"""
+    key = VERSION_KEY_PREFIX + namespace
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(namespace):
+    """递增命名空间的版本号，旧版本的缓存条目不再被读取，随过期时间自然淘汰。"""
+    key = VERSION_KEY_PREFIX + namespace
+    cache.set(CHANGED_KEY_PREFIX + namespace, time.time(), timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def get_versions(*namespaces):
+    """一次读取多个命名空间的版本号，返回与参数顺序一致的列表。"""
+    keys = [VERSION_KEY_PREFIX + namespace for namespace in namespaces]
+    found = cache.get_many(keys)
+    return [found[key] if key in found else get_version(namespace) for key, namespace in zip(keys, namespaces)]
+
+
+def last_changed(*namespaces):
+    """
+    返回这些命名空间中最近一次变化的时间（UTC datetime）。
+
+    任一命名空间没有记录（例如缓存被清空后尚未变化过）时返回 None，调用方应只依赖版本号。
+    """
+    keys = [CHANGED_KEY_PREFIX + namespace for namespace in namespaces]
+    found = cache.get_many(keys)
+    if len(found) < len(keys):
+        return None
+    return datetime.fromtimestamp(max(found.values()), tz=timezone.utc)
+
+
+def post_namespace(post_id):
+    """单篇文章（详情页及其评论）的命名空间。"""
+    return f'post:{post_id}'
+
+
+def versioned_key(namespace, *parts):
+    """生成带命名空间版本号的缓存键。"""
+    return ':'.join(['blog', namespace, str(get_version(namespace)), *map(str, parts)])
+
+
+def get_or_set(namespace, parts, default, timeout=DEFAULT_TIMEOUT):
+    """
+    按版本化缓存键读取数据，未命中时调用 default() 计算并写入缓存。
+
+    参数：
+        namespace：命名空间，写操作通过 bump_version(namespace) 使其失效。
+        parts：缓存键的其余组成部分（元组或列表）。
+        default：未命中时调用的无参函数。
+        timeout：过期秒数，默认使用缓存后端的 TIMEOUT 配置。
+
+    从可能落后的只读副本计算出的值只返回、不写入缓存，以免旧数据以新的版本号缓存下来。
+    """
+    key = versioned_key(namespace, *parts)
+    value = cache.get(key)
+    if value is None:
+        value = default()
+        if not replica_may_be_stale():
+            cache.set(key, value, timeout)
+    return value
+
+
+def _versioned_get(namespace, parts):
+    key = versioned_key(namespace, *parts)
+    return key, cache.get(key)
+
+
+async def aget_or_set(namespace, parts, default, timeout=DEFAULT_TIMEOUT):
+    """get_or_set 的异步版本，default 为无参的协程函数。"""
+    key, value = await sync_to_async(_versioned_get)(namespace, parts)
+    if value is None:
+        value = await default()
+        if not await sync_to_async(replica_may_be_stale)():
+            await cache.aset(key, value, timeout)
+    return value
+
+# 修改记录：
+# 1. 新建 caching.py，提供基于命名空间版本号的缓存键与失效工具，供标签云等缓存数据使用。
+# 2. bump_version 同时记录命名空间的变化时间；新增 get_versions 与 last_changed，供条件请求计算 ETag/Last-Modified。
+# 3. 添加 post_namespace，单篇文章的详情页缓存按文章独立失效。
+# 4. 添加 aget_or_set，供异步视图读取版本化缓存。
+# 5. 最近有写入且数据从只读副本读取时，get_or_set 与 aget_or_set 不写入缓存。
@@ -0,0 +1,215 @@
+from collections import Counter
+
+from django.db import connections, router, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .caching import bump_version, post_namespace
+from .models import Comment, Post
+
+# 批量删除时每条 SQL 语句携带的主键数量上限
+DELETE_BATCH_SIZE = 500
+# 计数修复时每批处理的文章数量
+RECONCILE_CHUNK_SIZE = 1000
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def load_comment_thread(post):
+    """
+    一次查询取出文章的全部评论，并在内存中按一级评论分组。
+
+    参数：
+        post：Post 实例或主键（异步视图在取出文章的同时并发加载评论）。
+    返回：
+        (parent_comments, replies_dict)：一级评论列表（按时间倒序），
+        以及 {一级评论ID: [该楼层下的全部回复（按时间正序）]} 字典。
+    """
+    comments = (
+        Comment.objects.filter(post=post)
+        .select_related('author', 'parent__author')
+        .order_by('created_at', 'id')
+    )
+    parent_comments = []
+    replies_dict = {}
+    for comment in comments:
+        if comment.parent_id is None:
+            parent_comments.append(comment)
+            replies_dict.setdefault(comment.id, [])
+        else:
+            # 兼容尚未写入 root 的旧数据：退回到直接父评论
+            replies_dict.setdefault(comment.root_id or comment.parent_id, []).append(comment)
+    parent_comments.reverse()
+    return parent_comments, replies_dict
+
+
+def apply_count_deltas(model, field, deltas, using=None):
+    """
+    按 {主键: 增量} 以 F() 表达式原子更新计数字段，增量相同的行合并为一条 UPDATE。
+
+    减少时以 0 为下限，避免计数偏差导致写入负数。using 为 None 时由数据库路由决定。
+    """
+    by_amount = {}
+    for pk, amount in deltas.items():
+        if amount:
+            by_amount.setdefault(amount, []).append(pk)
+    for amount, pks in by_amount.items():
+        for chunk in _chunks(pks, DELETE_BATCH_SIZE):
+            value = F(field) + amount if amount > 0 else Greatest(F(field) + amount, Value(0))
+            model.objects.using(using).filter(pk__in=chunk).update(**{field: value})
+
+
+def invalidate_comment_pages(post_ids):
+    """
+    评论增删后递增受影响文章的 'post:<id>' 版本号，以及显示评论数的列表页依赖的 'comments' 版本号。
+
+    Comment 不注册逐行信号（否则删除文章时无法快速级联删除评论），由每次增删操作结束时调用一次。
+    """
+    for post_id in post_ids:
+        bump_version(post_namespace(post_id))
+    if post_ids:
+        bump_version('comments')
+
+
+def record_new_comment(comment):
+    """新评论保存后递增所属文章的评论数并刷新其修改时间，回复同时递增所在楼层的回复数。"""
+    Post.objects.filter(pk=comment.post_id).update(comment_count=F('comment_count') + 1, updated_at=timezone.now())
+    if comment.root_id:
+        Comment.objects.filter(pk=comment.root_id).update(reply_count=F('reply_count') + 1)
+    invalidate_comment_pages([comment.post_id])
+
+
+def touch_comment_posts(post_ids):
+    """评论内容被修改（例如在 Django admin 中编辑）后刷新所属文章的修改时间并使其缓存失效。"""
+    post_ids = set(post_ids)
+    for chunk in _chunks(post_ids, DELETE_BATCH_SIZE):
+        Post.objects.filter(pk__in=chunk).update(updated_at=timezone.now())
+    invalidate_comment_pages(post_ids)
+
+
+def _count_subquery(field):
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def reconcile_comment_counts(post_ids=None, chunk_size=RECONCILE_CHUNK_SIZE, progress=None):
+    """
+    按实际评论行数修复 Post.comment_count 与一级评论的 reply_count。
+
+    参数：
+        post_ids：只修复这些文章，默认修复全部文章。
+        chunk_size：每批处理的文章数量，每批两条集合式 UPDATE，只改写计数有偏差的行。
+        progress：可选回调，每批结束后以已处理的文章数调用。
+    返回：
+        (修复的文章数, 修复的评论数)。
+    """
+    posts = Post.objects.order_by('pk')
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    comment_total = _count_subquery('post_id')
+    reply_total = _count_subquery('root_id')
+    fixed_posts = fixed_comments = done = 0
+    pks = posts.values_list('pk', flat=True).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = [pk for _, pk in zip(range(chunk_size), pks)]
+        if not chunk:
+            break
+        fixed_posts += (
+            Post.objects.filter(pk__in=chunk).exclude(comment_count=comment_total)
+            .update(comment_count=comment_total)
+        )
+        fixed_comments += (
+            Comment.objects.filter(post_id__in=chunk, parent__isnull=True).exclude(reply_count=reply_total)
+            .update(reply_count=reply_total)
+        )
+        done += len(chunk)
+        if progress:
+            progress(done)
+    return fixed_posts, fixed_comments
+
+
+def collect_descendants(comment_ids, using=None):
+    """
+    收集评论及其全部后代回复的主键。
+
+    一级评论的后代通过 root 字段一次取出；被选中的回复再沿 parent 逐层向下查找。
+    删除时应传入写库的 using，否则刚发表的回复可能因副本延迟而漏掉。
+    """
+    comments = Comment.objects.using(using)
+    ids = set(comment_ids)
+    for chunk in _chunks(ids, DELETE_BATCH_SIZE):
+        ids.update(comments.filter(root_id__in=chunk).values_list('id', flat=True))
+    frontier = ids
+    while frontier:
+        children = set()
+        for chunk in _chunks(frontier, DELETE_BATCH_SIZE):
+            children.update(comments.filter(parent_id__in=chunk).values_list('id', flat=True))
+        frontier = children - ids
+        ids |= frontier
+    return ids
+
+
+def _delete_rows(model, pks, using):
+    """以一条 DELETE 语句按主键删除行，不经过 Collector 逐条加载实例，返回删除的行数。"""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(pks))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} IN ({placeholders})',
+            list(pks),
+        )
+        return cursor.rowcount
+
+
+def delete_comments(comment_ids):
+    """
+    以集合式 SQL 批量删除评论及其全部后代回复，不逐条加载模型实例，
+    并按删除的行数以 F() 表达式扣减文章评论数与楼层回复数。
+
+    返回：
+        (删除的评论数, 受影响的文章ID集合)。
+    """
+    deleted = 0
+    post_deltas, reply_deltas = Counter(), Counter()
+    using = router.db_for_write(Comment)
+    with transaction.atomic(using=using):
+        ids = collect_descendants(comment_ids, using)
+        for chunk in _chunks(ids, DELETE_BATCH_SIZE):
+            for post_id, root_id in Comment.objects.using(using).filter(id__in=chunk).values_list('post_id', 'root_id'):
+                post_deltas[post_id] -= 1
+                # 楼层本身也被删除时无需再更新其回复数
+                if root_id and root_id not in ids:
+                    reply_deltas[root_id] -= 1
+            # 外键约束在事务提交时才检查，父子评论的删除顺序无关紧要
+            deleted += _delete_rows(Comment, chunk, using)
+        post_ids = set(post_deltas)
+        apply_count_deltas(Post, 'comment_count', post_deltas, using)
+        apply_count_deltas(Comment, 'reply_count', reply_deltas, using)
+        # 统一刷新受影响文章的修改时间
+        for chunk in _chunks(post_ids, DELETE_BATCH_SIZE):
+            Post.objects.using(using).filter(pk__in=chunk).update(updated_at=timezone.now())
+    invalidate_comment_pages(post_ids)
+    return deleted, post_ids
+
+# 修改记录：
+# 1. 新建 comments.py，提供 load_comment_thread，借助 Comment.root 冗余字段以常数次查询加载整篇文章的评论树，替代逐条递归查询。
+# 2. 添加 collect_descendants 与 delete_comments，供评论审核页面以集合式 SQL 批量删除评论及其回复。
+# 3. delete_comments 删除后刷新受影响文章的 updated_at 并递增其 'post:<id>' 版本号，使详情页的验证器与整页缓存失效。
+# 4. 添加评论计数维护：record_new_comment 与 delete_comments 以 F() 表达式原子增减计数，reconcile_comment_counts 批量修复偏差。
+# 5. delete_comments 改用 _delete_rows 在写库上执行按主键的 DELETE 语句，不再依赖 QuerySet 的私有方法。
+# 6. 移除 Comment 的逐行信号后，由 record_new_comment、delete_comments 与 touch_comment_posts 在每次操作结束时刷新文章修改时间并调用一次 invalidate_comment_pages。
+# 7. 删除路径中的全部查询（收集后代回复、扣减计数、刷新修改时间）都在写库 using 上执行，不再经过读路由。
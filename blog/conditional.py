@@ -0,0 +1,136 @@
+import hashlib
+from calendar import timegm
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .caching import get_versions, last_changed
+from .context_processors import user_namespace
+from .db.routers import replica_may_be_stale
+from .models import Post
+
+
+def has_pending_messages(request):
+    # 有待显示的提示消息时页面内容不同于缓存的版本，不能返回 304
+    return bool(len(get_messages(request)))
+
+
+def viewer_parts(request):
+    """页面导航栏随登录用户变化：ETag 中包含用户 ID 及其展示数据的版本号。"""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return ['anonymous']
+    return [f'user-{user.pk}', *get_versions(user_namespace(user.pk))]
+
+
+def make_etag(*parts):
+    return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def conditional_page(etag_func, last_modified_func=None):
+    """
+    与 django.views.decorators.http.condition 相同地处理公开页面的条件请求，同时支持同步与异步视图。
+
+    etag_func / last_modified_func 返回 None 时不做条件判断；有待显示的提示消息时
+    两者都跳过。响应附加 Cache-Control: no-cache，浏览器每次都携带验证器重新验证，
+    登录用户的页面另加 private。异步视图的验证器在线程中计算（可能读取会话与数据库）。
+
+    页面内容从可能落后的只读副本读取时不附带验证器：验证器来自已递增的版本号，
+    客户端否则会带着新验证器一直收到旧内容的 304。
+    """
+    def validators(request, *args, **kwargs):
+        private = request.user.is_authenticated
+        if has_pending_messages(request):
+            return None, None, private
+        value = etag_func(request, *args, **kwargs)
+        etag = None if value is None else quote_etag(make_etag(value, *viewer_parts(request)))
+        modified = last_modified_func(request, *args, **kwargs) if last_modified_func else None
+        return etag, (timegm(modified.utctimetuple()) if modified else None), private
+
+    def finalize(request, response, etag, last_modified, private):
+        if request.method in ('GET', 'HEAD'):
+            if last_modified and not response.has_header('Last-Modified'):
+                response.headers['Last-Modified'] = http_date(last_modified)
+            if etag:
+                response.headers.setdefault('ETag', etag)
+            if response.has_header('ETag'):
+                if private:
+                    patch_cache_control(response, no_cache=True, private=True)
+                else:
+                    patch_cache_control(response, no_cache=True)
+        return response
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                etag, last_modified, private = await sync_to_async(validators)(request, *args, **kwargs)
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = await view_func(request, *args, **kwargs)
+                    if await sync_to_async(replica_may_be_stale)():
+                        etag = last_modified = None
+                return finalize(request, response, etag, last_modified, private)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            etag, last_modified, private = validators(request, *args, **kwargs)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if replica_may_be_stale():
+                    etag = last_modified = None
+            return finalize(request, response, etag, last_modified, private)
+        return wrapper
+    return decorator
+
+
+def namespaces_condition(*namespaces):
+    """按缓存命名空间的版本号计算 ETag、按最近变化时间计算 Last-Modified，不查询数据库。"""
+    return conditional_page(
+        lambda request, *args, **kwargs: ':'.join(map(str, [*namespaces, *get_versions(*namespaces)])),
+        lambda request, *args, **kwargs: last_changed(*namespaces),
+    )
+
+
+def _post_updated_at(request, pk):
+    # ETag 与 Last-Modified 各计算一次，在请求上缓存查询结果
+    cache_attr = '_post_updated_at'
+    if not hasattr(request, cache_attr):
+        setattr(request, cache_attr, Post.objects.filter(pk=pk).values_list('updated_at', flat=True).first())
+    return getattr(request, cache_attr)
+
+
+# 详情页还显示分类名称与作者、评论者的用户名，改名不会刷新 Post.updated_at
+POST_SHARED_NAMESPACES = ('categories', 'authors')
+
+
+def _post_etag(request, pk):
+    updated_at = _post_updated_at(request, pk)
+    if updated_at is None:
+        return None
+    return ':'.join(map(str, [f'post:{pk}', updated_at.isoformat(), *get_versions(*POST_SHARED_NAMESPACES)]))
+
+
+def _post_last_modified(request, pk):
+    updated_at = _post_updated_at(request, pk)
+    changed = last_changed(*POST_SHARED_NAMESPACES)
+    if updated_at is None or changed is None:
+        return updated_at
+    return max(updated_at, changed)
+
+
+def post_condition():
+    """文章详情页以 Post.updated_at 为验证器（评论增删时一并刷新），并计入分类与作者改名。"""
+    return conditional_page(_post_etag, _post_last_modified)
+
+# 修改记录：
+# 1. 新建 conditional.py，为公开页面提供 ETag/Last-Modified 条件请求装饰器：列表页基于缓存命名空间版本号，
+#    文章详情页基于 Post.updated_at，重复访问在渲染模板之前即可返回 304。
+# 2. conditional_page 不再包装 django 的 condition（只支持同步视图），改为自行计算验证器并同时支持异步视图。
+# 3. 文章详情页的验证器计入 'categories' 与 'authors' 的版本号和变化时间，分类或用户改名后不再返回过期的 304。
+# 4. 最近有写入且页面从只读副本读取时不附带 ETag/Last-Modified，避免以新的版本号验证旧内容。
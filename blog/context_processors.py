@@ -0,0 +1,43 @@
+from django.utils.functional import SimpleLazyObject
+
+from .caching import get_or_set
+from .models import UserProfile
+
+# 用户展示数据的缓存时间（秒）；资料变化时由信号递增版本号立即失效
+USER_DISPLAY_TIMEOUT = 60 * 60 * 24
+
+
+def user_namespace(user_id):
+    return f'user:{user_id}'
+
+
+def build_user_display(user):
+    profile_image = (
+        UserProfile.objects.filter(user_id=user.pk).values_list('profile_image', flat=True).first()
+    )
+    # 默认头像是静态文件，不在媒体存储中，由模板回退到 static 地址
+    if profile_image == UserProfile._meta.get_field('profile_image').default:
+        profile_image = ''
+    return {'username': user.get_username(), 'avatar': profile_image or ''}
+
+
+def get_user_display(user):
+    """读取已登录用户的展示数据（用户名、头像存储名称），按用户版本号缓存。"""
+    return get_or_set(
+        user_namespace(user.pk), ['display'], lambda: build_user_display(user), USER_DISPLAY_TIMEOUT,
+    )
+
+
+def user_display(request):
+    """
+    提供 user_display 模板变量，base.html 渲染导航栏时不再查询 UserProfile。
+
+    数据在模板首次访问时才从缓存读取，未登录用户为 None。
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {'user_display': None}
+    return {'user_display': SimpleLazyObject(lambda: get_user_display(user))}
+
+# 修改记录：
+# 1. 新建 context_processors.py，user_display 按用户 ID 版本化缓存用户名与头像，base.html 不再逐页查询 UserProfile。
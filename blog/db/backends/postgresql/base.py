@@ -0,0 +1,9 @@
+from django.db.backends.postgresql import base
+
+from blog.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """从进程内连接池借出连接的 PostgreSQL 后端，设置 DB_POOL=True 时使用。"""
+
+# 修改记录：新建使用连接池的 PostgreSQL 数据库后端。
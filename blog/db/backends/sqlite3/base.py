@@ -0,0 +1,9 @@
+from django.db.backends.sqlite3 import base
+
+from blog.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """从进程内连接池借出连接的 SQLite 后端，用于在本地验证连接池（内存数据库的连接不会被关闭，也就不会归还）。"""
+
+# 修改记录：新建使用连接池的 SQLite 数据库后端。
@@ -0,0 +1,269 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError, ProgrammingError
+
+logger = logging.getLogger(__name__)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(OperationalError):
+    """在等待时间内没有空闲连接，且连接数已达上限。"""
+
+
+class _PooledConnection:
+    __slots__ = ('raw', 'created_at', 'released_at')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = self.released_at = time.monotonic()
+
+
+def is_usable(raw):
+    """用 SELECT 1 检查连接是否可用，之后回滚，保证连接不处于事务中。"""
+    if getattr(raw, 'closed', False):
+        return False
+    try:
+        cursor = raw.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+        raw.rollback()
+    except Exception:
+        return False
+    return True
+
+
+class ConnectionPool:
+    """
+    进程内的数据库连接池，各线程（包括异步视图并发查询使用的线程池）共用。
+
+    参数：
+        connect：无参数的可调用对象，返回新的 DB-API 连接；也可以在每次 acquire 时传入。
+        max_size：同时存在（空闲与使用中合计）的连接数上限，达到上限后 acquire 等待其他线程归还。
+        max_lifetime：连接创建后最多使用的秒数，超过后在借出或归还时关闭，None 表示不限制；
+            用于配合数据库或中间代理对长连接的限制，并让连接逐步轮换。
+        timeout：acquire 等待空闲连接的最长秒数，超时抛出 PoolTimeout。
+        check_idle：空闲超过该秒数的连接在借出前执行健康检查（SELECT 1），为 0 时每次借出都检查；
+            刚归还的连接几乎不可能失效，跳过检查可以省去一次往返。
+        check：健康检查函数，接收 DB-API 连接，返回是否可用。
+    """
+
+    def __init__(self, connect=None, max_size=10, max_lifetime=1800, timeout=10, check_idle=1.0, check=is_usable):
+        self.connect = connect
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.check_idle = check_idle
+        self.check = check
+        self._idle = deque()
+        self._in_use = {}
+        self._size = 0
+        self._waiting = 0
+        self._condition = threading.Condition()
+        self._stats = dict.fromkeys(
+            ('created', 'closed', 'checkouts', 'health_check_failures', 'expired', 'timeouts', 'waits'), 0
+        )
+        self._wait_ms = 0.0
+
+    def _expired(self, pooled, now):
+        return self.max_lifetime is not None and now - pooled.created_at >= self.max_lifetime
+
+    def _count(self, name):
+        with self._condition:
+            self._stats[name] += 1
+
+    def _discard(self, pooled):
+        # 调用方已在锁外，关闭连接可能需要网络往返
+        try:
+            pooled.raw.close()
+        except Exception:
+            logger.debug('关闭数据库连接失败', exc_info=True)
+        with self._condition:
+            self._size -= 1
+            self._stats['closed'] += 1
+            self._condition.notify()
+
+    def acquire(self, connect=None):
+        """
+        借出一个连接：优先复用最近归还的空闲连接（超过最长使用时间或健康检查失败的直接关闭），
+        没有空闲连接且未达上限时用 connect（默认为创建连接池时传入的函数）新建，否则等待。
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._condition:
+                pooled = None
+                while pooled is None:
+                    if self._idle:
+                        pooled = self._idle.pop()
+                    elif self._size < self.max_size:
+                        self._size += 1
+                        break
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats['timeouts'] += 1
+                            raise PoolTimeout(f'等待 {self.timeout} 秒后仍没有可用的数据库连接（上限 {self.max_size}）。')
+                        self._waiting += 1
+                        self._stats['waits'] += 1
+                        start = time.monotonic()
+                        try:
+                            self._condition.wait(remaining)
+                        finally:
+                            self._waiting -= 1
+                            self._wait_ms += (time.monotonic() - start) * 1000
+
+            if pooled is None:
+                try:
+                    pooled = _PooledConnection((connect or self.connect)())
+                except BaseException:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+                with self._condition:
+                    self._stats['created'] += 1
+            else:
+                now = time.monotonic()
+                if self._expired(pooled, now):
+                    self._count('expired')
+                    self._discard(pooled)
+                    continue
+                if now - pooled.released_at >= self.check_idle and not self.check(pooled.raw):
+                    self._count('health_check_failures')
+                    self._discard(pooled)
+                    continue
+
+            with self._condition:
+                self._in_use[id(pooled.raw)] = pooled
+                self._stats['checkouts'] += 1
+            return pooled.raw
+
+    def release(self, raw, discard=False):
+        """
+        归还连接。回滚未结束的事务后放回空闲队列；discard 为 True、回滚失败或超过最长使用时间的连接直接关闭。
+        """
+        with self._condition:
+            pooled = self._in_use.pop(id(raw), None)
+        if pooled is None:
+            # 不是从本连接池借出的连接（例如连接池被重置之前借出），直接关闭
+            try:
+                raw.close()
+            except Exception:
+                pass
+            return
+        now = time.monotonic()
+        if discard or self._expired(pooled, now):
+            if not discard:
+                self._count('expired')
+            self._discard(pooled)
+            return
+        try:
+            raw.rollback()
+        except Exception:
+            self._discard(pooled)
+            return
+        pooled.released_at = now
+        with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    def close_idle(self):
+        """关闭全部空闲连接，例如 gunicorn 主进程在 fork worker 之前。"""
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+        for pooled in idle:
+            self._discard(pooled)
+
+    def stats(self):
+        """连接池当前状态与累计计数，用于调试。"""
+        with self._condition:
+            stats = {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'waiting': self._waiting,
+                'max_size': self.max_size,
+                'wait_ms': round(self._wait_ms, 3),
+            }
+            stats.update(self._stats)
+        return stats
+
+
+def get_pool(alias, options):
+    """返回数据库别名 alias 对应的连接池，首次调用时按 options（DATABASES 中的 POOL 设置）创建。"""
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None:
+                pool = _pools[alias] = ConnectionPool(
+                    max_size=options.get('MAX_SIZE', 10),
+                    max_lifetime=options.get('MAX_LIFETIME', 1800),
+                    timeout=options.get('TIMEOUT', 10),
+                    check_idle=options.get('CHECK_IDLE', 1.0),
+                )
+    return pool
+
+
+def pool_stats():
+    """{数据库别名: 连接池状态}，只包含已创建的连接池。"""
+    return {alias: pool.stats() for alias, pool in list(_pools.items())}
+
+
+def close_idle_connections():
+    for pool in list(_pools.values()):
+        pool.close_idle()
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    让 Django 的数据库后端从连接池借出连接，关闭时归还。
+
+    与具体后端的 DatabaseWrapper 组合使用（见 blog/db/backends）。连接池接管连接复用，
+    CONN_MAX_AGE 应设为 0，使每个请求结束时连接归还给连接池而不是留在线程上。
+    """
+
+    def get_new_connection(self, conn_params):
+        # 新建连接时使用当前 DatabaseWrapper 的 get_new_connection，后端会在其中设置自身的状态
+        connect = super().get_new_connection
+        return get_pool(self.alias, self.settings_dict.get('POOL', {})).acquire(lambda: connect(conn_params))
+
+    def ensure_connection(self):
+        # Django 会在事务块中直接重新连接并以自动提交模式继续执行，已回滚的事务后半段将被单独提交
+        if self.connection is None and self.in_atomic_block and self.closed_in_transaction:
+            raise ProgrammingError('Cannot open a new connection in an atomic block.')
+        super().ensure_connection()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = _pools.get(self.alias)
+        raw = self.connection
+        # 出现过数据库错误的连接不再复用
+        discard = self.errors_occurred
+        if self.in_atomic_block:
+            # 在事务中被关闭：先回滚未完成的事务再归还，回滚失败的连接直接关闭。
+            # Django 此时保留 self.connection 直到事务块退出，这里主动解除引用，
+            # 避免已交给其他线程的连接仍被本线程的事务块使用；事务块内再次查询由 ensure_connection 报错
+            self.connection = None
+            try:
+                raw.rollback()
+            except Exception:
+                discard = True
+        with self.wrap_database_errors:
+            if pool is None:
+                raw.close()
+            else:
+                pool.release(raw, discard=discard)
+
+# 修改记录：
+# 1. 新建 pool.py，提供进程内数据库连接池（借出时健康检查、最长使用时间、连接数上限、统计信息）
+#    及让 Django 数据库后端使用连接池的 PooledDatabaseWrapperMixin。
+# 2. 在事务块中关闭的连接先回滚再通过连接池归还，并解除 DatabaseWrapper 对它的引用，
+#    不再关闭后仍留在 DatabaseWrapper 上；事务块退出前不允许重新建立连接。
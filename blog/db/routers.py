@@ -0,0 +1,113 @@
+import contextlib
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# 最近有写入时在共享缓存中设置的标记，有效期为副本的最大复制延迟（DATABASE_REPLICA_MAX_LAG_SECONDS）。
+# 写入后缓存版本号立即递增，副本却可能仍是旧数据：标记有效期内从副本读取的内容不写入缓存，也不附带验证器
+RECENT_WRITE_KEY = 'blog:db:recent_write'
+# 会话表每个登录请求都要读取且必须是最新的，始终使用主库；保存会话也不算作内容写入
+PRIMARY_ONLY_APPS = {'sessions'}
+
+_state = contextvars.ContextVar('blog_db_routing', default=None)
+
+
+class RoutingState:
+    """
+    一个请求的读写路由状态，由 ReplicaPinningMiddleware 创建。
+
+    pinned 为 True 时本请求的读取都走主库（带有写入后的 Cookie 标记，或是 POST 等写请求），
+    只取决于本用户的请求，不读取缓存。replica 为本请求读取过的副本。
+    """
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = None
+
+    def mark_write(self):
+        if self.wrote:
+            return
+        self.wrote = self.pinned = True
+        mark_recent_write()
+
+
+def mark_recent_write():
+    cache.set(RECENT_WRITE_KEY, True, settings.DATABASE_REPLICA_MAX_LAG_SECONDS)
+
+
+def replica_may_be_stale():
+    """
+    本请求从副本读取过数据，且最近有写入、副本可能尚未追上。
+
+    只在需要时（保存缓存、附加 ETag/Last-Modified 之前）读取缓存；返回 True 时读到的数据
+    可能比当前的缓存版本号旧，不能以这些版本号缓存或作为验证器发给客户端。
+    """
+    state = _state.get()
+    return state is not None and state.replica is not None and bool(cache.get(RECENT_WRITE_KEY))
+
+
+@contextlib.contextmanager
+def routing(pinned=False):
+    """在 with 块内使用新的路由状态；保存在 ContextVar 中，异步视图在线程池中执行的查询同样可见。"""
+    state = RoutingState(pinned)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+class ReplicaRouter:
+    """
+    读写分离：写入与事务走主库（default），读取分摊到 DATABASE_REPLICAS 中的只读副本。
+
+    同一请求内的读取固定使用同一个副本，避免各副本复制延迟不同导致前后矛盾；
+    用户写入后的一段时间内（DATABASE_REPLICA_PIN_SECONDS）该用户的读取改走主库，保证能立即看到自己的修改；
+    其他用户仍读副本。
+    请求之外（管理命令、后台线程等）以及主库事务中的读取都走主库：它们常常紧接着读取刚写入的行。
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        # 通过主库读出的对象，其关联对象也从主库读取
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == DEFAULT_DB_ALIAS:
+            return DEFAULT_DB_ALIAS
+        state = _state.get()
+        if state is None or state.pinned or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state.replica is None:
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        if settings.DATABASE_REPLICAS and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            state = _state.get()
+            # 管理命令等请求之外的写入同样会让副本暂时落后
+            if state is None:
+                mark_recent_write()
+            else:
+                state.mark_write()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # 副本的表结构来自主库的复制，不在副本上执行迁移
+        return db == DEFAULT_DB_ALIAS
+
+# 修改记录：
+# 1. 新建 routers.py，ReplicaRouter 将读取分摊到只读副本、写入发往主库，写入后通过请求状态与共享缓存标记暂时改读主库。
+# 2. 只有带 Cookie 标记的用户改读主库，其他请求不再读取最近写入标记；该标记改由 replica_may_be_stale 供整页缓存判断是否保存。
+# 3. 最近写入标记的有效期改为 DATABASE_REPLICA_MAX_LAG_SECONDS，请求之外的写入同样设置；replica_may_be_stale 同时用于条件请求验证器与版本化缓存。
+# 4. 请求之外以及主库事务内的读取改走主库，导入命令、标签同步与评论删除可以读到刚写入的行。
@@ -0,0 +1,68 @@
+import json
+
+from django.utils.text import compress_sequence
+
+from .models import AnimeNavigation, Category, Comment, Post, WebsiteNavigation
+
+# 每次从数据库读取、并合并为一个输出块的记录数
+EXPORT_CHUNK_SIZE = 2000
+
+# 导出的数据类型及字段；外键导出为 ID，作者额外导出用户名便于跨站点导入
+EXPORT_SOURCES = {
+    'category': (Category, ('id', 'name', 'is_predefined')),
+    'post': (Post, (
+        'id', 'title', 'content', 'created_date', 'author_id', 'author__username',
+        'category_id', 'custom_category', 'tags',
+    )),
+    'comment': (Comment, (
+        'id', 'post_id', 'parent_id', 'root_id', 'author_id', 'author__username', 'content', 'created_at',
+    )),
+    'anime_navigation': (AnimeNavigation, ('id', 'title', 'image', 'url', 'created_at')),
+    'website_navigation': (WebsiteNavigation, ('id', 'title', 'url', 'description', 'created_at')),
+}
+
+
+def _json_default(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'无法序列化的值：{value!r}')
+
+
+def iter_records(types=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    按类型依次、按主键顺序逐条产出导出记录，每条记录带 type 字段。
+
+    参数：
+        types：要导出的类型名列表，默认导出 EXPORT_SOURCES 中的全部类型。
+        chunk_size：数据库游标每次读取的行数。
+    """
+    for name in types or EXPORT_SOURCES:
+        model, fields = EXPORT_SOURCES[name]
+        rows = model.objects.order_by('pk').values(*fields).iterator(chunk_size=chunk_size)
+        for row in rows:
+            record = {'type': name}
+            for field, value in row.items():
+                record[field.replace('__', '_')] = value
+            yield record
+
+
+def iter_ndjson(types=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """以 NDJSON 格式产出导出数据，每 chunk_size 行合并为一个 bytes 块。"""
+    lines = []
+    for record in iter_records(types, chunk_size):
+        lines.append(json.dumps(record, ensure_ascii=False, default=_json_default))
+        if len(lines) >= chunk_size:
+            yield ('\n'.join(lines) + '\n').encode()
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode()
+
+
+def export_stream(types=None, chunk_size=EXPORT_CHUNK_SIZE, compress=False):
+    """导出数据流，compress 为 True 时逐块输出 gzip 压缩数据。"""
+    chunks = iter_ndjson(types, chunk_size)
+    return compress_sequence(chunks) if compress else chunks
+
+# 修改记录：
+# 1. 新建 export.py，按主键顺序分批读取文章、评论、分类与导航数据，逐块产出 NDJSON（可选 gzip），
+#    供 export_blog 管理命令与后台下载视图共用，内存占用与数据量无关。
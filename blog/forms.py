@@ -1,4 +1,8 @@
+from datetime import datetime, time, timedelta
+
 from django import forms
+from django.utils import timezone
+
 from .models import Post, Category, Comment, About, Contact, AnimeNavigation, WebsiteNavigation
 
 class CommentForm(forms.ModelForm):
@@ -6,6 +10,36 @@ class CommentForm(forms.ModelForm):
         model = Comment
         fields = ['content']
 
+def start_of_day(date):
+    # 当前时区当天零点对应的时间
+    return timezone.make_aware(datetime.combine(date, time.min))
+
+class CommentFilterForm(forms.Form):
+    post = forms.IntegerField(required=False, min_value=1, widget=forms.NumberInput(attrs={'placeholder': '文章ID'}))
+    author = forms.CharField(required=False, max_length=150, widget=forms.TextInput(attrs={'placeholder': '作者用户名'}))
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def has_filters(self):
+        """表单有效且至少填写了一个筛选条件；批量删除“全部筛选结果”前必须满足。"""
+        return self.is_valid() and any(value not in (None, '') for value in self.cleaned_data.values())
+
+    def filter(self, queryset):
+        """按已校验的条件筛选评论查询集，表单无效时原样返回。"""
+        if not self.is_valid():
+            return queryset
+        data = self.cleaned_data
+        if data['post']:
+            queryset = queryset.filter(post_id=data['post'])
+        if data['author']:
+            queryset = queryset.filter(author__username=data['author'].strip())
+        # 日期条件换算为左闭右开的时间范围，直接比较 created_at 才能使用索引
+        if data['date_from']:
+            queryset = queryset.filter(created_at__gte=start_of_day(data['date_from']))
+        if data['date_to']:
+            queryset = queryset.filter(created_at__lt=start_of_day(data['date_to'] + timedelta(days=1)))
+        return queryset
+
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
@@ -94,4 +128,6 @@ class WebsiteNavigationForm(forms.ModelForm):
 # 修改记录：
 # 1. 为 AnimeNavigationForm 添加 clean_title 方法，确保标题不为空。
 # 2. 为 WebsiteNavigationForm 添加 clean_title 和 clean_description 方法，确保标题不为空且描述不超过200字。
-# 3. 为所有表单添加 widgets 和 placeholder 属性，提升用户体验。
\ No newline at end of file
+# 3. 为所有表单添加 widgets 和 placeholder 属性，提升用户体验。
+# 4. 添加 CommentFilterForm，供评论审核页面按文章、作者和日期范围筛选评论。
+# 5. CommentFilterForm 的日期条件改为 created_at 上左闭右开的时间范围以使用索引；添加 has_filters，供批量删除判断是否填写了筛选条件。
@@ -0,0 +1,125 @@
+import io
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# 各用途生成的固定宽度（像素）；原图更窄时不放大，按原尺寸输出
+IMAGE_PRESETS = {
+    'anime': (320, 640, 960),
+    'avatar': (48, 96, 192),
+}
+DERIVATIVES_DIR = 'derivatives'
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+JPEG_BACKGROUND = (255, 255, 255)
+
+# 派生图是否已生成的缓存：已生成的长期缓存，未生成的短时缓存以免每次渲染都访问存储
+READY_CACHE_PREFIX = 'blog:derivatives:'
+NOT_READY_TIMEOUT = 60
+
+_executor = None
+
+
+def derivative_name(name, width, fmt):
+    """原图在存储中的名称对应的派生图名称，例如 derivatives/anime_images/foo/w320.webp。"""
+    stem = posixpath.splitext(name)[0]
+    return posixpath.join(DERIVATIVES_DIR, stem, f'w{width}.{fmt}')
+
+
+def derivative_urls(name, preset, fmt):
+    return [(default_storage.url(derivative_name(name, width, fmt)), width) for width in IMAGE_PRESETS[preset]]
+
+
+def derivatives_ready(name, preset):
+    """派生图是否已全部生成（以最后写入的最大宽度 JPEG 为准）。"""
+    key = READY_CACHE_PREFIX + name
+    ready = cache.get(key)
+    if ready is None:
+        ready = default_storage.exists(derivative_name(name, IMAGE_PRESETS[preset][-1], 'jpg'))
+        cache.set(key, ready, None if ready else NOT_READY_TIMEOUT)
+    return ready
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'webp':
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    else:
+        if image.mode != 'RGB':
+            # JPEG 不支持透明通道，铺白底
+            background = Image.new('RGB', image.size, JPEG_BACKGROUND)
+            background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+            image = background
+        image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def generate_derivatives(name, preset):
+    """
+    为存储中的一张原图生成各固定宽度的 WebP 与 JPEG 派生图。
+
+    按 EXIF 方向信息旋转后重新编码，不写回 EXIF 等元数据。
+    """
+    with default_storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    # 按宽度从小到大生成，最大宽度的 JPEG 最后写入，作为“已全部生成”的标记
+    for width in IMAGE_PRESETS[preset]:
+        resized = image
+        if image.width > width:
+            resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        for fmt in ('webp', 'jpg'):
+            _store(derivative_name(name, width, fmt), _encode(resized, fmt))
+    cache.set(READY_CACHE_PREFIX + name, True, None)
+
+
+def _store(name, data):
+    # 派生图名称固定，先删除旧文件，避免存储后端自动改名
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    default_storage.save(name, ContentFile(data))
+
+
+def delete_derivatives(name, preset):
+    for width in IMAGE_PRESETS[preset]:
+        for fmt in ('webp', 'jpg'):
+            path = derivative_name(name, width, fmt)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+    cache.delete(READY_CACHE_PREFIX + name)
+
+
+def _run(name, preset):
+    try:
+        generate_derivatives(name, preset)
+    except Exception:
+        logger.exception('生成图片派生图失败：%s', name)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_WORKERS', 2),
+            thread_name_prefix='blog-images',
+        )
+    return _executor
+
+
+def schedule_derivatives(name, preset):
+    """提交到后台线程池生成派生图，不阻塞请求线程；返回 Future。"""
+    cache.delete(READY_CACHE_PREFIX + name)
+    return get_executor().submit(_run, name, preset)
+
+# 修改记录：
+# 1. 新建 images.py，基于 Pillow 为上传图片生成固定宽度的 WebP 与 JPEG 派生图（修正方向、去除 EXIF），
+#    在后台线程池中执行，并缓存派生图是否就绪供模板标签选择输出。
@@ -0,0 +1,83 @@
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from blog.benchmark import GunicornServer, check_server_urls, load_server, server_urls
+
+# 两种服务器接口使用相同的 gunicorn 配置（gunicorn.conf.py）与 worker 数，只有 worker 类型不同
+SERVERS = {
+    'wsgi': ['CYTBlog.wsgi:application', '-k', 'sync'],
+    'asgi': ['CYTBlog.asgi:application', '-k', 'uvicorn_worker.UvicornWorker'],
+}
+
+
+class Command(BaseCommand):
+    help = '分别以 WSGI（gunicorn 同步 worker）与 ASGI（gunicorn + uvicorn worker）启动站点，在相同 worker 数下压测公开页面，比较吞吐量与延迟'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', default='wsgi,asgi', help='逗号分隔的服务器接口（默认 wsgi,asgi）')
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn worker 进程数（默认 2）')
+        parser.add_argument('--concurrency', type=int, default=16, help='并发连接数（默认 16）')
+        parser.add_argument('--duration', type=float, default=10.0, help='每个服务器的压测时长（秒，默认 10）')
+        parser.add_argument('--warmup', type=float, default=2.0, help='正式计时前的预热时长（秒，默认 2）')
+        parser.add_argument('--port', type=int, default=8765, help='服务器监听的本机端口（默认 8765）')
+        parser.add_argument('--warm-cache', action='store_true', help='不附加随机查询参数，允许命中匿名整页缓存')
+        parser.add_argument('-o', '--output', help='将 JSON 结果写入文件')
+
+    def handle(self, *args, **options):
+        servers = [name.strip() for name in options['servers'].split(',') if name.strip()]
+        unknown = set(servers) - set(SERVERS)
+        if unknown:
+            raise CommandError(f'未知的服务器接口：{", ".join(sorted(unknown))}，可选 {", ".join(SERVERS)}。')
+        if options['workers'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--workers 与 --concurrency 必须是正整数。')
+        try:
+            urls = server_urls()
+            results = self.run(servers, urls, options)
+        except (ValueError, RuntimeError) as exc:
+            raise CommandError(str(exc))
+
+        if options['output']:
+            report = {
+                'meta': {
+                    'created_at': timezone.now().isoformat(),
+                    'django': django.get_version(),
+                    'python': platform.python_version(),
+                    'database': connection.vendor,
+                    'workers': options['workers'],
+                    'concurrency': options['concurrency'],
+                    'duration': options['duration'],
+                    'warm_cache': options['warm_cache'],
+                    'urls': urls,
+                },
+                'results': results,
+            }
+            with open(options['output'], 'w', encoding='utf-8') as target:
+                json.dump(report, target, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'结果已写入 {options["output"]}'))
+
+    def run(self, servers, urls, options):
+        port, bust_cache = options['port'], not options['warm_cache']
+        results = []
+        self.stdout.write(f'{"接口":<8}{"请求数":>8}{"错误":>6}{"rps":>10}{"p50":>9}{"p90":>9}{"p99":>9}')
+        for name in servers:
+            with GunicornServer([*SERVERS[name], '--workers', str(options['workers'])], port):
+                check_server_urls(port, urls)
+                load_server(port, urls, options['concurrency'], options['warmup'], bust_cache)
+                result = {'server': name}
+                result.update(load_server(port, urls, options['concurrency'], options['duration'], bust_cache))
+            results.append(result)
+            latency = result['latency_ms']
+            self.stdout.write(
+                f'{name:<10}{result["requests"]:>8}{result["errors"]:>6}{result["rps"]:>10.1f}'
+                f'{latency["p50"]:>9.2f}{latency["p90"]:>9.2f}{latency["p99"]:>9.2f}'
+            )
+        return results
+
+# 修改记录：
+# 1. 新建 benchmark_servers 管理命令，在相同 gunicorn worker 数下分别以 WSGI 与 ASGI（uvicorn worker）启动站点并压测公开页面，比较每秒请求数与 p50/p99 延迟。
+# 2. 启动 gunicorn 与压测的函数移入 blog/benchmark.py；WSGI 显式指定同步 worker，两种接口共用 gunicorn.conf.py 的其余配置。
@@ -0,0 +1,115 @@
+import io
+import json
+import platform
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from blog.benchmark import compare_results, run_benchmark
+
+
+class Command(BaseCommand):
+    help = '在临时测试数据库中按多个数据规模生成数据，测量各页面的延迟百分位数、SQL 查询数与响应字节数'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000', help='逗号分隔的文章数量，每个规模使用一个新的测试数据库（默认 100,1000）')
+        parser.add_argument('--comments', type=int, default=10, help='平均每篇文章的评论数（默认 10）')
+        parser.add_argument('--seed', type=int, default=2024, help='seed_blog 的随机种子（默认 2024）')
+        parser.add_argument('--iterations', type=int, default=20, help='每个页面统计的请求次数（默认 20）')
+        parser.add_argument('--warmup', type=int, default=2, help='每个页面预热的请求次数（默认 2）')
+        parser.add_argument('--warm-cache', action='store_true', help='请求之间不清空缓存，测量缓存命中后的表现')
+        parser.add_argument('--only', help='逗号分隔的页面名称子串，只测量匹配的页面')
+        parser.add_argument('-o', '--output', help='将 JSON 结果写入文件，默认只输出表格')
+        parser.add_argument('--baseline', help='与此前输出的 JSON 结果比较，列出查询数增加或 p50 变慢的页面')
+        parser.add_argument('--threshold', type=float, default=20.0, help='p50 延迟增长超过该百分比视为回归（默认 20）')
+        parser.add_argument('--fail-on-regression', action='store_true', help='发现回归时以非零状态退出')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError('--sizes 必须是逗号分隔的整数。')
+        if not sizes or min(sizes) < 1:
+            raise CommandError('--sizes 至少包含一个正整数。')
+        only = [part.strip() for part in options['only'].split(',')] if options['only'] else None
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as source:
+                baseline = json.load(source)['results']
+
+        results = []
+        setup_test_environment()
+        try:
+            # 不依赖 collectstatic 生成的 manifest，只测量视图本身
+            with override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage'):
+                for size in sizes:
+                    results.extend(self.benchmark_size(size, only, options))
+        finally:
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'warm_cache': options['warm_cache'],
+                'seed': options['seed'],
+                'comments_per_post': options['comments'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as target:
+                json.dump(report, target, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'结果已写入 {options["output"]}'))
+
+        if baseline is not None:
+            regressions = compare_results(results, baseline, options['threshold'])
+            for size, view, message in regressions:
+                self.stdout.write(self.style.WARNING(f'回归 [{size}] {view}：{message}'))
+            if not regressions:
+                self.stdout.write(self.style.SUCCESS('与基线相比没有发现回归。'))
+            elif options['fail_on_regression']:
+                raise CommandError(f'发现 {len(regressions)} 处性能回归。')
+
+    def benchmark_size(self, size, only, options):
+        """创建新的测试数据库并生成 size 篇文章的数据，测量后销毁数据库。"""
+        self.stdout.write(f'== {size} 篇文章 ==')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            call_command(
+                'seed_blog', posts=size, users=max(10, size // 20), comments=options['comments'],
+                seed=options['seed'], stdout=io.StringIO(),
+            )
+            self.stdout.write(f'{"页面":<34}{"p50":>9}{"p95":>9}{"p99":>9}{"查询":>4}{"字节":>8}')
+            results = run_benchmark(
+                iterations=max(options['iterations'], 1),
+                warmup=max(options['warmup'], 0),
+                clear_cache=not options['warm_cache'],
+                only=only,
+                progress=self.write_row,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        for result in results:
+            result['size'] = size
+        return results
+
+    def write_row(self, result):
+        latency = result['latency_ms']
+        row = (
+            f'{result["view"]:<36}{latency["p50"]:>9.2f}{latency["p95"]:>9.2f}{latency["p99"]:>9.2f}'
+            f'{result["queries"]:>6}{result["bytes"]:>10}'
+        )
+        if result['status'] != 200:
+            row += f'  状态码 {result["status"]}'
+        self.stdout.write(row)
+
+# 修改记录：新建 benchmark_views 管理命令，按多个数据规模在临时测试数据库中运行页面基准测试，输出表格与 JSON 结果，并可与基线比较。
@@ -0,0 +1,43 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+CLEAR_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = '分批删除 django_session 表中已过期的会话（Django 自带的 clearsessions 用一条 DELETE 删除全部，大表上会长时间锁表）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=CLEAR_BATCH_SIZE,
+            help=f'每批删除的行数（默认 {CLEAR_BATCH_SIZE}）',
+        )
+        parser.add_argument('--sleep', type=float, default=0.0, help='每批之间暂停的秒数，降低对线上写入的影响（默认 0）')
+        parser.add_argument('--dry-run', action='store_true', help='只统计过期会话的数量，不删除')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size 必须是正整数。')
+        # 以命令开始的时刻为准，删除过程中续期或新建的会话不受影响
+        expired = Session.objects.filter(expire_date__lt=timezone.now())
+        if options['dry_run']:
+            self.stdout.write(f'共有 {expired.count()} 个过期会话。')
+            return
+
+        deleted = 0
+        while True:
+            keys = list(expired.order_by('expire_date').values_list('session_key', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            # 再次带上过期条件，期间被续期的会话不会误删
+            count, _ = expired.filter(session_key__in=keys).delete()
+            deleted += count
+            self.stdout.write(f'已删除 {deleted} 个过期会话')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'清理完成：共删除 {deleted} 个过期会话。'))
+
+# 修改记录：新建 clear_expired_sessions 管理命令，按主键分批删除 django_session 表中的过期会话。
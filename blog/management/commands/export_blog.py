@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.export import EXPORT_CHUNK_SIZE, EXPORT_SOURCES, export_stream
+
+
+class Command(BaseCommand):
+    help = '以 NDJSON 格式流式导出文章、评论、分类与导航数据（可选 gzip 压缩）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-o', '--output', help='输出文件路径，默认写到标准输出；以 .gz 结尾时自动压缩')
+        parser.add_argument('--gzip', action='store_true', help='以 gzip 压缩输出')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help=f'每批读取的行数（默认 {EXPORT_CHUNK_SIZE}）')
+        parser.add_argument(
+            '--types', help=f'逗号分隔的导出类型，默认全部：{",".join(EXPORT_SOURCES)}',
+        )
+
+    def handle(self, *args, **options):
+        types = None
+        if options['types']:
+            types = [name.strip() for name in options['types'].split(',') if name.strip()]
+            unknown = [name for name in types if name not in EXPORT_SOURCES]
+            if unknown:
+                raise CommandError(f'未知的导出类型：{", ".join(unknown)}')
+        output = options['output']
+        compress = options['gzip'] or bool(output and output.endswith('.gz'))
+        chunks = export_stream(types, max(options['chunk_size'], 1), compress)
+
+        if output:
+            with open(output, 'wb') as target:
+                written = self.write_chunks(chunks, target)
+            self.stderr.write(self.style.SUCCESS(f'导出完成：{output}（{written} 字节）'))
+        else:
+            self.write_chunks(chunks, sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+
+    def write_chunks(self, chunks, target):
+        written = 0
+        for chunk in chunks:
+            target.write(chunk)
+            written += len(chunk)
+        return written
+
+# 修改记录：新建 export_blog 管理命令，流式导出博客数据到文件或标准输出，不把全部数据载入内存。
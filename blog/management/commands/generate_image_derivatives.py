@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from blog import images
+from blog.models import AnimeNavigation, UserProfile
+
+
+class Command(BaseCommand):
+    help = '为已有的动漫导航图片和用户头像生成响应式派生图（WebP/JPEG）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='即使派生图已存在也重新生成')
+
+    def handle(self, *args, **options):
+        sources = [
+            (AnimeNavigation, 'image', 'anime'),
+            (UserProfile, 'profile_image', 'avatar'),
+        ]
+        total = 0
+        for model, field_name, preset in sources:
+            field = model._meta.get_field(field_name)
+            queryset = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            if field.has_default():
+                # 默认头像是静态文件，不在媒体存储中
+                queryset = queryset.exclude(**{field_name: field.default})
+            for name in queryset.values_list(field_name, flat=True).iterator():
+                if not options['force'] and images.derivatives_ready(name, preset):
+                    continue
+                try:
+                    images.generate_derivatives(name, preset)
+                except Exception as exc:
+                    self.stderr.write(f'跳过 {name}：{exc}')
+                    continue
+                total += 1
+                self.stdout.write(f'已生成 {name}')
+        self.stdout.write(self.style.SUCCESS(f'完成，共为 {total} 张图片生成派生图。'))
+
+# 修改记录：新建 generate_image_derivatives 管理命令，为上传功能之前已存在的图片补生成派生图。
@@ -0,0 +1,257 @@
+import gzip
+import json
+import os
+from collections import Counter
+from datetime import datetime, time
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from blog import search
+from blog.caching import bump_version
+from blog.comments import reconcile_comment_counts
+from blog.models import Category, Comment, Post, PostTag, Tag, make_excerpt, parse_tags
+
+
+def parse_timestamp(value):
+    """解析 ISO 格式的日期或日期时间，缺省为当前时间，无时区信息时按当前时区处理。"""
+    if not value:
+        return timezone.now()
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.get_current_timezone())
+    moment = parse_datetime(str(value))
+    if moment is None:
+        day = parse_date(str(value))
+        if day is None:
+            raise ValueError(f'无法解析的时间：{value}')
+        moment = datetime.combine(day, time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def read_json_lines(path):
+    """逐行读取 JSON Lines 文件（支持 .gz），不把整个文件载入内存。"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as source:
+        for line_number, line in enumerate(source, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise CommandError(f'{path} 第 {line_number} 行不是合法的 JSON：{exc}')
+
+
+def parse_front_matter(text):
+    """解析 Markdown 文件开头 --- 包围的 key: value 形式的元数据，返回 (元数据, 正文)。"""
+    meta = {}
+    if not text.startswith('---'):
+        return meta, text
+    header, separator, body = text[3:].partition('\n---')
+    if not separator:
+        return meta, text
+    for line in header.splitlines():
+        key, colon, value = line.partition(':')
+        if colon and key.strip():
+            value = value.strip().strip('"\'')
+            if value.startswith('[') and value.endswith(']'):
+                value = ','.join(item.strip().strip('"\'') for item in value[1:-1].split(','))
+            meta[key.strip().lower()] = value
+    return meta, body.split('\n', 1)[1] if '\n' in body else ''
+
+
+def read_markdown_dir(path):
+    """按文件名顺序逐个读取目录下的 Markdown 文件。"""
+    names = sorted(name for name in os.listdir(path) if name.lower().endswith(('.md', '.markdown')))
+    for name in names:
+        with open(os.path.join(path, name), encoding='utf-8') as source:
+            meta, body = parse_front_matter(source.read())
+        meta.setdefault('title', os.path.splitext(name)[0])
+        meta['content'] = body.strip()
+        meta.setdefault('created_date', meta.pop('date', None))
+        yield meta
+
+
+def author_key(name):
+    """作者用户名按 User.username 的长度截断，创建与查找作者都使用截断后的名称。"""
+    return (name or '')[:User._meta.get_field('username').max_length]
+
+
+def category_key(name):
+    """分类名称缺省为 Uncategorized 并按 Category.name 的长度截断，创建与查找分类都使用截断后的名称。"""
+    return (name or 'Uncategorized')[:Category._meta.get_field('name').max_length]
+
+
+class Command(BaseCommand):
+    help = '从 JSON Lines 文件或带 front matter 的 Markdown 目录批量导入文章（含分类、标签和评论）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='JSON Lines 文件（可为 .gz）或 Markdown 文件所在目录')
+        parser.add_argument('--batch-size', type=int, default=1000, help='每个事务写入的文章数量（默认 1000）')
+        parser.add_argument('--offset', type=int, default=0, help='跳过源数据中的前 N 条记录，用于中断后续传')
+        parser.add_argument('--default-author', help='作者缺失或不存在时使用的用户名')
+        parser.add_argument('--create-authors', action='store_true', help='自动创建不存在的作者（不可登录的账户）')
+
+    def handle(self, *args, **options):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise CommandError('当前数据库不支持 bulk_create 返回主键，无法批量导入评论。')
+        source = options['source']
+        if os.path.isdir(source):
+            records = read_markdown_dir(source)
+        elif os.path.isfile(source):
+            records = read_json_lines(source)
+        else:
+            raise CommandError(f'找不到导入源：{source}')
+
+        self.batch_size = max(options['batch_size'], 1)
+        self.create_authors = options['create_authors']
+        self.default_author = options['default_author']
+        self.authors = {}
+        self.categories = {}
+        self.tags = {}
+        if self.default_author:
+            try:
+                self.authors[self.default_author] = User.objects.get(username=self.default_author).pk
+            except User.DoesNotExist:
+                raise CommandError(f'默认作者 {self.default_author} 不存在。')
+
+        offset = options['offset']
+        records = islice(records, offset, None)
+        imported = skipped = 0
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                created = self.import_batch(batch)
+            imported += created
+            skipped += len(batch) - created
+            offset += len(batch)
+            self.stdout.write(f'已导入 {imported} 篇文章，跳过 {skipped} 条（续传请使用 --offset {offset}）')
+        # bulk_create 不触发信号，统一让相关缓存失效
+        for namespace in ('tags', 'categories', 'posts', 'comments'):
+            bump_version(namespace)
+        self.stdout.write(self.style.SUCCESS(f'导入完成：共导入 {imported} 篇文章，跳过 {skipped} 条。'))
+
+    def import_batch(self, batch):
+        self.resolve_authors({author_key(record.get('author')) for record in batch} - {''})
+        self.resolve_categories({category_key(record.get('category')) for record in batch})
+
+        posts, records = [], []
+        for record in batch:
+            author_id = self.authors.get(author_key(record.get('author'))) or self.authors.get(self.default_author)
+            if not author_id or not record.get('title'):
+                self.stderr.write(f'跳过记录（缺少标题或作者）：{record.get("title")!r}')
+                continue
+            content = record.get('content') or ''
+            tags = ','.join(record['tags']) if isinstance(record.get('tags'), list) else record.get('tags')
+            posts.append(Post(
+                title=record['title'][:200],
+                content=content,
+                excerpt=make_excerpt(content),
+                created_date=parse_timestamp(record.get('created_date')),
+                author_id=author_id,
+                category_id=self.categories[category_key(record.get('category'))],
+                tags=(tags or '')[:200] or None,
+            ))
+            records.append(record)
+        Post.objects.bulk_create(posts, batch_size=self.batch_size)
+        self.import_tags(posts)
+        self.import_comments(posts, records)
+        # bulk_create 不经过计数维护逻辑，按本批文章一次性写入评论数与回复数
+        reconcile_comment_counts(post_ids=[post.pk for post in posts])
+        search.index_posts(posts)
+        return len(posts)
+
+    def resolve_authors(self, usernames):
+        """参数为 author_key 截断后的用户名集合。"""
+        missing = [name for name in usernames if name not in self.authors]
+        if not missing:
+            return
+        self.authors.update(User.objects.filter(username__in=missing).values_list('username', 'id'))
+        missing = [name for name in missing if name not in self.authors]
+        if missing and self.create_authors:
+            User.objects.bulk_create(
+                [User(username=name, password=make_password(None)) for name in missing],
+                ignore_conflicts=True,
+            )
+            self.authors.update(User.objects.filter(username__in=missing).values_list('username', 'id'))
+
+    def resolve_categories(self, names):
+        """参数为 category_key 截断后的分类名称集合。"""
+        missing = [name for name in names if name not in self.categories]
+        if not missing:
+            return
+        self.categories.update(Category.objects.filter(name__in=missing).values_list('name', 'id'))
+        missing = [name for name in missing if name not in self.categories]
+        if missing:
+            Category.objects.bulk_create(
+                [Category(name=name, is_predefined=False) for name in missing],
+                ignore_conflicts=True,
+            )
+            self.categories.update(Category.objects.filter(name__in=missing).values_list('name', 'id'))
+
+    def import_tags(self, posts):
+        names_by_post = [(post, parse_tags(post.tags)) for post in posts if post.tags]
+        wanted = {name for _, names in names_by_post for name in names}
+        missing = [name for name in wanted if name not in self.tags]
+        if missing:
+            self.tags.update(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+            for name in missing:
+                if name not in self.tags:
+                    self.tags[name] = Tag.objects.create(name=name).pk
+        links = [
+            PostTag(post_id=post.pk, tag_id=self.tags[name], created_date=post.created_date)
+            for post, names in names_by_post for name in names
+        ]
+        PostTag.objects.bulk_create(links, batch_size=self.batch_size)
+        # 按增量分组，每组一条 UPDATE 语句维护标签文章数
+        increments = Counter(link.tag_id for link in links)
+        by_amount = {}
+        for tag_id, amount in increments.items():
+            by_amount.setdefault(amount, []).append(tag_id)
+        for amount, tag_ids in by_amount.items():
+            Tag.objects.filter(pk__in=tag_ids).update(post_count=F('post_count') + amount)
+
+    def import_comments(self, posts, records):
+        # 逐层写入评论：每一层一次 bulk_create，子评论通过上一层返回的主键关联父评论和楼层
+        level = [(post.pk, None, None, item) for post, record in zip(posts, records) for item in record.get('comments') or []]
+        while level:
+            self.resolve_authors({author_key(item.get('author')) for _, _, _, item in level} - {''})
+            comments, items = [], []
+            for post_id, parent_id, root_id, item in level:
+                author_id = self.authors.get(author_key(item.get('author'))) or self.authors.get(self.default_author)
+                if not author_id or not item.get('content'):
+                    continue
+                comments.append(Comment(
+                    post_id=post_id,
+                    author_id=author_id,
+                    content=item['content'],
+                    created_at=parse_timestamp(item.get('created_at')),
+                    parent_id=parent_id,
+                    root_id=root_id,
+                ))
+                items.append(item)
+            Comment.objects.bulk_create(comments, batch_size=self.batch_size)
+            level = [
+                (comment.post_id, comment.pk, comment.root_id or comment.pk, reply)
+                for comment, item in zip(comments, items)
+                for reply in item.get('replies') or []
+            ]
+
+# 修改记录：
+# 1. 新建 import_posts 管理命令：流式读取 JSON Lines 或 Markdown 目录，通过内存映射解析作者与分类，
+#    按批次在独立事务中 bulk_create 文章、标签关联与评论，并同步写入搜索索引，支持进度输出与 --offset 续传。
+# 2. 导入完成后同时递增 'posts' 版本号，使列表页的条件请求验证器失效。
+# 3. 每批导入评论后写入文章评论数与楼层回复数。
+# 4. 作者与分类名称先按字段长度截断（author_key、category_key）再创建和查找，超长名称不再因前后不一致而 KeyError；
+#    Comment.created_at 改为 default=timezone.now 后直接写入原始时间，去掉临时修改字段 auto_now_add 的 preserve_comment_timestamps。
+# 5. 标签关联改用 PostTag 模型写入，同时保存文章发布时间的冗余副本。
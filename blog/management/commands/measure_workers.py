@@ -0,0 +1,121 @@
+import json
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmark import GunicornServer, check_server_urls, fetch, load_server, server_urls
+
+ASGI_WORKER = 'uvicorn_worker.UvicornWorker'
+
+
+def process_memory(pid):
+    """
+    读取 /proc/<pid>/smaps_rollup，返回 RSS、PSS 与 USS（MiB）。
+
+    RSS 把与其他进程共享的页也全部算上；PSS 按共享进程数均摊，各进程之和即实际占用；
+    USS 只含私有页，即结束该进程能释放的内存。仅支持 Linux。
+    """
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as source:
+        for line in source:
+            name, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[name] = int(value.split()[0])
+    return {
+        'rss': round(fields['Rss'] / 1024, 1),
+        'pss': round(fields['Pss'] / 1024, 1),
+        'uss': round((fields['Private_Clean'] + fields['Private_Dirty']) / 1024, 1),
+    }
+
+
+class Command(BaseCommand):
+    help = '对比 gunicorn 默认配置与 gunicorn.conf.py（预加载、gc.freeze、预热）下每个 worker 的内存占用与冷启动耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='两次运行都使用的 worker 进程数（默认 2）')
+        parser.add_argument('--worker-class', default=ASGI_WORKER, help=f'worker 类型（默认 {ASGI_WORKER}；sync 或 gthread 时运行 WSGI 应用）')
+        parser.add_argument('--duration', type=float, default=5.0, help='启动后压测的时长（秒，默认 5），之后再读取内存')
+        parser.add_argument('--port', type=int, default=8766, help='服务器监听的本机端口（默认 8766）')
+        parser.add_argument('-o', '--output', help='将 JSON 结果写入文件')
+
+    def handle(self, *args, **options):
+        if not os.path.exists('/proc/self/smaps_rollup'):
+            raise CommandError('需要 Linux 的 /proc/<pid>/smaps_rollup 读取进程内存。')
+        if options['workers'] < 1:
+            raise CommandError('--workers 必须是正整数。')
+        app = 'CYTBlog.wsgi:application' if options['worker_class'] in ('sync', 'gthread') else 'CYTBlog.asgi:application'
+        args = [app, '-k', options['worker_class'], '--workers', str(options['workers'])]
+
+        # 之前：空配置文件，即 gunicorn 的默认设置（不预加载、不冻结、不预热）；之后：项目的 gunicorn.conf.py
+        with tempfile.NamedTemporaryFile('w', suffix='.py') as empty_config:
+            runs = [
+                ('默认配置', ['--config', empty_config.name]),
+                ('gunicorn.conf.py', ['--config', str(settings.BASE_DIR / 'gunicorn.conf.py')]),
+            ]
+            try:
+                urls = server_urls()
+                results = [self.measure(label, [*args, *extra], urls, options) for label, extra in runs]
+            except (ValueError, RuntimeError) as exc:
+                raise CommandError(str(exc))
+
+        self.stdout.write(
+            f'{"配置":<18}{"冷启动 s":>10}{"首个请求 ms":>12}{"rps":>8}'
+            f'{"worker RSS":>12}{"worker PSS":>12}{"worker USS":>12}{"总 PSS":>10}'
+        )
+        for result in results:
+            worker = result['worker_avg_mib']
+            self.stdout.write(
+                f'{result["config"]:<20}{result["cold_start_s"]:>10.2f}{result["first_request_ms"]:>14.1f}'
+                f'{result["rps"]:>8.1f}{worker["rss"]:>12.1f}{worker["pss"]:>12.1f}{worker["uss"]:>12.1f}'
+                f'{result["total_pss_mib"]:>12.1f}'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as target:
+                json.dump({'workers': options['workers'], 'worker_class': options['worker_class'], 'results': results},
+                          target, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'结果已写入 {options["output"]}'))
+
+    def measure(self, label, args, urls, options):
+        """
+        启动 gunicorn，记录从启动到首页首次返回 200 的耗时（冷启动）及该请求本身的耗时，
+        压测 duration 秒后读取主进程与各 worker 的内存。
+        """
+        port = options['port']
+        with GunicornServer(args, port) as server:
+            # 端口由主进程先行监听，请求在 worker 就绪前排队等待，因此这里量到的是可以提供服务的时刻
+            while True:
+                start = time.perf_counter()
+                try:
+                    status = fetch(port, urls[0])
+                except OSError:
+                    status = None
+                if status == 200:
+                    break
+                if time.perf_counter() - server.started_at > 60:
+                    raise RuntimeError(f'{label}：60 秒内首页没有返回 200（最后状态 {status}）。')
+                time.sleep(0.05)
+            first_request_ms = (time.perf_counter() - start) * 1000
+            cold_start_s = time.perf_counter() - server.started_at
+
+            check_server_urls(port, urls)
+            load = load_server(port, urls, options['workers'] * 4, options['duration'])
+            master = process_memory(server.process.pid)
+            workers = [process_memory(pid) for pid in server.worker_pids()]
+        if not workers:
+            raise RuntimeError(f'{label}：没有找到 worker 进程。')
+        return {
+            'config': label,
+            'cold_start_s': round(cold_start_s, 3),
+            'first_request_ms': round(first_request_ms, 1),
+            'rps': load['rps'],
+            'errors': load['errors'],
+            'master_mib': master,
+            'workers_mib': workers,
+            'worker_avg_mib': {key: round(sum(item[key] for item in workers) / len(workers), 1) for key in ('rss', 'pss', 'uss')},
+            'total_pss_mib': round(master['pss'] + sum(item['pss'] for item in workers), 1),
+        }
+
+# 修改记录：新建 measure_workers 管理命令，对比 gunicorn 默认配置与 gunicorn.conf.py 下每个 worker 的 RSS/PSS/USS 与冷启动耗时。
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from blog import search
+
+
+class Command(BaseCommand):
+    help = '清空并批量重建文章全文搜索索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='每批处理的文章数量（默认 1000）')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.stdout.write(self.style.WARNING(f'当前数据库 {connection.vendor} 不支持全文索引，搜索将退回 icontains 查询。'))
+            return
+        with transaction.atomic():
+            total = search.rebuild_index(
+                chunk_size=options['chunk_size'],
+                progress=lambda done: self.stdout.write(f'已索引 {done} 篇文章'),
+            )
+        self.stdout.write(self.style.SUCCESS(f'搜索索引重建完成，共 {total} 篇文章。'))
+
+# 修改记录：新建 rebuild_search_index 管理命令，分批重建全文搜索索引。
\ No newline at end of file
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from blog.caching import bump_version
+from blog.comments import RECONCILE_CHUNK_SIZE, reconcile_comment_counts
+
+
+class Command(BaseCommand):
+    help = '按实际评论行数批量修复文章评论数与楼层回复数的偏差'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=RECONCILE_CHUNK_SIZE,
+            help=f'每批处理的文章数量（默认 {RECONCILE_CHUNK_SIZE}）',
+        )
+
+    def handle(self, *args, **options):
+        fixed_posts, fixed_comments = reconcile_comment_counts(
+            chunk_size=max(options['chunk_size'], 1),
+            progress=lambda done: self.stdout.write(f'已检查 {done} 篇文章'),
+        )
+        if fixed_posts or fixed_comments:
+            bump_version('comments')
+        self.stdout.write(self.style.SUCCESS(
+            f'修复完成：{fixed_posts} 篇文章的评论数、{fixed_comments} 条评论的回复数存在偏差并已更正。'
+        ))
+
+# 修改记录：新建 reconcile_comment_counts 管理命令，分批以集合式 UPDATE 修复冗余评论计数的偏差。
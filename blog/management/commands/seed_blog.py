@@ -0,0 +1,195 @@
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+
+from blog.caching import bump_version
+from blog.models import AnimeNavigation, WebsiteNavigation
+
+from .import_posts import Command as ImportCommand
+
+# 生成数据的时间范围截止于固定时刻，相同的 --seed 每次都得到相同的数据
+SEED_END = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+CATEGORY_NAMES = [
+    '技术', '生活', '动漫', '游戏', '读书', '旅行', '摄影', '音乐', '电影', '美食',
+    '编程', '随笔', '学习', '设计', '运动', '科技', '历史', '职场', '健康', '宠物',
+]
+TAG_WORDS = [
+    'Python', 'Django', '数据库', '缓存', '前端', '算法', '番剧推荐', '新番', '轻小说', '手办',
+    '独立游戏', '单机', '书评', '散文', '自驾', '徒步', '胶片', '后期', '吉他', '钢琴',
+    '纪录片', '家常菜', '烘焙', '咖啡', '效率', '读书笔记', '开源', 'Linux', '网络', '性能优化',
+]
+# 与 blog/static/images 中打包的封面同名，侧边栏据此显示对应的封面
+ANIME_TITLES = ['海贼王', '火影忍者', '七龙珠', '进击的巨人', '鬼灭之刃', '咒术回战', '斗罗大陆']
+SUBJECTS = ['我', '我们', '作者', '这部作品', '这个项目', '大家', '新手', '老玩家', '社区', '团队']
+VERBS = ['认为', '发现', '整理了', '尝试了', '体验了', '分享了', '记录了', '总结了', '讨论了', '重新思考了']
+OBJECTS = [
+    '缓存失效的问题', '周末的短途旅行', '一部被低估的动画', '数据库索引的设计', '新买的相机',
+    '每天早起的习惯', '一本关于历史的书', '独立游戏的关卡设计', '家常红烧肉的做法', '开源社区的协作方式',
+    '分页查询的性能', '城市里的咖啡馆', '钢琴练习的方法', '团队的代码评审', '夏天的第一场雨',
+]
+CLAUSES = [
+    '过程比想象中顺利', '中间遇到了不少坑', '结果让人惊喜', '值得反复推敲', '细节决定了体验',
+    '还有很多可以改进的地方', '也许换个角度会更好', '数据说明了一切', '最后还是回到了原点', '收获远超预期',
+]
+CONNECTIVES = ['，而且', '，但是', '，所以', '，同时', '，其实', '，因此']
+ENDINGS = ['。', '。', '。', '！', '？', '……']
+COMMENT_OPENINGS = ['写得很好', '同意楼上', '有不同看法', '学到了', '感谢分享', '收藏了', '请教一下', '补充一点']
+
+
+class TextGenerator:
+    """由固定词表拼接中文句子，同一个随机数生成器得到同样的文本。"""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def sentence(self):
+        rng = self.rng
+        text = f'{rng.choice(SUBJECTS)}{rng.choice(VERBS)}{rng.choice(OBJECTS)}'
+        for _ in range(rng.randint(0, 2)):
+            text += f'{rng.choice(CONNECTIVES)}{rng.choice(CLAUSES)}'
+        return text + rng.choice(ENDINGS)
+
+    def paragraph(self, min_sentences=3, max_sentences=8):
+        return ''.join(self.sentence() for _ in range(self.rng.randint(min_sentences, max_sentences)))
+
+    def article(self, min_paragraphs=3, max_paragraphs=10):
+        return '\n\n'.join(self.paragraph() for _ in range(self.rng.randint(min_paragraphs, max_paragraphs)))
+
+    def title(self):
+        rng = self.rng
+        return f'{rng.choice(["关于", "聊聊", "再谈", "记一次", "浅析", ""])}{rng.choice(OBJECTS)}'
+
+    def comment(self):
+        return f'{self.rng.choice(COMMENT_OPENINGS)}，{self.paragraph(1, 3)}'
+
+
+class Command(ImportCommand):
+    help = '按固定随机种子生成用户、分类、带中文正文的文章与多层评论树，用于开发和性能测试'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help='用户数量（默认 50）')
+        parser.add_argument('--categories', type=int, default=10, help=f'分类数量（默认 10，最多 {len(CATEGORY_NAMES)}）')
+        parser.add_argument('--posts', type=int, default=1000, help='文章数量（默认 1000）')
+        parser.add_argument('--comments', type=int, default=10, help='平均每篇文章的评论数（含回复，默认 10）')
+        parser.add_argument('--max-depth', type=int, default=8, help='评论树的最大层数（默认 8）')
+        parser.add_argument('--navigation', type=int, default=12, help='动漫导航与网站导航各自的数量（默认 12）')
+        parser.add_argument('--days', type=int, default=730, help='文章发布时间分布的天数（默认 730）')
+        parser.add_argument('--seed', type=int, default=2024, help='随机种子，相同的种子生成相同的数据（默认 2024）')
+        parser.add_argument('--batch-size', type=int, default=500, help='每个事务写入的文章数量（默认 500）')
+        parser.add_argument('--password', help='为生成的用户设置可登录的密码，默认不可登录')
+
+    def handle(self, *args, **options):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise CommandError('当前数据库不支持 bulk_create 返回主键，无法批量生成评论。')
+        if options['users'] < 1 or options['categories'] < 1:
+            raise CommandError('至少需要生成 1 个用户和 1 个分类。')
+        self.rng = random.Random(options['seed'])
+        self.text = TextGenerator(self.rng)
+        self.batch_size = max(options['batch_size'], 1)
+        self.create_authors = False
+        self.default_author = None
+        self.authors = {}
+        self.categories = {}
+        self.tags = {}
+
+        usernames = self.create_users(options['users'], options['password'])
+        category_names = CATEGORY_NAMES[:options['categories']]
+        records = self.generate_posts(options, usernames, category_names)
+        created = 0
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                created += self.import_batch(batch)
+            self.stdout.write(f'已生成 {created}/{options["posts"]} 篇文章')
+        self.create_navigation(options['navigation'])
+        for namespace in ('tags', 'categories', 'posts', 'comments', 'navigation'):
+            bump_version(namespace)
+        self.stdout.write(self.style.SUCCESS(
+            f'生成完成：{len(usernames)} 个用户、{len(category_names)} 个分类、{created} 篇文章。'
+        ))
+
+    def create_users(self, count, password):
+        usernames = [f'seed_user_{index:04d}' for index in range(1, count + 1)]
+        hashed = make_password(password)
+        User.objects.bulk_create(
+            [User(username=name, email=f'{name}@example.com', password=hashed) for name in usernames],
+            ignore_conflicts=True,
+        )
+        self.resolve_authors(set(usernames))
+        return usernames
+
+    def generate_posts(self, options, usernames, category_names):
+        """逐篇生成 import_posts 格式的记录（惰性生成，内存占用与文章数量无关）。"""
+        rng, text = self.rng, self.text
+        span = timedelta(days=options['days'])
+        for _ in range(options['posts']):
+            created = SEED_END - span * rng.random()
+            yield {
+                'title': text.title(),
+                'content': text.article(),
+                'author': rng.choice(usernames),
+                'category': rng.choice(category_names),
+                'created_date': created.isoformat(),
+                'tags': rng.sample(TAG_WORDS, rng.randint(0, 4)),
+                'comments': self.generate_comments(
+                    rng.randint(0, options['comments'] * 2), options['max_depth'], created, usernames,
+                ),
+            }
+
+    def generate_comments(self, count, max_depth, since, usernames):
+        """
+        生成 count 条评论组成的评论树：八成评论是回复，其中一半回复最近的一条评论（形成深层对话），
+        另一半回复随机一条已有评论；父评论已达 max_depth 层时改为一级评论。
+        """
+        rng = self.rng
+        roots, nodes = [], []
+        moment = since
+        for _ in range(count):
+            moment += timedelta(minutes=rng.randint(1, 600))
+            item = {
+                'author': rng.choice(usernames),
+                'content': self.text.comment(),
+                'created_at': moment.isoformat(),
+                'replies': [],
+            }
+            parent = None
+            if nodes and rng.random() < 0.8:
+                parent = nodes[-1] if rng.random() < 0.5 else rng.choice(nodes)
+                if parent[1] >= max_depth:
+                    parent = None
+            if parent is None:
+                roots.append(item)
+                nodes.append((item, 1))
+            else:
+                parent[0]['replies'].append(item)
+                nodes.append((item, parent[1] + 1))
+        return roots
+
+    def create_navigation(self, count):
+        text = self.text
+        AnimeNavigation.objects.bulk_create([
+            AnimeNavigation(title=ANIME_TITLES[(index - 1) % len(ANIME_TITLES)], url=f'https://anime.example.com/{index}')
+            for index in range(1, count + 1)
+        ])
+        WebsiteNavigation.objects.bulk_create([
+            WebsiteNavigation(
+                title=text.title()[:100],
+                url=f'https://site{index}.example.com/',
+                description=text.sentence()[:200],
+            )
+            for index in range(1, count + 1)
+        ])
+
+# 修改记录：
+# 1. 新建 seed_blog 管理命令：按固定随机种子生成用户、分类、中文正文的文章、标签、多层评论树与导航数据，
+#    复用 import_posts 的批量写入逻辑，用于开发环境与性能基准测试。
+# 2. 评论时间由 Comment.created_at 的默认值机制直接写入，不再需要 preserve_comment_timestamps。
+# 3. 动漫导航使用与打包封面同名的标题，侧边栏显示对应封面。
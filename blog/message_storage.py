@@ -0,0 +1,24 @@
+from django.contrib.messages.storage.fallback import FallbackStorage
+
+
+class AnonymousCookieStorage(FallbackStorage):
+    """
+    提示消息存储：匿名用户的消息只保存在 Cookie 中，不会为了一条提示创建会话（也就不读写会话表）；
+    Cookie 放不下时丢弃最早的消息。登录用户已有会话，与 FallbackStorage 相同，Cookie 放不下的消息存入会话。
+
+    是否登录在保存消息时才判断，没有使用消息的请求不会因此加载用户。
+    """
+
+    def _store(self, messages, response, *args, **kwargs):
+        user = getattr(self.request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return super()._store(messages, response, *args, **kwargs)
+        cookie_storage, *other_storages = self.storages
+        # 本次请求从会话中读出过消息（例如登录时留下、退出登录后读取）时，清除会话中的记录
+        for storage in other_storages:
+            if storage in self._used_storages:
+                storage._store([], response)
+                self._used_storages.remove(storage)
+        return cookie_storage._store(messages, response, remove_oldest=True)
+
+# 修改记录：新建 message_storage.py，AnonymousCookieStorage 让匿名用户的提示消息只使用 Cookie，登录用户仍可回退到会话。
@@ -0,0 +1,299 @@
+import hashlib
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.deprecation import MiddlewareMixin
+from django.utils import timezone
+from django.utils.http import parse_http_date_safe
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .aio import iterate_in_thread
+from .caching import get_versions
+from .conditional import has_pending_messages
+from .db.pool import pool_stats
+from .db.routers import replica_may_be_stale, routing
+from .timing import RequestTiming, install as install_timing
+
+slow_request_logger = logging.getLogger('blog.slow_requests')
+
+# 条目中带有动态依赖的版本号，与旧格式的条目使用不同的前缀
+PAGE_CACHE_PREFIX = 'blog:page:v2:'
+# 缓存的响应中不保留的响应头
+PAGE_CACHE_SKIP_HEADERS = ('set-cookie', 'content-length')
+
+
+def cache_anonymous_page(*namespaces):
+    """
+    标记视图可被 AnonymousPageCacheMiddleware 缓存，并声明页面依赖的缓存命名空间。
+
+    命名空间中可以引用 URL 参数，例如 'post:{pk}'；任一命名空间的版本号递增后，
+    依赖它的页面缓存键随之改变，旧条目不再被读取。
+    """
+    def decorator(view_func):
+        view_func.page_cache_namespaces = namespaces
+        return view_func
+    return decorator
+
+
+def depend_on(request, *namespaces):
+    """
+    为当前页面追加只有执行视图后才知道的依赖命名空间，例如列表页中显示的各篇文章 'post:<id>'。
+
+    应在取出页面数据后立即调用。版本号在调用时读取并随页面一起缓存，命中时任一版本号变化即视为未命中；
+    请求不会被缓存时不做任何事。会读取缓存，异步视图需在线程中调用。
+    """
+    depends = getattr(request, '_page_cache_depends', None)
+    if depends is not None and namespaces:
+        depends.update(zip(namespaces, get_versions(*namespaces)))
+
+
+class AnonymousPageCacheMiddleware(MiddlewareMixin):
+    """
+    匿名用户整页缓存：以 host、路径与查询字符串以及页面依赖命名空间的版本号作为缓存键。
+
+    视图还可以通过 depend_on 追加依赖，命中时再核对这些依赖的版本号。
+    只缓存用 cache_anonymous_page 标记的视图；登录用户、有待显示的提示消息、
+    修改了会话、设置了 Cookie 或使用了 CSRF 令牌的响应都会绕过缓存；最近有写入时从只读副本读取的页面也不缓存。
+    需放在 MessageMiddleware 之后，其 process_response 先于会话与 CSRF 中间件执行。
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        namespaces = getattr(view_func, 'page_cache_namespaces', None)
+        if (
+            namespaces is None
+            or request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+            or has_pending_messages(request)
+        ):
+            return None
+        namespaces = [namespace.format(**view_kwargs) for namespace in namespaces]
+        versions = ':'.join(map(str, get_versions(*namespaces)))
+        url = f'{request.get_host()}{request.get_full_path()}'
+        request._page_cache_key = PAGE_CACHE_PREFIX + hashlib.md5(f'{url}|{versions}'.encode()).hexdigest()
+        request._page_cache_depends = {}
+
+        cached = cache.get(request._page_cache_key)
+        if cached is None:
+            return None
+        status, headers, content, depends = cached
+        if depends and get_versions(*depends) != list(depends.values()):
+            return None
+        request._page_cache_hit = True
+        response = HttpResponse(content, status=status)
+        for name, value in headers:
+            response[name] = value
+        response['X-Page-Cache'] = 'hit'
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(response.get('Last-Modified', '')),
+            response=response,
+        )
+
+    def process_response(self, request, response):
+        key = getattr(request, '_page_cache_key', None)
+        if (
+            key is None
+            or getattr(request, '_page_cache_hit', False)
+            or request.method != 'GET'
+            or response.status_code != 200
+            or response.streaming
+            or response.cookies
+            or request.META.get('CSRF_COOKIE_USED')
+            or has_pending_messages(request)
+            or request.session.modified
+            or 'private' in response.get('Cache-Control', '')
+            # 副本可能还没有复制到最近的写入，读到的旧数据不能以新的版本号缓存下来
+            or replica_may_be_stale()
+        ):
+            return response
+        headers = [
+            (name, value) for name, value in response.items()
+            if name.lower() not in PAGE_CACHE_SKIP_HEADERS
+        ]
+        cache.set(
+            key, (response.status_code, headers, response.content, request._page_cache_depends),
+            settings.PAGE_CACHE_TIMEOUT,
+        )
+        response['X-Page-Cache'] = 'miss'
+        return response
+
+
+class RequestTimingMiddleware:
+    """
+    统计每个请求的总耗时、SQL 条数与耗时、模板渲染耗时和缓存命中情况。
+
+    超级用户的响应附加 Server-Timing 头；总耗时不低于 SLOW_REQUEST_THRESHOLD_MS 的请求
+    以一行 JSON 写入 blog.slow_requests 日志，附带按累计耗时排序的 SQL 语句。统计对象保存在
+    request.timing 上。需放在 MIDDLEWARE 的最前面，以覆盖其余中间件的耗时。同时支持同步与
+    异步调用。流式响应在返回之后才生成内容，生成期间的查询不计入统计。
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_timing()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timing = RequestTiming()
+        request.timing = timing
+        with timing.activate():
+            response = self.get_response(request)
+        self.process_timing(request, response, timing)
+        return response
+
+    async def __acall__(self, request):
+        timing = RequestTiming()
+        request.timing = timing
+        with timing.activate():
+            response = await self.get_response(request)
+        # 读取 request.user 可能查询会话与用户表，不能在事件循环中同步执行
+        await sync_to_async(self.process_timing)(request, response, timing)
+        return response
+
+    def process_timing(self, request, response, timing):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_superuser:
+            response['Server-Timing'] = ', '.join([timing.server_timing(), *self.pool_timing()])
+        threshold = settings.SLOW_REQUEST_THRESHOLD_MS
+        if threshold is not None and timing.total_ms >= threshold:
+            self.log_slow_request(request, response, timing, user)
+
+    @staticmethod
+    def pool_timing():
+        # 本进程数据库连接池的状态，多个 worker 进程各有各的连接池
+        return [
+            f'db-pool-{alias};desc="{stats["in_use"]} in use, {stats["idle"]} idle, {stats["waiting"]} waiting, '
+            f'{stats["size"]}/{stats["max_size"]}"'
+            for alias, stats in pool_stats().items()
+        ]
+
+    def log_slow_request(self, request, response, timing, user):
+        record = {
+            'time': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'user_id': user.pk if user is not None and user.is_authenticated else None,
+            'total_ms': round(timing.total_ms, 3),
+            'sql_ms': round(timing.sql_ms, 3),
+            'sql_count': timing.sql_count,
+            'template_ms': round(timing.template_ms, 3),
+            'cache_hits': timing.cache_hits,
+            'cache_misses': timing.cache_misses,
+            'sql': timing.slowest_statements(settings.SLOW_REQUEST_MAX_SQL),
+        }
+        pools = pool_stats()
+        if pools:
+            # 慢请求可能是在等待连接池的空闲连接
+            record['db_pool'] = pools
+        slow_request_logger.warning(json.dumps(record, ensure_ascii=False))
+
+
+class ReplicaPinningMiddleware:
+    """
+    配合 ReplicaRouter 实现“读到自己的写入”：请求中发生过写入时，响应设置一个短期 Cookie，
+    之后 DATABASE_REPLICA_PIN_SECONDS 秒内该用户的请求都从主库读取。POST 等写请求本身也只读主库。
+
+    未配置只读副本时不做任何事。不访问数据库与缓存，同时支持同步与异步调用。
+    需放在会话、认证等会读取数据库的中间件之前。
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        with routing(self.pinned(request)) as state:
+            response = self.get_response(request)
+        return self.process_response(response, state)
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        with routing(self.pinned(request)) as state:
+            response = await self.get_response(request)
+        return self.process_response(response, state)
+
+    @staticmethod
+    def pinned(request):
+        return request.method not in ('GET', 'HEAD', 'OPTIONS') or settings.DATABASE_PIN_COOKIE in request.COOKIES
+
+    @staticmethod
+    def process_response(response, state):
+        if state.wrote:
+            response.set_cookie(
+                settings.DATABASE_PIN_COOKIE, '1',
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    可被异步调用的 WhiteNoiseMiddleware。
+
+    WhiteNoise 的中间件只支持同步调用，在 ASGI 下 Django 会为它把其后的整条中间件链
+    与视图切换到线程中执行，异步视图也就失去了意义；这里只把静态文件的查找与响应放到线程中，
+    其余请求直接交给下一层。
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            response = await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+            if response.streaming:
+                # 文件响应是同步迭代器，ASGI 下会被整个读入内存并告警，改为逐块在线程中读取
+                response.streaming_content = iterate_in_thread(response.streaming_content)
+            return response
+        return await self.get_response(request)
+
+# 修改记录：
+# 1. 新建 middleware.py，添加 AnonymousPageCacheMiddleware 与 cache_anonymous_page 装饰器：
+#    匿名 GET 请求按路径与查询字符串整页缓存，依赖的命名空间版本号变化时精确失效。
+# 2. 添加 RequestTimingMiddleware：统计请求的 SQL、模板渲染与缓存命中情况，超级用户可见 Server-Timing 头，
+#    超过阈值的请求写入慢请求日志。
+# 3. RequestTimingMiddleware 同时支持同步与异步调用，ASGI 下不再为它切换线程；统计对象保存在 request.timing 上。
+# 4. 添加 AsyncWhiteNoiseMiddleware，ASGI 下静态文件以外的请求不再为 WhiteNoise 切换线程。
+# 5. 使用数据库连接池时，超级用户的 Server-Timing 与慢请求日志附带本进程连接池的状态。
+# 6. 添加 ReplicaPinningMiddleware：请求中有写入时设置短期 Cookie，之后一段时间内该用户的读取走主库。
+# 7. 添加 depend_on：视图可追加只有查询后才知道的依赖（如列表页中各篇文章的 'post:<id>'），其版本号随页面缓存并在命中时核对。
+# 8. 其他用户不再因最近的写入改读主库；最近有写入时，从副本读取的页面不写入匿名整页缓存。
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_comment_root(apps, schema_editor):
+    Comment = apps.get_model("blog", "Comment")
+    # 直接回复一级评论的，root 即 parent
+    Comment.objects.filter(parent__isnull=False, parent__parent__isnull=True).update(
+        root=models.F("parent")
+    )
+    # 逐层向下传播，每轮处理一层嵌套，直到没有需要补齐的行
+    parent_root = Comment.objects.filter(pk=OuterRef("parent_id")).values("root")[:1]
+    while True:
+        updated = Comment.objects.filter(
+            root__isnull=True, parent__isnull=False, parent__root__isnull=False
+        ).update(root=Subquery(parent_root))
+        if not updated:
+            break
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0007_userprofile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="root",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="thread_replies",
+                to="blog.comment",
+            ),
+        ),
+        migrations.RunPython(backfill_comment_root, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:37
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0009_post_excerpt"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="post",
+            name="created_date",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+        ),
+    ]
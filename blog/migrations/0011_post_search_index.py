@@ -0,0 +1,76 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:05
+
+from itertools import islice
+
+from django.db import migrations
+
+from blog.search import to_document
+
+BATCH_SIZE = 1000
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        # 文档已在 Python 端切分为空格分隔的二元组，unicode61 只需按空格切分
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts "
+            "USING fts5(title, body, tokenize = 'unicode61')"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE TABLE IF NOT EXISTS blog_post_search ("
+            "post_id bigint PRIMARY KEY REFERENCES blog_post (id) "
+            "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS blog_post_search_document_gin "
+            "ON blog_post_search USING GIN (document)"
+        )
+
+
+def index_existing_posts(apps, schema_editor):
+    # 升级前已有的文章没有经过保存信号，分批写入索引；之后的增删改由信号维护
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        sql = "INSERT INTO blog_post_fts (rowid, title, body) VALUES (%s, %s, %s)"
+    elif connection.vendor == "postgresql":
+        sql = (
+            "INSERT INTO blog_post_search (post_id, document) VALUES "
+            "(%s, setweight(to_tsvector('simple', %s), 'A') || "
+            "setweight(to_tsvector('simple', %s), 'B'))"
+        )
+    else:
+        return
+    Post = apps.get_model("blog", "Post")
+    posts = (
+        Post.objects.using(connection.alias)
+        .order_by("id")
+        .values_list("id", "title", "content")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    while chunk := list(islice(posts, BATCH_SIZE)):
+        rows = [(pk, to_document(title), to_document(content)) for pk, title, content in chunk]
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS blog_post_fts")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP TABLE IF EXISTS blog_post_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0010_post_created_date_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(index_existing_posts, migrations.RunPython.noop),
+    ]
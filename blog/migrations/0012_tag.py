@@ -0,0 +1,85 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:39
+
+import re
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+BATCH_SIZE = 500
+
+
+def split_post_tags(apps, schema_editor):
+    Post = apps.get_model("blog", "Post")
+    Tag = apps.get_model("blog", "Tag")
+    Through = Post.tag_set.through
+    tags = {}
+    slugs = set()
+    counts = {}
+
+    def get_tag(name):
+        if name not in tags:
+            base = slugify(name, allow_unicode=True) or "tag"
+            slug, suffix = base, 2
+            while slug in slugs:
+                slug = f"{base}-{suffix}"
+                suffix += 1
+            slugs.add(slug)
+            tags[name] = Tag.objects.create(name=name, slug=slug)
+        return tags[name]
+
+    links = []
+    posts = Post.objects.exclude(tags__isnull=True).exclude(tags="")
+    for post_id, value in posts.values_list("id", "tags").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        names = (name.strip()[:50] for name in re.split(r"[,，、]", value))
+        for name in dict.fromkeys(name for name in names if name):
+            tag = get_tag(name)
+            counts[tag.pk] = counts.get(tag.pk, 0) + 1
+            links.append(Through(post_id=post_id, tag_id=tag.pk))
+        if len(links) >= BATCH_SIZE:
+            Through.objects.bulk_create(links)
+            links = []
+    if links:
+        Through.objects.bulk_create(links)
+    for tag in tags.values():
+        tag.post_count = counts[tag.pk]
+    Tag.objects.bulk_update(tags.values(), ["post_count"], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0011_post_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                (
+                    "slug",
+                    models.SlugField(allow_unicode=True, max_length=60, unique=True),
+                ),
+                ("post_count", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="tag_set",
+            field=models.ManyToManyField(
+                blank=True, editable=False, related_name="posts", to="blog.tag"
+            ),
+        ),
+        migrations.RunPython(split_post_tags, migrations.RunPython.noop),
+    ]
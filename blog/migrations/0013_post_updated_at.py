@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def backfill_post_updated_at(apps, schema_editor):
+    # 已有文章以发布时间作为最后修改时间
+    Post = apps.get_model("blog", "Post")
+    Post.objects.update(updated_at=models.F("created_date"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0012_tag"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_post_updated_at, migrations.RunPython.noop),
+    ]
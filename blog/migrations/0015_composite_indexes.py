@@ -0,0 +1,67 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:57
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0014_comment_counts"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="post",
+            name="created_date",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name="animenavigation",
+            index=models.Index(
+                fields=["created_at", "id"], name="blog_anime_nav_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["post", "created_at", "id"], name="blog_comment_post_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["created_at", "id"], name="blog_comment_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["author", "created_at", "id"], name="blog_comment_author_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["created_date", "id"], name="blog_post_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["category", "created_date", "id"], name="blog_post_category_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["comment_count", "id"], name="blog_post_comment_count_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="websitenavigation",
+            index=models.Index(
+                fields=["created_at", "id"], name="blog_website_nav_created_idx"
+            ),
+        ),
+    ]
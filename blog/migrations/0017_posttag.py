@@ -0,0 +1,86 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:20
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def copy_post_dates(apps, schema_editor):
+    Post = apps.get_model("blog", "Post")
+    PostTag = apps.get_model("blog", "PostTag")
+    PostTag.objects.update(
+        created_date=Subquery(
+            Post.objects.filter(pk=OuterRef("post_id")).values("created_date")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0016_comment_created_at_default"),
+    ]
+
+    operations = [
+        # 自动生成的关联表改由显式模型描述，表结构不变
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="PostTag",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "post",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="blog.post",
+                            ),
+                        ),
+                        (
+                            "tag",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="blog.tag",
+                            ),
+                        ),
+                    ],
+                    options={
+                        "db_table": "blog_post_tag_set",
+                        "unique_together": {("post", "tag")},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="post",
+                    name="tag_set",
+                    field=models.ManyToManyField(
+                        blank=True,
+                        editable=False,
+                        related_name="posts",
+                        through="blog.PostTag",
+                        to="blog.tag",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="posttag",
+            name="created_date",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_post_dates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="posttag",
+            index=models.Index(
+                fields=["tag", "created_date", "post"], name="blog_post_tag_created_idx"
+            ),
+        ),
+    ]
@@ -1,7 +1,16 @@
 from django.db import models
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.text import Truncator, slugify
+import re
+
+# 列表页展示的摘要长度，与原模板中的 truncatechars:100 保持一致
+EXCERPT_LENGTH = 100
+
+def make_excerpt(content):
+    return Truncator(content or '').chars(EXCERPT_LENGTH)
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -10,14 +19,101 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+# 标签输入支持中英文逗号和顿号分隔
+TAG_SEPARATOR_RE = re.compile(r'[,，、]')
+TAG_NAME_LENGTH = 50
+
+def parse_tags(value):
+    names = (name.strip()[:TAG_NAME_LENGTH] for name in TAG_SEPARATOR_RE.split(value or ''))
+    return list(dict.fromkeys(name for name in names if name))
+
+class Tag(models.Model):
+    name = models.CharField(max_length=TAG_NAME_LENGTH, unique=True)
+    slug = models.SlugField(max_length=60, unique=True, allow_unicode=True)
+    # 冗余的文章数量，随文章的标签变化增量维护，标签云无需再统计
+    post_count = models.PositiveIntegerField(default=0)
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = self.unique_slug(self.name)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def unique_slug(cls, name):
+        base = slugify(name, allow_unicode=True) or 'tag'
+        slug, suffix = base, 2
+        while cls.objects.filter(slug=slug).exists():
+            slug = f'{base}-{suffix}'
+            suffix += 1
+        return slug
+
+    @classmethod
+    def release(cls, tag_ids):
+        """标签的文章数量各减一，以 0 为下限：计数有偏差时不写入负数（PostgreSQL 上会违反检查约束）。"""
+        cls.objects.filter(pk__in=tag_ids).update(post_count=Greatest(models.F('post_count') - 1, models.Value(0)))
+
+    def get_absolute_url(self):
+        return reverse('tag_detail', args=[self.slug])
+
+    def __str__(self):
+        return self.name
+
 class Post(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     created_date = models.DateTimeField(default=timezone.now)
+    # 最后修改时间，新增或删除评论时也会刷新，作为文章详情页条件请求的验证器
+    updated_at = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, default=1)
     custom_category = models.CharField(max_length=100, blank=True, null=True)
     tags = models.CharField(max_length=200, blank=True, null=True)
+    # 持久化的摘要，列表页只读取该字段而不必加载完整正文
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False)
+    # 由 tags 文本解析得到的规范化标签，保存文章后自动同步
+    tag_set = models.ManyToManyField(Tag, through='PostTag', related_name='posts', blank=True, editable=False)
+    # 冗余的评论总数（含回复），增删评论时以 F() 表达式原子更新，reconcile_comment_counts 命令可修复偏差
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        # 与列表页的键集分页一致：按 (排序字段, id) 倒序取数，索引反向扫描即可，无需额外排序
+        indexes = [
+            models.Index(fields=['created_date', 'id'], name='blog_post_created_idx'),
+            models.Index(fields=['category', 'created_date', 'id'], name='blog_post_category_idx'),
+            models.Index(fields=['comment_count', 'id'], name='blog_post_comment_count_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.excerpt = make_excerpt(self.content)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'excerpt'}
+        super().save(*args, **kwargs)
+
+    def sync_tags(self):
+        """
+        根据 tags 文本同步 tag_set，并以 F() 表达式增量更新各标签的文章数量。
+
+        返回：
+            标签集合是否发生变化。
+        """
+        names = parse_tags(self.tags)
+        links = list(self.posttag_set.select_related('tag'))
+        current = {link.tag.name: link.tag for link in links}
+        removed = [tag for name, tag in current.items() if name not in names]
+        added = [name for name in names if name not in current]
+        # 修改了发布时间时同步关联行中的冗余副本
+        if any(link.created_date != self.created_date for link in links):
+            self.posttag_set.update(created_date=self.created_date)
+        if removed:
+            self.tag_set.remove(*removed)
+            Tag.release([tag.pk for tag in removed])
+        if added:
+            existing = {tag.name: tag for tag in Tag.objects.filter(name__in=added)}
+            tags = [existing.get(name) or Tag.objects.get_or_create(name=name)[0] for name in added]
+            self.tag_set.add(*tags, through_defaults={'created_date': self.created_date})
+            Tag.objects.filter(pk__in=[tag.pk for tag in tags]).update(post_count=models.F('post_count') + 1)
+        return bool(removed or added)
 
     def get_absolute_url(self):
         return reverse('post_detail', args=[str(self.id)])
@@ -25,12 +121,43 @@ class Post(models.Model):
     def __str__(self):
         return self.title
 
+class PostTag(models.Model):
+    """文章与标签的关联，沿用自动生成的 blog_post_tag_set 表。"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+    # 冗余的文章发布时间，标签页按 (tag, created_date, post) 索引倒序取数，无需连接文章表后再排序
+    created_date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'blog_post_tag_set'
+        unique_together = [('post', 'tag')]
+        indexes = [models.Index(fields=['tag', 'created_date', 'post'], name='blog_post_tag_created_idx')]
+
 class Comment(models.Model):
     post = models.ForeignKey('Post', on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # 默认为创建时刻；导入数据时可直接指定原始时间（auto_now_add 会在 bulk_create 时覆盖）
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies')
+    # 冗余保存所属的一级评论，便于一次查询取出整篇文章的评论并按楼层分组
+    root = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='thread_replies')
+    # 一级评论楼层下的回复总数（回复本身恒为 0），维护方式同 Post.comment_count
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # 文章详情页按时间正序加载整篇文章的评论
+            models.Index(fields=['post', 'created_at', 'id'], name='blog_comment_post_idx'),
+            # 评论审核列表按时间键集分页，可按作者筛选
+            models.Index(fields=['created_at', 'id'], name='blog_comment_created_idx'),
+            models.Index(fields=['author', 'created_at', 'id'], name='blog_comment_author_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.parent_id and not self.root_id:
+            self.root_id = self.parent.root_id or self.parent_id
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
@@ -57,6 +184,9 @@ class AnimeNavigation(models.Model):
     url = models.URLField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['created_at', 'id'], name='blog_anime_nav_created_idx')]
+
     def __str__(self):
         return self.title
 
@@ -66,6 +196,9 @@ class WebsiteNavigation(models.Model):
     description = models.TextField(max_length=200)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['created_at', 'id'], name='blog_website_nav_created_idx')]
+
     def __str__(self):
         return self.title
 
@@ -76,4 +209,14 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
-# 修改记录：添加了 UserProfile 模型以存储用户头像，默认使用 static/images/default.png。
\ No newline at end of file
+# 修改记录：添加了 UserProfile 模型以存储用户头像，默认使用 static/images/default.png。
+# 修改记录：为 Comment 添加 root 字段（冗余的一级评论外键），保存回复时自动填充，供评论树一次性加载使用。
+# 修改记录：为 Post 添加 excerpt 摘要字段，保存时根据正文重新生成，列表页无需加载 content。
+# 修改记录：Post.created_date 添加索引，供归档按月范围查询和按时间排序使用。
+# 修改记录：添加 Tag 模型及 Post.tag_set 多对多关系，tags 文本仍作为输入，保存后由 sync_tags 同步并增量维护标签文章数。
+# 修改记录：为 Post 添加 updated_at 最后修改时间字段，供条件请求（ETag/Last-Modified）使用。
+# 修改记录：为 Post 添加 comment_count、为 Comment 添加 reply_count 冗余计数字段，列表页显示与排序评论数时无需统计评论表。
+# 修改记录：为 Post、Comment 与两个导航模型添加与视图查询匹配的组合索引 (排序字段, id)，Post.created_date 的单列索引由组合索引取代。
+# 修改记录：Comment.created_at 由 auto_now_add 改为 default=timezone.now，批量导入时可保留原始评论时间。
+# 修改记录：Post.tag_set 改用显式的 PostTag 关联模型（仍为 blog_post_tag_set 表），冗余文章发布时间并按 (tag, created_date, post) 建索引，供标签页按索引顺序分页。
+# 修改记录：添加 Tag.release，扣减标签文章数量时以 0 为下限，sync_tags 与删除文章时共用。
@@ -0,0 +1,209 @@
+import base64
+import binascii
+import hashlib
+import json
+import math
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db.models import Q
+
+# 近似总数的缓存时间（秒），只用于显示“第 X 页，共 Y 页”
+COUNT_CACHE_TIMEOUT = 300
+
+
+def _json_default(value):
+    # 日期时间保留完整的微秒精度（DjangoJSONEncoder 会截断到毫秒，导致键集比较出错）
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'无法序列化的游标值：{value!r}')
+
+
+def encode_cursor(data):
+    raw = json.dumps(data, default=_json_default, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class KeysetPage:
+    """
+    键集分页的一页数据，接口与 Django 的 Page 对象相近，模板可直接迭代。
+
+    除 has_next/has_previous 外，还提供 next_cursor、previous_cursor、
+    last_cursor 以及 page_window（页码窗口，None 表示省略号）。
+    """
+
+    def __init__(self, paginator, object_list, number, has_previous, has_next):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.number = number
+        self.has_previous_page = has_previous
+        self.has_next_page = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_other_pages(self):
+        return self.has_previous_page or self.has_next_page
+
+    @property
+    def num_pages(self):
+        # 近似总页数：已到最后一页时以当前页码为准，否则不小于下一页页码
+        if not self.has_next_page:
+            return self.number
+        return max(self.paginator.num_pages, self.number + 1)
+
+    def _key(self, obj):
+        return [getattr(obj, self.paginator.field), obj.pk]
+
+    def cursor_for(self, number):
+        """生成跳转到指定页码的游标；页码需在当前页附近的窗口内。"""
+        if number == 1:
+            return ''
+        if number == self.number:
+            return self.paginator.current_cursor
+        if number > self.number:
+            anchor = self._key(self.object_list[-1])
+            return encode_cursor({'d': 'n', 'k': anchor, 's': number - self.number - 1, 'n': number})
+        anchor = self._key(self.object_list[0])
+        return encode_cursor({'d': 'p', 'k': anchor, 's': self.number - number - 1, 'n': number})
+
+    @property
+    def next_cursor(self):
+        return self.cursor_for(self.number + 1) if self.has_next_page else None
+
+    @property
+    def previous_cursor(self):
+        return self.cursor_for(self.number - 1) if self.has_previous_page else None
+
+    @property
+    def last_cursor(self):
+        return encode_cursor({'d': 'p', 'k': None, 's': 0, 'n': self.num_pages})
+
+    @property
+    def page_window(self):
+        """当前页前后 window 页的页码与游标，首尾页始终保留，中间以 None 表示省略。"""
+        if not self.object_list:
+            return [(1, '')]
+        window = self.paginator.window
+        start = self.number - window if self.has_previous_page else self.number
+        end = self.number + window if self.has_next_page else self.number
+        numbers = range(max(start, 1), min(end, self.num_pages) + 1)
+        pages = []
+        if numbers[0] > 1:
+            pages.append((1, ''))
+            if numbers[0] > 2:
+                pages.append((None, None))
+        pages.extend((number, self.cursor_for(number)) for number in numbers)
+        if numbers[-1] < self.num_pages:
+            if numbers[-1] < self.num_pages - 1:
+                pages.append((None, None))
+            pages.append((self.num_pages, self.last_cursor))
+        return pages
+
+
+class KeysetPaginator:
+    """
+    按 (field, id) 倒序的键集（seek）分页器。
+
+    翻页通过不透明的游标令牌定位到上一页的首/尾记录，再用索引范围条件取下一批，
+    不执行 OFFSET 扫描，第 5000 页与第 1 页的开销相同。跳转到窗口内相邻的页码时
+    只在锚点之后额外跳过至多 window 页的数据。总数只用于显示，按查询缓存近似值。
+    """
+
+    def __init__(self, queryset, per_page, field='created_date', window=2):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+        self.window = window
+        self.current_cursor = ''
+
+    @property
+    def count(self):
+        try:
+            sql = str(self.queryset.order_by().query)
+        except EmptyResultSet:
+            return 0
+        key = 'blog:count:' + hashlib.md5(sql.encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = self.queryset.order_by().count()
+            cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+    @property
+    def num_pages(self):
+        return max(1, math.ceil(self.count / self.per_page))
+
+    def _parse_key(self, key):
+        if not isinstance(key, list) or len(key) != 2:
+            raise ValidationError('invalid cursor key')
+        model_field = self.queryset.model._meta.get_field(self.field)
+        return model_field.to_python(key[0]), self.queryset.model._meta.pk.to_python(key[1])
+
+    def page(self, token):
+        """按游标令牌取一页，令牌为空或无效时返回第一页。"""
+        data = decode_cursor(token) if token else None
+        try:
+            direction = data['d'] if data else 'n'
+            key = self._parse_key(data['k']) if data and data.get('k') is not None else None
+            skip = max(int(data.get('s', 0)), 0) if data else 0
+            number = max(int(data.get('n', 1)), 1) if data else 1
+            if direction not in ('n', 'p') or skip > self.window:
+                raise ValueError
+        except (KeyError, TypeError, ValueError, ValidationError):
+            direction, key, skip, number = 'n', None, 0, 1
+        self.current_cursor = token if key is not None or direction == 'p' else ''
+
+        field, offset = self.field, skip * self.per_page
+        queryset = self.queryset
+        if direction == 'n':
+            if key is not None:
+                queryset = queryset.filter(Q(**{f'{field}__lt': key[0]}) | Q(**{field: key[0], 'pk__lt': key[1]}))
+            rows = list(queryset.order_by(f'-{field}', '-pk')[offset:offset + self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            object_list = rows[:self.per_page]
+            has_previous = key is not None
+        else:
+            if key is not None:
+                queryset = queryset.filter(Q(**{f'{field}__gt': key[0]}) | Q(**{field: key[0], 'pk__gt': key[1]}))
+                size = self.per_page
+            else:
+                # 末页只取总数除以每页数量的余数篇，与向后翻页得到的末页边界一致
+                size = self.count % self.per_page or self.per_page
+            rows = list(queryset.order_by(field, 'pk')[offset:offset + size + 1])
+            has_previous = len(rows) > size
+            object_list = rows[:size][::-1]
+            has_next = key is not None
+        if not has_previous:
+            # 已回到开头，页码校正为 1
+            number = 1
+            self.current_cursor = ''
+        elif number < 2:
+            number = 2
+        if not object_list and key is not None:
+            # 锚点之后已无数据（例如数据被删除），退回第一页
+            return self.page('')
+        return KeysetPage(self, object_list, number, has_previous, has_next)
+
+# 修改记录：
+# 1. 新建 pagination.py，实现基于 (field, id) 的键集分页器 KeysetPaginator，使用不透明游标令牌翻页，
+#    总数按查询缓存近似值，仅用于显示页码窗口和“第 X 页，共 Y 页”。
+# 2. 末页按（缓存的）总数取余数篇，而不是从尾部倒取一整页，与向后翻页的页边界一致，不再与前一页重复。
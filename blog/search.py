@@ -0,0 +1,213 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Post
+
+# 中日韩字符按二元组（bigram）切分，其余字母数字按单词切分
+CJK_RANGES = (
+    '぀-ヿ'   # 日文假名
+    '㐀-䶿'   # CJK 扩展 A
+    '一-鿿'   # CJK 统一汉字
+    '가-힯'   # 韩文
+    '豈-﫿'   # CJK 兼容汉字
+)
+TOKEN_RE = re.compile(rf'([{CJK_RANGES}]+)|([^\W_{CJK_RANGES}]+)')
+CJK_RUN_RE = re.compile(rf'[{CJK_RANGES}]')
+
+SQLITE_TABLE = 'blog_post_fts'
+POSTGRES_TABLE = 'blog_post_search'
+
+# 标题命中的权重高于正文
+TITLE_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+
+
+def tokenize(text, for_query=False):
+    """
+    将文本切分为索引词元。
+
+    参数：
+        text：任意文本。
+        for_query：为 True 时按查询语义切分，不追加末字单字词元。
+    返回：
+        词元列表：连续的中日韩字符切为二元组，其余按单词小写化。
+        建索引时每段中日韩字符的末字额外作为单字词元写入，
+        这样单字查询用前缀匹配即可命中该字的每一次出现。
+    """
+    tokens = []
+    for cjk, word in TOKEN_RE.findall((text or '').lower()):
+        if not cjk:
+            tokens.append(word)
+        elif len(cjk) == 1:
+            tokens.append(cjk)
+        else:
+            tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+            if not for_query:
+                tokens.append(cjk[-1])
+    return tokens
+
+
+def to_document(text):
+    return ' '.join(tokenize(text))
+
+
+def query_tokens(query):
+    """查询词元去重并保持顺序，所有词元均需命中（AND 语义）。"""
+    return list(dict.fromkeys(tokenize(query, for_query=True)))
+
+
+def is_prefix_token(token):
+    # 单个中日韩字符只能以前缀方式匹配二元组
+    return len(token) == 1 and CJK_RUN_RE.match(token) is not None
+
+
+def index_post(post):
+    """新增或更新单篇文章的索引条目。"""
+    title, body = to_document(post.title), to_document(post.content)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {SQLITE_TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+                [post.pk, title, body],
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                f"INSERT INTO {POSTGRES_TABLE} (post_id, document) VALUES "
+                f"(%s, setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B')) "
+                f"ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document",
+                [post.pk, title, body],
+            )
+
+
+def remove_post(post_id):
+    """删除单篇文章的索引条目。"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s', [post_id])
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'DELETE FROM {POSTGRES_TABLE} WHERE post_id = %s', [post_id])
+
+
+def rebuild_index(chunk_size=1000, progress=None):
+    """
+    清空并分批重建全部文章的索引。
+
+    参数：
+        chunk_size：每批读取并写入的文章数。
+        progress：可选回调，每写完一批以已处理数量调用一次。
+    返回：
+        已索引的文章总数。
+    """
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SQLITE_TABLE if connection.vendor == "sqlite" else POSTGRES_TABLE}')
+    total = 0
+    batch = []
+    for post in Post.objects.only('id', 'title', 'content').order_by('id').iterator(chunk_size=chunk_size):
+        batch.append(post)
+        if len(batch) >= chunk_size:
+            total += index_posts(batch)
+            batch = []
+            if progress:
+                progress(total)
+    if batch:
+        total += index_posts(batch)
+        if progress:
+            progress(total)
+    return total
+
+
+def index_posts(posts):
+    """批量写入一组新文章的索引条目（调用方需保证这些文章尚未建立索引）。"""
+    rows = [(post.pk, to_document(post.title), to_document(post.content)) for post in posts]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(f'INSERT INTO {SQLITE_TABLE} (rowid, title, body) VALUES (%s, %s, %s)', rows)
+        else:
+            cursor.executemany(
+                f"INSERT INTO {POSTGRES_TABLE} (post_id, document) VALUES "
+                f"(%s, setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B'))",
+                rows,
+            )
+    return len(rows)
+
+
+class SearchResults:
+    """
+    按相关度排序的搜索结果，可直接交给 Paginator 分页。
+
+    count() 与切片各执行一次索引查询，切片只取出当前页的文章。
+    """
+
+    def __init__(self, query):
+        self.query = query
+        self.tokens = query_tokens(query)
+        self._count = None
+
+    def _match_expression(self):
+        # 词元只含字母数字和中日韩字符，无需再做引号转义
+        if connection.vendor == 'sqlite':
+            return ' AND '.join(f'"{token}"*' if is_prefix_token(token) else f'"{token}"' for token in self.tokens)
+        return ' & '.join(f"'{token}':*" if is_prefix_token(token) else f"'{token}'" for token in self.tokens)
+
+    def count(self):
+        if self._count is None:
+            self._count = self._fetch_count() if self.tokens else 0
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def _fetch_count(self):
+        if connection.vendor == 'sqlite':
+            sql = f'SELECT COUNT(*) FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s'
+        elif connection.vendor == 'postgresql':
+            sql = f"SELECT COUNT(*) FROM {POSTGRES_TABLE} WHERE document @@ to_tsquery('simple', %s)"
+        else:
+            return self._fallback_queryset().count()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [self._match_expression()])
+            return cursor.fetchone()[0]
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('SearchResults 只支持切片访问')
+        if not self.tokens:
+            return []
+        offset = index.start or 0
+        limit = (index.stop - offset) if index.stop is not None else self.count() - offset
+        if limit <= 0:
+            return []
+        if connection.vendor == 'sqlite':
+            sql = (
+                f'SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s '
+                f'ORDER BY bm25({SQLITE_TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT}) LIMIT %s OFFSET %s'
+            )
+        elif connection.vendor == 'postgresql':
+            sql = (
+                f"SELECT post_id FROM {POSTGRES_TABLE}, to_tsquery('simple', %s) AS query "
+                f"WHERE document @@ query ORDER BY ts_rank(document, query) DESC, post_id DESC LIMIT %s OFFSET %s"
+            )
+        else:
+            return list(self._fallback_queryset()[offset:offset + limit])
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [self._match_expression(), limit, offset])
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.select_related('author', 'category').defer('content').in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+    def _fallback_queryset(self):
+        # 其他数据库没有倒排索引，退回 icontains 全表扫描
+        queryset = Post.objects.select_related('author', 'category').defer('content')
+        for word in self.query.split():
+            queryset = queryset.filter(Q(title__icontains=word) | Q(content__icontains=word))
+        return queryset.order_by('-created_date')
+
+# 修改记录：
+# 1. 新建 search.py，实现基于倒排索引的全文搜索：SQLite 使用 FTS5 虚拟表，PostgreSQL 使用 tsvector + GIN 索引。
+# 2. tokenize 对中日韩文本按二元组切分，解决基于单词的分词器无法处理中文的问题。
+# 3. SearchResults 支持 count() 与切片，可直接交给 Paginator 做排序分页。
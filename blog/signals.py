@@ -0,0 +1,166 @@
+from django.db import transaction
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import images, search
+from .caching import bump_version, post_namespace
+from .context_processors import user_namespace
+from .models import AnimeNavigation, Category, Post, Tag, UserProfile, WebsiteNavigation
+
+
+# 文章保存或删除时增量更新全文搜索索引
+@receiver(post_save, sender=Post)
+def update_post_search_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_search_index(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+# 文章保存后根据 tags 文本同步规范化标签
+@receiver(post_save, sender=Post)
+def sync_post_tags(sender, instance, raw=False, created=False, **kwargs):
+    if raw or (created and not instance.tags):
+        return
+    if instance.sync_tags():
+        bump_version('tags')
+
+
+# 文章删除前扣减其标签的文章数量（关联行随后由级联删除）
+@receiver(pre_delete, sender=Post)
+def release_post_tags(sender, instance, **kwargs):
+    tag_ids = list(instance.tag_set.values_list('id', flat=True))
+    if tag_ids:
+        Tag.release(tag_ids)
+        bump_version('tags')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_cloud(sender, **kwargs):
+    bump_version('tags')
+
+
+# 分类变化时递增 'categories' 版本号：分类页、显示分类名称的列表页与详情页都依赖它，只需递增一次。
+# 文章变化引起的分类文章数量变化由 'posts' 版本号负责，文章保存时不递增 'categories'
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    bump_version('categories')
+
+# 文章列表与导航数据变化时递增版本号，列表页据此计算 ETag
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    bump_version('posts')
+    bump_version(post_namespace(instance.pk))
+
+
+@receiver(post_save, sender=AnimeNavigation)
+@receiver(post_delete, sender=AnimeNavigation)
+@receiver(post_save, sender=WebsiteNavigation)
+@receiver(post_delete, sender=WebsiteNavigation)
+def invalidate_navigation(sender, **kwargs):
+    bump_version('navigation')
+
+
+# 需要生成响应式派生图的图片字段：模型 -> (字段名, 尺寸预设)
+IMAGE_FIELDS = {
+    AnimeNavigation: ('image', 'anime'),
+    UserProfile: ('profile_image', 'avatar'),
+}
+
+
+def _image_file(instance):
+    field_name, preset = IMAGE_FIELDS[type(instance)]
+    field_file = getattr(instance, field_name)
+    # UserProfile 的默认头像是静态文件，不在媒体存储中
+    if not field_file or field_file.name == instance._meta.get_field(field_name).default:
+        return None, preset
+    return field_file, preset
+
+
+# 新上传的图片在保存前尚未写入存储（_committed 为 False），据此判断是否需要生成派生图
+@receiver(pre_save, sender=AnimeNavigation)
+@receiver(pre_save, sender=UserProfile)
+def mark_uploaded_image(sender, instance, raw=False, **kwargs):
+    field_file, _ = _image_file(instance)
+    instance._image_uploaded = not raw and field_file is not None and not field_file._committed
+
+
+@receiver(post_save, sender=AnimeNavigation)
+@receiver(post_save, sender=UserProfile)
+def schedule_image_derivatives(sender, instance, **kwargs):
+    if getattr(instance, '_image_uploaded', False):
+        field_file, preset = _image_file(instance)
+        name = field_file.name
+        transaction.on_commit(lambda: schedule_and_refresh(sender, name, preset))
+
+
+def schedule_and_refresh(sender, name, preset):
+    future = images.schedule_derivatives(name, preset)
+    if sender is AnimeNavigation:
+        # 派生图生成后侧边栏改为输出 <picture>，需要重新渲染缓存的导航片段
+        future.add_done_callback(lambda _: bump_version('navigation'))
+
+
+@receiver(post_delete, sender=AnimeNavigation)
+@receiver(post_delete, sender=UserProfile)
+def delete_image_derivatives(sender, instance, **kwargs):
+    field_file, preset = _image_file(instance)
+    if field_file is not None:
+        images.delete_derivatives(field_file.name, preset)
+
+# 用户名变化或删除用户时递增 'authors' 版本号，显示作者与评论者用户名的页面随之失效。
+# 登录只更新 last_login（update_fields 不含 username），不查询也不递增
+@receiver(pre_save, sender=User)
+def remember_username_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._username_changed = False
+    if raw or instance.pk is None or (update_fields is not None and 'username' not in update_fields):
+        return
+    previous = User.objects.filter(pk=instance.pk).values_list('username', flat=True).first()
+    instance._username_changed = previous is not None and previous != instance.username
+
+
+@receiver(post_save, sender=User)
+def invalidate_renamed_author(sender, instance, **kwargs):
+    if instance._username_changed:
+        bump_version('authors')
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_author(sender, instance, **kwargs):
+    bump_version('authors')
+
+
+# 用户或头像变化时使该用户的导航栏展示数据缓存失效
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_display(sender, instance, **kwargs):
+    bump_version(user_namespace(instance.pk))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_display(sender, instance, **kwargs):
+    bump_version(user_namespace(instance.user_id))
+
+# 修改记录：
+# 1. 新建 signals.py，文章保存/删除时增量维护全文搜索索引。
+# 2. 添加标签同步信号：文章保存后同步 tag_set，删除前扣减标签文章数，并使标签云缓存失效。
+# 3. 文章或分类保存/删除时使分类文章数量缓存失效。
+# 4. 动漫导航图片与用户头像上传后，在事务提交时提交到后台线程池生成响应式派生图；删除时一并清理。
+# 5. User 或 UserProfile 保存/删除时递增该用户的版本号，使 user_display 缓存失效。
+# 6. 文章与导航数据保存/删除时递增 'posts'/'navigation' 版本号；评论保存/删除时刷新所属文章的 updated_at。
+# 7. 文章、评论与分类变化时递增受影响文章的 'post:<id>' 版本号，匿名整页缓存只使这些文章的详情页失效。
+# 8. 动漫导航图片的派生图生成完成后递增 'navigation' 版本号，刷新缓存的侧边栏片段。
+# 9. 评论保存/删除时递增 'comments' 版本号，显示评论数的列表页随之失效。
+# 10. 移除 Comment 的 post_save/post_delete 信号：逐行信号使删除文章时无法快速级联删除评论，且每次保存都递增全局版本号；
+#     改由 blog.comments 中的评论增删函数在每次操作结束时统一失效。删除文章时由 Post 的 post_delete 信号递增其 'post:<id>' 版本号。
+# 11. 分类变化只递增一次 'categories'，不再逐篇递增其文章的 'post:<id>'；文章保存不再递增 'categories'。
+#     用户名变化或删除用户时递增 'authors'。
+# 12. 删除文章时通过 Tag.release 扣减标签文章数量，以 0 为下限。
@@ -0,0 +1,113 @@
+import io
+import json
+import posixpath
+
+from django.core.files.base import ContentFile
+from PIL import Image, features
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+# 记录各图片已生成的变体（原始宽高、宽度列表、格式列表），与 staticfiles.json 放在同一目录
+VARIANTS_MANIFEST_NAME = 'image_variants.json'
+
+
+class OptimizedImageStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    在 collectstatic 的后处理阶段为打包的图片生成优化变体。
+
+    对 images/ 下足够大的 PNG/JPEG，按若干固定宽度（不放大、不超过最大宽度）输出重新压缩的 PNG/JPEG、
+    WebP 以及（Pillow 支持时）AVIF，文件名形如 images/write.w640.webp。变体与原文件一起
+    交给父类计算哈希、写入 manifest 并压缩，模板通过 static_picture 标签以 <picture> 选用。
+    """
+
+    image_dirs = ('images/',)
+    image_extensions = ('.png', '.jpg', '.jpeg')
+    image_min_size = 32 * 1024
+    image_widths = (640, 1280, 1920)
+    webp_quality = 80
+    avif_quality = 55
+    jpeg_quality = 82
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.image_variants = self.load_image_variants()
+
+    def load_image_variants(self):
+        try:
+            with self.open(VARIANTS_MANIFEST_NAME) as manifest:
+                return json.loads(manifest.read().decode())
+        except (OSError, ValueError):
+            return {}
+
+    def image_formats(self, fallback):
+        formats = ['avif'] if features.check('avif') else []
+        return formats + ['webp', fallback]
+
+    def is_optimizable(self, name, storage, path):
+        return (
+            name.startswith(self.image_dirs)
+            and name.lower().endswith(self.image_extensions)
+            and storage.size(path) >= self.image_min_size
+        )
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            self.image_variants = {}
+            for name, (storage, path) in list(paths.items()):
+                if self.is_optimizable(name, storage, path):
+                    for variant in self.create_image_variants(name, storage, path):
+                        paths[variant] = (self, variant)
+            self._save_file(VARIANTS_MANIFEST_NAME, json.dumps(self.image_variants, ensure_ascii=False, indent=2).encode())
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def create_image_variants(self, name, storage, path):
+        """生成一张图片的全部变体，返回变体文件名列表。"""
+        with storage.open(path) as source:
+            image = Image.open(source)
+            image.load()
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        stem, ext = posixpath.splitext(name)
+        fallback = 'png' if ext.lower() == '.png' else 'jpg'
+        formats = self.image_formats(fallback)
+        # 超过最大宽度的原图不再输出原尺寸变体
+        widths = [width for width in self.image_widths if width < image.width]
+        if image.width <= self.image_widths[-1]:
+            widths.append(image.width)
+
+        variants = []
+        for width in widths:
+            resized = image
+            if width < image.width:
+                resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            for fmt in formats:
+                variant = f'{stem}.w{width}.{fmt}'
+                self._save_file(variant, self.encode_image(resized, fmt))
+                variants.append(variant)
+        self.image_variants[name] = {
+            'width': widths[-1],
+            'height': round(image.height * widths[-1] / image.width),
+            'widths': widths,
+            'formats': formats,
+        }
+        return variants
+
+    def encode_image(self, image, fmt):
+        buffer = io.BytesIO()
+        if fmt == 'avif':
+            image.save(buffer, 'AVIF', quality=self.avif_quality)
+        elif fmt == 'webp':
+            image.save(buffer, 'WEBP', quality=self.webp_quality, method=6)
+        elif fmt == 'png':
+            image.save(buffer, 'PNG', optimize=True)
+        else:
+            image.convert('RGB').save(buffer, 'JPEG', quality=self.jpeg_quality, optimize=True, progressive=True)
+        return buffer.getvalue()
+
+    def _save_file(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
+
+# 修改记录：
+# 1. 新建 storage.py，OptimizedImageStaticFilesStorage 在 collectstatic 时为打包图片生成按宽度缩放的
+#    PNG/JPEG、WebP 与 AVIF 变体，变体随原文件一起计算哈希并写入 manifest。
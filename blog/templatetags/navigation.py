@@ -0,0 +1,74 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django import template
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from blog.aio import alist, concurrent
+from blog.caching import aget_or_set, get_or_set
+from blog.models import AnimeNavigation, WebsiteNavigation
+
+register = template.Library()
+
+# 首页轮播显示的动漫导航数量
+ANIME_NAVIGATION_SIZE = 3
+
+
+def anime_navigations():
+    return AnimeNavigation.objects.order_by('-created_at').values('title', 'url', 'image')[:ANIME_NAVIGATION_SIZE]
+
+
+def website_navigations():
+    return WebsiteNavigation.objects.order_by('-created_at').values('title', 'url', 'description')
+
+
+def build_navigation():
+    """侧边栏导航数据：只取模板用到的字段，图片保存为存储中的文件名。"""
+    return {
+        'anime_navs': list(anime_navigations()),
+        'website_navs': list(website_navigations()),
+    }
+
+
+async def abuild_navigation():
+    """build_navigation 的异步版本，两个导航列表同时查询。"""
+    anime_navs, website_navs = await asyncio.gather(
+        alist(anime_navigations()),
+        concurrent(list, website_navigations()),
+    )
+    return {'anime_navs': anime_navs, 'website_navs': website_navs}
+
+
+def get_navigation():
+    return get_or_set('navigation', ['data'], build_navigation)
+
+
+def render_navigation_sidebar():
+    return render_to_string('blog/sidebar_navigation.html', get_navigation())
+
+
+async def anavigation_sidebar():
+    """
+    navigation_sidebar 的异步版本，与其共用缓存：异步视图先取得侧边栏 HTML，
+    再作为 navigation_sidebar 变量放入模板上下文。
+    """
+    async def render():
+        navigation = await aget_or_set('navigation', ['data'], abuild_navigation)
+        return await sync_to_async(render_to_string)('blog/sidebar_navigation.html', navigation)
+    return mark_safe(await aget_or_set('navigation', ['sidebar'], render))
+
+
+@register.simple_tag
+def navigation_sidebar():
+    """
+    输出首页右侧的动漫导航与网站导航。
+
+    数据与渲染后的 HTML 片段都按 'navigation' 命名空间缓存，导航增删改或
+    导航图片的派生图生成完成时由信号递增版本号。
+    """
+    return mark_safe(get_or_set('navigation', ['sidebar'], render_navigation_sidebar))
+
+# 修改记录：
+# 1. 新建 navigation.py，提供 navigation_sidebar 模板标签，缓存侧边栏导航数据及渲染后的 HTML 片段。
+# 2. 添加 anavigation_sidebar 与 abuild_navigation，异步视图以异步 ORM 并发查询两个导航列表，与同步版本共用缓存。
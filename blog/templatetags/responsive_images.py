@@ -0,0 +1,125 @@
+import functools
+import posixpath
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from blog.images import IMAGE_PRESETS, derivative_urls, derivatives_ready
+
+register = template.Library()
+
+
+def _srcset(urls):
+    return ', '.join(f'{url} {width}w' for url, width in urls)
+
+
+@register.simple_tag
+def responsive_image(field_file, preset, alt='', sizes='100vw', fallback='', **attrs):
+    """
+    输出上传图片的响应式 <picture>：WebP 与 JPEG 派生图的 srcset/sizes，并延迟加载。
+
+    用法：{% responsive_image anime.image 'anime' alt=anime.title sizes='(min-width: 768px) 10vw, 30vw' class='img-fluid' %}
+
+    field_file 可以是 FieldFile 或媒体存储中的文件名。派生图尚未生成时输出原图；
+    没有图片时输出 fallback 地址（为空则不输出）。
+    """
+    attrs = {key.replace('_', '-'): value for key, value in attrs.items()}
+    attrs['alt'] = alt
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    # 也接受媒体存储中的文件名（例如缓存的头像名称）
+    name = getattr(field_file, 'name', field_file)
+    field = getattr(field_file, 'field', None)
+    # 未上传图片，或仍是字段默认值（例如默认头像，不在媒体存储中）
+    if not name or (field is not None and name == field.default):
+        return format_html('<img src="{}"{}>', fallback, flatatt(attrs)) if fallback else ''
+    if preset not in IMAGE_PRESETS or not derivatives_ready(name, preset):
+        return format_html('<img src="{}"{}>', default_storage.url(name), flatatt(attrs))
+    jpeg = derivative_urls(name, preset, 'jpg')
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}"><img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        _srcset(derivative_urls(name, preset, 'webp')), sizes,
+        jpeg[-1][0], _srcset(jpeg), sizes, flatatt(attrs),
+    )
+
+@register.simple_tag
+def static_picture(path, alt='', sizes='100vw', **attrs):
+    """
+    输出打包静态图片的 <picture>，按 AVIF、WebP、PNG/JPEG 的顺序由浏览器选择最佳格式与宽度。
+
+    用法：{% static_picture 'images/write.png' alt='横幅' class='d-block w-100' %}
+
+    变体由 OptimizedImageStaticFilesStorage 在 collectstatic 时生成；开发环境或没有变体时输出原图。
+    """
+    attrs = {key.replace('_', '-'): value for key, value in attrs.items()}
+    attrs['alt'] = alt
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    info = _static_variants(path)
+    if not info:
+        return format_html('<img src="{}"{}>', staticfiles_storage.url(path), flatatt(attrs))
+    stem = posixpath.splitext(path)[0]
+    *modern, fallback = info['formats']
+
+    def srcset(fmt):
+        return _srcset((staticfiles_storage.url(f'{stem}.w{width}.{fmt}'), width) for width in info['widths'])
+
+    sources = format_html_join('', '<source type="image/{}" srcset="{}" sizes="{}">', (
+        (fmt, srcset(fmt), sizes) for fmt in modern
+    ))
+    attrs.setdefault('width', info['width'])
+    attrs.setdefault('height', info['height'])
+    largest = staticfiles_storage.url(f'{stem}.w{info["widths"][-1]}.{fallback}')
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        sources, largest, srcset(fallback), sizes, flatatt(attrs),
+    )
+
+def _static_variants(path):
+    return None if settings.DEBUG else getattr(staticfiles_storage, 'image_variants', {}).get(path)
+
+
+@functools.lru_cache(maxsize=256)
+def _static_exists(path):
+    return path in getattr(staticfiles_storage, 'image_variants', {}) or finders.find(path) is not None
+
+
+@register.simple_tag
+def bundled_image(name, default='images/icon.png'):
+    """
+    打包的同名图片 images/<name>.png 的静态路径，不存在时返回 default。
+
+    用法：{% bundled_image anime.title as cover %}（未上传图片的动漫导航使用同名的打包封面）
+    """
+    path = f'images/{name}.png'
+    return path if name and '/' not in name and _static_exists(path) else default
+
+
+@register.simple_tag
+def static_image_set(path):
+    """
+    输出打包图片的 CSS 背景值：有变体时为按 AVIF、WebP、PNG/JPEG 排列的 image-set()，否则为 url()。
+
+    用法：background-image: {% static_image_set 'images/background.png' %};
+    不支持 image-set() 的浏览器会忽略该声明，应在它之前先写一条 url() 作为兜底。
+    """
+    info = _static_variants(path)
+    if not info:
+        return format_html('url("{}")', staticfiles_storage.url(path))
+    stem = posixpath.splitext(path)[0]
+    width = info['widths'][-1]
+    candidates = format_html_join(', ', 'url("{}") type("image/{}")', (
+        (staticfiles_storage.url(f'{stem}.w{width}.{fmt}'), 'jpeg' if fmt == 'jpg' else fmt) for fmt in info['formats']
+    ))
+    return format_html('image-set({})', candidates)
+
+# 修改记录：
+# 1. 新建 responsive_images.py，提供 responsive_image 模板标签，为上传图片输出带 srcset/sizes 与 loading="lazy" 的 <picture>。
+# 2. 添加 static_picture 模板标签，为 collectstatic 时生成的打包图片变体输出 AVIF/WebP/PNG 的 <picture>。
+# 3. responsive_image 同时接受媒体存储中的文件名，供缓存的用户头像使用。
+# 4. 添加 bundled_image 与 static_image_set 模板标签：未上传图片的动漫导航使用同名的打包封面，CSS 背景图以 image-set() 选用变体。
@@ -0,0 +1,33 @@
+from django import template
+
+from blog.caching import get_or_set
+from blog.models import Tag
+
+register = template.Library()
+
+TAG_CLOUD_SIZE = 50
+TAG_CLOUD_LEVELS = 5
+
+
+def build_tag_cloud():
+    tags = list(
+        Tag.objects.filter(post_count__gt=0)
+        .order_by('-post_count', 'name')
+        .values('name', 'slug', 'post_count')[:TAG_CLOUD_SIZE]
+    )
+    if tags:
+        largest = tags[0]['post_count']
+        for tag in tags:
+            # 按文章数量映射到 1~5 级字号
+            tag['level'] = 1 + (TAG_CLOUD_LEVELS - 1) * tag['post_count'] // largest
+        tags.sort(key=lambda tag: tag['name'])
+    return tags
+
+
+@register.inclusion_tag('blog/tag_cloud.html')
+def tag_cloud():
+    """渲染标签云，数据按 'tags' 命名空间缓存，标签变化时由信号使其失效。"""
+    return {'tags': get_or_set('tags', ['cloud'], build_tag_cloud)}
+
+# 修改记录：
+# 1. 新建 tag_cloud.py，提供 tag_cloud 模板标签，从缓存读取带文章数量的标签云数据。
\ No newline at end of file
@@ -0,0 +1,1790 @@
+import contextvars
+import gzip
+import importlib
+import io
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.template import engines
+from django.db import connection, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.utils import ProgrammingError, load_backend
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (
+    AsyncClient, Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import images
+from .benchmark import compare_results, run_benchmark
+from .caching import get_or_set
+from .comments import (
+    apply_count_deltas, collect_descendants, delete_comments, load_comment_thread, reconcile_comment_counts,
+)
+from .db import pool as db_pool
+from .db.routers import RECENT_WRITE_KEY, routing
+from .export import export_stream
+from .forms import CommentFilterForm
+from .message_storage import AnonymousCookieStorage
+from .pagination import KeysetPaginator, encode_cursor
+from .search import tokenize
+from .templatetags.responsive_images import bundled_image, responsive_image, static_image_set, static_picture
+from .templatetags.navigation import ANIME_NAVIGATION_SIZE, anavigation_sidebar, navigation_sidebar
+from .templatetags.tag_cloud import tag_cloud
+from .timing import RequestTiming, install as install_timing
+from .warmup import project_template_names
+from .models import (
+    EXCERPT_LENGTH, AnimeNavigation, Category, Comment, Post, Tag, UserProfile, WebsiteNavigation, make_excerpt, parse_tags,
+)
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        cls.other = User.objects.create_user('writer', 'writer@example.com', 'password')
+        cls.category = Category.objects.create(name='技术', is_predefined=True)
+        cls.post = Post.objects.create(title='文章', content='正文', author=cls.user, category=cls.category)
+        cls.first = Comment.objects.create(post=cls.post, author=cls.user, content='一楼')
+        cls.second = Comment.objects.create(post=cls.post, author=cls.other, content='二楼')
+        cls.reply = Comment.objects.create(post=cls.post, author=cls.other, content='回复一楼', parent=cls.first)
+        cls.nested = Comment.objects.create(post=cls.post, author=cls.user, content='回复回复', parent=cls.reply)
+
+    def add_replies(self, count):
+        parent = self.nested
+        for i in range(count):
+            parent = Comment.objects.create(post=self.post, author=self.other, content=f'第 {i} 层', parent=parent)
+
+    def test_replies_grouped_under_top_level_comment(self):
+        self.assertEqual(self.nested.root_id, self.first.pk)
+        with self.assertNumQueries(1):
+            parents, replies = load_comment_thread(self.post)
+            # 模板会访问的作者与被回复者的作者都已随同一次查询取出
+            names = [(reply.author.username, reply.parent.author.username) for reply in replies[self.first.pk]]
+        self.assertEqual(parents, [self.second, self.first])
+        self.assertEqual(replies[self.first.pk], [self.reply, self.nested])
+        self.assertEqual(replies[self.second.pk], [])
+        self.assertEqual(names, [('writer', 'reader'), ('reader', 'writer')])
+
+    def test_post_detail_queries_do_not_grow_with_comments(self):
+        self.client.force_login(self.user)
+        url = reverse('post_detail', args=[self.post.pk])
+
+        def count_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.assertContains(self.client.get(url), '回复回复')
+            return len(queries)
+
+        before = count_queries()
+        self.add_replies(20)
+        self.assertEqual(count_queries(), before)
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class PostExcerptTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.category = Category.objects.create(name='技术', is_predefined=True)
+
+    def create_posts(self, count):
+        for i in range(count):
+            author = User.objects.create_user(f'author{Post.objects.count()}')
+            category = Category.objects.create(name=f'分类 {Post.objects.count()}')
+            Post.objects.create(title=f'文章 {i}', content='很长的正文' * 1000, author=author, category=category)
+
+    def test_excerpt_follows_content(self):
+        post = Post.objects.create(title='文章', content='正文' * 100, author=self.admin, category=self.category)
+        self.assertEqual(post.excerpt, make_excerpt(post.content))
+        self.assertEqual(len(post.excerpt), EXCERPT_LENGTH)
+        post.content = '新的正文'
+        post.save(update_fields=['content'])
+        self.assertEqual(Post.objects.get(pk=post.pk).excerpt, '新的正文')
+
+    def test_list_pages_skip_content_and_run_fixed_queries(self):
+        self.client.force_login(self.admin)
+
+        def list_queries(url):
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            selects = [query['sql'] for query in queries if query['sql'].startswith('SELECT') and '"blog_post"' in query['sql']]
+            for sql in selects:
+                self.assertNotIn('"blog_post"."content"', sql)
+            return len(queries)
+
+        urls = [reverse('home'), reverse('admin_post_list')]
+        self.create_posts(1)
+        before = [list_queries(url) for url in urls]
+        # 每篇文章的作者与分类都不同，逐条加载关联对象时查询数会随之增长
+        self.create_posts(5)
+        self.assertEqual([list_queries(url) for url in urls], before)
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        category = Category.objects.create(name='技术', is_predefined=True)
+        for title, (year, month, day) in [
+            ('三月上旬', (2024, 3, 1)), ('三月下旬', (2024, 3, 31)), ('五月', (2024, 5, 15)), ('去年十二月', (2023, 12, 31)),
+        ]:
+            Post.objects.create(
+                title=title, content='正文', author=user, category=category,
+                created_date=timezone.make_aware(datetime(year, month, day, 23, 30)),
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_index_counts_posts_per_month_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('archive'))
+        summary = [
+            (year['year'], year['total'], [(bucket['month'].month, bucket['count']) for bucket in year['months']])
+            for year in response.context['years']
+        ]
+        self.assertEqual(summary, [(2024, 3, [(5, 1), (3, 2)]), (2023, 1, [(12, 1)])])
+        self.assertEqual(len([query for query in queries if '"blog_post"' in query['sql']]), 1)
+
+    def test_month_page_lists_only_that_month(self):
+        response = self.client.get(reverse('archive_month', args=[2024, 3]))
+        self.assertEqual([post.title for post in response.context['posts']], ['三月下旬', '三月上旬'])
+        self.assertEqual(self.client.get(reverse('archive_month', args=[2023, 12])).context['posts'][0].title, '去年十二月')
+        self.assertEqual(self.client.get(reverse('archive_month', args=[2024, 13])).status_code, 404)
+
+    def test_full_listing_is_streamed(self):
+        response = self.client.get(reverse('archive_all'))
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        positions = [content.index(title) for title in ('五月', '三月下旬', '三月上旬', '去年十二月')]
+        self.assertEqual(positions, sorted(positions))
+        self.assertTrue(content.rstrip().endswith('</html>'))
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        cls.category = Category.objects.create(name='技术', is_predefined=True)
+        cls.in_body = Post.objects.create(
+            title='周末随笔', content='今天整理了数据库索引的设计笔记。', author=cls.user, category=cls.category,
+        )
+        cls.in_title = Post.objects.create(
+            title='数据库索引入门', content='从最简单的例子讲起。', author=cls.user, category=cls.category,
+        )
+        Post.objects.create(title='Django tips', content='Caching and pagination.', author=cls.user, category=cls.category)
+
+    def results(self, query):
+        response = self.client.get(reverse('search'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        page_obj = response.context['page_obj']
+        return [post.title for post in page_obj] if page_obj else []
+
+    def test_cjk_bigram_tokens(self):
+        self.assertEqual(tokenize('数据库 Django'), ['数据', '据库', '库', 'django'])
+        self.assertEqual(tokenize('数据库', for_query=True), ['数据', '据库'])
+
+    def test_ranked_results(self):
+        # 标题命中的权重更高；词语中间的片段与单个汉字同样能命中
+        self.assertEqual(self.results('数据库索引'), ['数据库索引入门', '周末随笔'])
+        self.assertEqual(self.results('据库'), ['数据库索引入门', '周末随笔'])
+        self.assertEqual(self.results('引'), ['数据库索引入门', '周末随笔'])
+        self.assertEqual(self.results('caching'), ['Django tips'])
+        self.assertEqual(self.results('数据库 不存在'), [])
+        self.assertEqual(self.results(''), [])
+
+    def test_index_follows_saves_and_rebuild(self):
+        self.in_body.content = '今天去爬山了。'
+        self.in_body.save()
+        self.assertEqual(self.results('数据库'), ['数据库索引入门'])
+        self.in_title.delete()
+        self.assertEqual(self.results('数据库'), [])
+        self.assertEqual(self.results('爬山'), ['周末随笔'])
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(self.results('爬山'), ['周末随笔'])
+        self.assertEqual(self.results('caching'), ['Django tips'])
+
+    def test_migration_indexes_existing_posts(self):
+        migration = importlib.import_module('blog.migrations.0011_post_search_index')
+        apps = MigrationExecutor(connection).loader.project_state(('blog', '0011_post_search_index')).apps
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM blog_post_fts' if connection.vendor == 'sqlite' else 'DELETE FROM blog_post_search')
+        self.assertEqual(self.results('数据库'), [])
+        # 升级时已有的文章由迁移分批写入索引
+        with mock.patch.object(migration, 'BATCH_SIZE', 2):
+            migration.index_existing_posts(apps, SimpleNamespace(connection=connection))
+        self.assertEqual(self.results('数据库索引'), ['数据库索引入门', '周末随笔'])
+        self.assertEqual(self.results('caching'), ['Django tips'])
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class TagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('writer', 'writer@example.com', 'password')
+        cls.category = Category.objects.create(name='技术', is_predefined=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def counts(self):
+        return dict(Tag.objects.values_list('name', 'post_count'))
+
+    def test_parse_tags_accepts_all_separators(self):
+        self.assertEqual(parse_tags('Django, 缓存，索引、Django,, '), ['Django', '缓存', '索引'])
+        self.assertEqual(parse_tags(None), [])
+
+    def test_counts_follow_post_writes(self):
+        first = Post.objects.create(title='一', content='正文', author=self.user, category=self.category, tags='Django，缓存')
+        second = Post.objects.create(title='二', content='正文', author=self.user, category=self.category, tags='Django')
+        self.assertEqual(self.counts(), {'Django': 2, '缓存': 1})
+        first.tags = '缓存、索引'
+        first.save()
+        self.assertEqual(self.counts(), {'Django': 1, '缓存': 1, '索引': 1})
+        second.delete()
+        self.assertEqual(self.counts(), {'Django': 0, '缓存': 1, '索引': 1})
+        self.assertEqual(sorted(first.tag_set.values_list('name', flat=True)), ['索引', '缓存'])
+
+    def test_drifted_counts_are_clamped_at_zero(self):
+        post = Post.objects.create(title='一', content='正文', author=self.user, category=self.category, tags='Django，缓存')
+        Tag.objects.update(post_count=0)
+        post.tags = 'Django'
+        post.save()
+        post.delete()
+        self.assertEqual(self.counts(), {'Django': 0, '缓存': 0})
+
+    def test_tag_detail_lists_tagged_posts(self):
+        Post.objects.create(title='带标签', content='正文', author=self.user, category=self.category, tags='数据库')
+        Post.objects.create(title='无标签', content='正文', author=self.user, category=self.category)
+        tag = Tag.objects.get(name='数据库')
+        response = self.client.get(tag.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post.title for post in response.context['page_obj']], ['带标签'])
+        self.assertEqual(self.client.get(reverse('tag_detail', args=['missing'])).status_code, 404)
+
+    def test_tag_detail_follows_post_dates(self):
+        now = timezone.now()
+        old = Post.objects.create(title='旧文', content='正文', author=self.user, category=self.category, tags='数据库', created_date=now - timedelta(days=2))
+        Post.objects.create(title='新文', content='正文', author=self.user, category=self.category, tags='数据库', created_date=now - timedelta(days=1))
+        url = Tag.objects.get(name='数据库').get_absolute_url()
+        self.assertEqual([post.title for post in self.client.get(url).context['page_obj']], ['新文', '旧文'])
+        # 修改发布时间后关联行中的冗余副本同步更新
+        old.created_date = now
+        old.save()
+        self.assertEqual([post.title for post in self.client.get(url).context['page_obj']], ['旧文', '新文'])
+
+    def test_tag_cloud_is_cached_until_tags_change(self):
+        Post.objects.create(title='一', content='正文', author=self.user, category=self.category, tags='Django')
+        self.assertEqual([tag['name'] for tag in tag_cloud()['tags']], ['Django'])
+        with self.assertNumQueries(0):
+            tag_cloud()
+        Post.objects.create(title='二', content='正文', author=self.user, category=self.category, tags='缓存')
+        self.assertEqual([tag['name'] for tag in tag_cloud()['tags']], ['Django', '缓存'])
+
+    def test_post_new_accepts_comma_separated_tags(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('post_new'), {
+            'title': '新文章', 'content': '正文', 'category': self.category.pk, 'tags': 'Django，缓存、Django',
+        })
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        post = Post.objects.get(title='新文章')
+        self.assertEqual(sorted(post.tag_set.values_list('name', flat=True)), ['Django', '缓存'])
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class CategoryFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('writer', 'writer@example.com', 'password')
+        cls.tech = Category.objects.create(name='技术', is_predefined=True)
+        cls.life = Category.objects.create(name='生活', is_predefined=True)
+        Post.objects.create(title='技术文章', content='正文', author=cls.user, category=cls.tech)
+        Post.objects.create(title='生活文章', content='正文', author=cls.user, category=cls.life)
+
+    def setUp(self):
+        cache.clear()
+
+    def home_titles(self, **params):
+        response = self.client.get(reverse('home'), params)
+        self.assertEqual(response.status_code, 200)
+        return [post.title for post in response.context['page_obj']]
+
+    def category_counts(self):
+        response = self.client.get(reverse('categories'))
+        self.assertEqual(response.status_code, 200)
+        return {category['name']: category['post_count'] for category in response.context['page_obj']}
+
+    def test_home_filters_by_category(self):
+        self.assertEqual(self.home_titles(category=self.tech.pk), ['技术文章'])
+        self.assertEqual(self.home_titles(category='abc'), ['生活文章', '技术文章'])
+        self.assertEqual(self.client.get(reverse('home'), {'category': 999}).status_code, 404)
+
+    def test_counts_come_from_one_query(self):
+        # 大量用户自建分类也只需一次聚合查询
+        for i in range(40):
+            Post.objects.create(
+                title=f'自建 {i}', content='正文', author=self.user,
+                category=Category.objects.create(name=f'自建分类 {i}'),
+            )
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            counts = self.category_counts()
+        self.assertEqual(len(counts), 30)
+        self.assertEqual(counts['技术'], 1)
+        self.assertEqual(len([query for query in queries if '"blog_category"' in query['sql']]), 1)
+
+    def test_counts_follow_post_and_category_writes(self):
+        self.assertEqual(self.category_counts(), {'技术': 1, '生活': 1})
+        Post.objects.create(title='又一篇', content='正文', author=self.user, category=self.tech)
+        self.assertEqual(self.category_counts(), {'技术': 2, '生活': 1})
+        self.life.name = '日常'
+        self.life.save()
+        self.assertEqual(self.category_counts(), {'技术': 2, '日常': 1})
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('writer', 'writer@example.com', 'password')
+        cls.category = Category.objects.create(name='技术', is_predefined=True)
+        start = timezone.now()
+        # 每三篇文章的发布时间相同，翻页时需要依靠 id 区分
+        for i in range(23):
+            Post.objects.create(
+                title=f'文章 {i}', content='正文', author=cls.user, category=cls.category,
+                created_date=start - timedelta(minutes=i // 3),
+            )
+        cls.expected = list(Post.objects.order_by('-created_date', '-pk').values_list('pk', flat=True))
+
+    def setUp(self):
+        cache.clear()
+
+    def paginator(self):
+        return KeysetPaginator(Post.objects.all(), 5)
+
+    def ids(self, page):
+        return [post.pk for post in page]
+
+    def test_walk_forward_and_back(self):
+        page = self.paginator().page('')
+        pages = [page]
+        while page.has_next():
+            page = self.paginator().page(page.next_cursor)
+            pages.append(page)
+        self.assertEqual([page.number for page in pages], [1, 2, 3, 4, 5])
+        self.assertEqual([pk for page in pages for pk in self.ids(page)], self.expected)
+
+        backwards = [page]
+        while page.has_previous():
+            page = self.paginator().page(page.previous_cursor)
+            backwards.append(page)
+        self.assertEqual([self.ids(page) for page in backwards[::-1]], [self.ids(page) for page in pages])
+        self.assertEqual(backwards[-1].number, 1)
+
+    def test_window_and_last_page(self):
+        first = self.paginator().page('')
+        self.assertEqual([number for number, cursor in first.page_window], [1, 2, 3, None, 5])
+        third = self.paginator().page(first.cursor_for(3))
+        self.assertEqual(self.ids(third), self.expected[10:15])
+        # 末页按总数取余数篇，与向后翻页得到的末页相同，再往前翻与前一页不重复
+        last = self.paginator().page(first.last_cursor)
+        self.assertEqual((last.number, self.ids(last)), (5, self.expected[20:]))
+        self.assertFalse(last.has_next())
+        previous = self.paginator().page(last.previous_cursor)
+        self.assertEqual((previous.number, self.ids(previous)), (4, self.expected[15:20]))
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        first = self.ids(self.paginator().page(''))
+        for token in ('garbage', encode_cursor(['n']), encode_cursor({'d': 'n', 'k': ['x', 1]}),
+                      encode_cursor({'d': 'n', 'k': None, 's': 99, 'n': 50})):
+            page = self.paginator().page(token)
+            self.assertEqual((page.number, self.ids(page)), (1, first))
+
+    def test_deep_page_costs_one_query_and_count_is_cached(self):
+        page = self.paginator().page(self.paginator().page('').next_cursor)
+        with self.assertNumQueries(1):
+            page = self.paginator().page(page.next_cursor)
+            # 生成游标与判断是否还有下一页都不需要再查询
+            self.assertTrue(page.has_next())
+            self.assertTrue(page.next_cursor)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.paginator().num_pages, 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.paginator().num_pages, 5)
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class CommentModerationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.reader = User.objects.create_user('reader', 'reader@example.com', 'password')
+        cls.writer = User.objects.create_user('writer', 'writer@example.com', 'password')
+        category = Category.objects.create(name='技术', is_predefined=True)
+        cls.post = Post.objects.create(title='文章', content='正文', author=cls.admin, category=category)
+        cls.first = Comment.objects.create(post=cls.post, author=cls.reader, content='一楼')
+        cls.reply = Comment.objects.create(post=cls.post, author=cls.writer, content='回复一楼', parent=cls.first)
+        cls.second = Comment.objects.create(post=cls.post, author=cls.writer, content='二楼')
+        reconcile_comment_counts()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def bulk_delete(self, **data):
+        return self.client.post(reverse('admin_comment_bulk_delete'), data)
+
+    def test_delete_selected_removes_replies_and_counts(self):
+        self.bulk_delete(comment_ids=[self.first.pk])
+        self.assertEqual(list(Comment.objects.values_list('pk', flat=True)), [self.second.pk])
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comment_count, 1)
+
+    def test_select_all_deletes_only_matching_comments(self):
+        self.bulk_delete(select_all_matching='1', next_query='author=writer')
+        self.assertEqual(list(Comment.objects.values_list('pk', flat=True)), [self.first.pk])
+        self.assertEqual(Comment.objects.get(pk=self.first.pk).reply_count, 0)
+
+    def test_select_all_without_valid_filters_deletes_nothing(self):
+        # 无效或全部为空的筛选条件不会退化为删除全部评论
+        for next_query in ('', 'post=abc', 'post=&author=&date_from=&date_to=', 'date_from=2026-13-01'):
+            self.bulk_delete(select_all_matching='1', next_query=next_query)
+            self.assertEqual(Comment.objects.count(), 3, next_query)
+        self.assertNotContains(self.client.get(reverse('admin_comment_list')), 'name="select_all_matching"')
+        self.assertContains(self.client.get(reverse('admin_comment_list'), {'author': 'writer'}), 'name="select_all_matching"')
+
+    def test_date_range_is_half_open_on_created_at(self):
+        tz = timezone.get_current_timezone()
+        Comment.objects.filter(pk=self.first.pk).update(created_at=datetime(2026, 3, 1, 23, 59, 59, tzinfo=tz))
+        Comment.objects.filter(pk=self.second.pk).update(created_at=datetime(2026, 3, 2, tzinfo=tz))
+
+        def filtered(**data):
+            form = CommentFilterForm(data)
+            queryset = form.filter(Comment.objects.filter(parent__isnull=True))
+            # 直接比较 created_at 列，不对其做日期转换，才能使用 (created_at, id) 索引
+            lookups = {(child.lhs.target.name, child.lookup_name) for child in queryset.query.where.children}
+            self.assertTrue(lookups <= {('parent', 'isnull'), ('created_at', 'gte'), ('created_at', 'lt')}, lookups)
+            return list(queryset.values_list('pk', flat=True))
+
+        self.assertEqual(filtered(date_to='2026-03-01'), [self.first.pk])
+        self.assertEqual(filtered(date_from='2026-03-02'), [self.second.pk])
+        self.assertEqual(filtered(date_from='2026-03-01', date_to='2026-03-01'), [self.first.pk])
+
+
+class ImportPostsTests(TestCase):
+    def write_source(self, records):
+        handle, path = tempfile.mkstemp(suffix='.jsonl')
+        with os.fdopen(handle, 'w', encoding='utf-8') as source:
+            for record in records:
+                source.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.addCleanup(os.remove, path)
+        return path
+
+    def import_posts(self, path, **options):
+        call_command('import_posts', path, create_authors=True, stdout=io.StringIO(), stderr=io.StringIO(), **options)
+
+    def test_long_names_are_truncated_consistently(self):
+        category, author = '很长的分类' * 30, 'author' * 40
+        path = self.write_source([
+            {'title': f'文章 {i}', 'content': '正文', 'author': author, 'category': category} for i in range(3)
+        ])
+        # 每批一篇，第二批起从缓存的映射中查找截断后的名称
+        self.import_posts(path, batch_size=1)
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(list(Category.objects.values_list('name', flat=True)), [category[:100]])
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), [author[:150]])
+        self.assertEqual(set(Post.objects.values_list('category__name', 'author__username')), {(category[:100], author[:150])})
+
+    def test_comments_keep_original_timestamps(self):
+        path = self.write_source([{
+            'title': '旧文章', 'content': '正文', 'author': 'reader', 'tags': ['Django', '缓存'],
+            'created_date': '2020-01-01T08:00:00+08:00',
+            'comments': [{
+                'author': 'writer', 'content': '一楼', 'created_at': '2020-01-02T08:00:00+08:00',
+                'replies': [{'author': 'reader', 'content': '回复', 'created_at': '2020-01-03T08:00:00+08:00'}],
+            }],
+        }])
+        self.import_posts(path)
+        post = Post.objects.get()
+        first, reply = Comment.objects.order_by('pk')
+        self.assertEqual(first.created_at, datetime(2020, 1, 2, 8, tzinfo=timezone.get_fixed_timezone(480)))
+        self.assertEqual(reply.created_at, datetime(2020, 1, 3, 8, tzinfo=timezone.get_fixed_timezone(480)))
+        self.assertEqual((reply.parent_id, reply.root_id), (first.pk, first.pk))
+        self.assertEqual((post.comment_count, Comment.objects.get(pk=first.pk).reply_count), (2, 1))
+        self.assertEqual(dict(Tag.objects.values_list('name', 'post_count')), {'Django': 1, '缓存': 1})
+        # 普通创建的评论仍以当前时间作为创建时间
+        comment = Comment.objects.create(post=post, author=post.author, content='新评论')
+        self.assertLess(timezone.now() - comment.created_at, timedelta(minutes=1))
+
+    def test_offset_resumes_import(self):
+        path = self.write_source([{'title': f'文章 {i}', 'content': '正文', 'author': 'reader'} for i in range(5)])
+        self.import_posts(path, offset=3)
+        self.assertEqual(sorted(Post.objects.values_list('title', flat=True)), ['文章 3', '文章 4'])
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.reader = User.objects.create_user('reader', 'reader@example.com', 'password')
+        category = Category.objects.create(name='技术', is_predefined=True)
+        for i in range(3):
+            post = Post.objects.create(title=f'文章 {i}', content='正文', author=cls.admin, category=category, tags='Django')
+            Comment.objects.create(post=post, author=cls.reader, content=f'评论 {i}')
+        WebsiteNavigation.objects.create(title='站点', url='https://example.com', description='描述')
+
+    def parse(self, data):
+        return [json.loads(line) for line in data.decode().splitlines()]
+
+    def test_records_are_grouped_by_type_in_chunks(self):
+        chunks = list(export_stream(chunk_size=2))
+        records = self.parse(b''.join(chunks))
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(
+            [record['type'] for record in records],
+            ['category'] + ['post'] * 3 + ['comment'] * 3 + ['website_navigation'],
+        )
+        self.assertEqual(records[1]['author_username'], 'admin')
+        self.assertEqual(records[4]['author_username'], 'reader')
+
+    def test_command_writes_gzip_file(self):
+        handle, path = tempfile.mkstemp(suffix='.ndjson.gz')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        call_command('export_blog', output=path, types='post,comment', stderr=io.StringIO())
+        with gzip.open(path) as source:
+            self.assertEqual(len(self.parse(source.read())), 6)
+        with self.assertRaises(CommandError):
+            call_command('export_blog', types='post,unknown', stderr=io.StringIO())
+
+    def test_download_is_streamed_for_superusers_only(self):
+        self.client.force_login(self.reader)
+        self.assertNotIsInstance(self.client.get(reverse('admin_export_data')), StreamingHttpResponse)
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin_export_data'), {'gzip': '1'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.ndjson.gz', response['Content-Disposition'])
+        records = self.parse(gzip.decompress(b''.join(response.streaming_content)))
+        self.assertEqual(len(records), 8)
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+    def photo(self, size=(1200, 600)):
+        # 带 EXIF 的横向照片，方向标记为需要顺时针旋转 90 度
+        image = Image.new('RGB', size, (200, 80, 40))
+        exif = image.getexif()
+        exif[0x0112] = 6
+        exif[0x010F] = 'Camera'
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', exif=exif)
+        return buffer.getvalue()
+
+    def wait_for_workers(self):
+        executor, images._executor = images.get_executor(), None
+        executor.shutdown(wait=True)
+
+    def test_derivatives_fix_orientation_and_strip_exif(self):
+        name = default_storage.save('anime_images/photo.jpg', ContentFile(self.photo()))
+        images.generate_derivatives(name, 'anime')
+        for width in images.IMAGE_PRESETS['anime']:
+            for fmt in ('webp', 'jpg'):
+                self.assertTrue(default_storage.exists(images.derivative_name(name, width, fmt)))
+        with default_storage.open(images.derivative_name(name, 320, 'jpg')) as source:
+            derivative = Image.open(source)
+            self.assertEqual(derivative.size, (320, 640))
+            self.assertEqual(dict(derivative.getexif()), {})
+        # 原图比最大宽度窄时按原尺寸输出，不放大
+        with default_storage.open(images.derivative_name(name, 960, 'webp')) as source:
+            self.assertEqual(Image.open(source).size, (600, 1200))
+
+    def test_responsive_image_switches_to_picture_when_ready(self):
+        name = default_storage.save('anime_images/photo.jpg', ContentFile(self.photo()))
+        html = responsive_image(name, 'anime', alt='封面')
+        self.assertTrue(html.startswith('<img src="/media/anime_images/photo.jpg"'))
+        self.assertIn('loading="lazy"', html)
+        images.generate_derivatives(name, 'anime')
+        html = responsive_image(name, 'anime', alt='封面', sizes='30vw')
+        self.assertIn('<source type="image/webp" srcset="/media/derivatives/anime_images/photo/w320.webp 320w', html)
+        self.assertIn('sizes="30vw"', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertHTMLEqual(responsive_image('', 'anime', fallback='/static/images/icon.png'),
+                         '<img src="/static/images/icon.png" alt="" loading="lazy" decoding="async">')
+
+    def test_upload_generates_derivatives_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            anime = AnimeNavigation.objects.create(
+                title='新番', url='https://example.com', image=SimpleUploadedFile('cover.jpg', self.photo((800, 400))),
+            )
+            # 事务提交前不生成
+            self.assertFalse(images.derivatives_ready(anime.image.name, 'anime'))
+        cache.clear()
+        self.wait_for_workers()
+        self.assertTrue(images.derivatives_ready(anime.image.name, 'anime'))
+        anime.delete()
+        self.assertFalse(default_storage.exists(images.derivative_name(anime.image.name, 320, 'jpg')))
+
+
+# 模板中以字面量引用的打包静态文件
+STATIC_REFERENCE_RE = re.compile(r"{%\s*(?:static|static_picture|static_image_set)\s+['\"]([^'\"]+)['\"]")
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class StaticImageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_template_static_references_exist(self):
+        referenced = set()
+        for template_dir in engines['django'].template_dirs:
+            for root, _, names in os.walk(template_dir):
+                for name in names:
+                    if name.endswith('.html'):
+                        with open(os.path.join(root, name), encoding='utf-8') as source:
+                            referenced.update(STATIC_REFERENCE_RE.findall(source.read()))
+        self.assertIn('images/background.png', referenced)
+        missing = [path for path in referenced if not path.startswith(('http:', 'https:')) and not finders.find(path)]
+        self.assertEqual(missing, [])
+
+    def test_sidebar_uses_bundled_covers(self):
+        AnimeNavigation.objects.create(title='海贼王', url='https://example.com/1')
+        AnimeNavigation.objects.create(title='没有封面', url='https://example.com/2')
+        content = self.client.get(reverse('home')).content.decode()
+        self.assertIn(f'src="{staticfiles_storage.url("images/海贼王.png")}"', content)
+        self.assertIn(f'src="{staticfiles_storage.url("images/icon.png")}"', content)
+        self.assertIn(f'src="{staticfiles_storage.url("images/background.png")}"', content)
+        self.assertNotIn('/static/images/placeholder.jpg', content)
+        self.assertEqual(bundled_image('../icon'), 'images/icon.png')
+
+    def test_collectstatic_emits_hashed_variants(self):
+        source_dir, static_root = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source_dir)
+        self.addCleanup(shutil.rmtree, static_root)
+        os.makedirs(os.path.join(source_dir, 'images'))
+        # 随机噪点图片，压缩后仍大于生成变体的最小体积
+        Image.frombytes('RGB', (800, 400), os.urandom(800 * 400 * 3)).save(os.path.join(source_dir, 'images', 'banner.png'))
+        with override_settings(
+            STATICFILES_STORAGE='blog.storage.OptimizedImageStaticFilesStorage',
+            STATICFILES_DIRS=[source_dir], STATIC_ROOT=static_root, INSTALLED_APPS=['django.contrib.staticfiles'],
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            info = staticfiles_storage.image_variants['images/banner.png']
+            self.assertEqual((info['width'], info['height'], info['widths']), (800, 400, [640, 800]))
+            self.assertEqual(info['formats'][-2:], ['webp', 'png'])
+            for width in info['widths']:
+                for fmt in info['formats']:
+                    # 变体同样经过哈希命名
+                    hashed = staticfiles_storage.stored_name(f'images/banner.w{width}.{fmt}')
+                    self.assertRegex(hashed, rf'^images/banner\.w{width}\.[0-9a-f]{{12}}\.{fmt}$')
+            picture = static_picture('images/banner.png', alt='横幅')
+            self.assertIn('<source type="image/webp" srcset="/static/images/banner.w640.', picture)
+            self.assertIn('width="800"', picture)
+            css = static_image_set('images/banner.png')
+            self.assertTrue(css.startswith('image-set(url("/static/images/banner.w800.'), css)
+            self.assertIn('type("image/png")', css)
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class UserDisplayTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def profile_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('about'))
+        return response.content.decode(), [query for query in queries if '"blog_userprofile"' in query['sql']]
+
+    def test_profile_is_read_once_then_cached(self):
+        content, queries = self.profile_queries()
+        self.assertEqual(len(queries), 1)
+        self.assertIn(f'src="{staticfiles_storage.url("images/default.png")}"', content)
+        content, queries = self.profile_queries()
+        self.assertEqual(queries, [])
+        self.assertIn('<span>reader</span>', content)
+
+    def test_profile_and_username_changes_invalidate(self):
+        self.profile_queries()
+        UserProfile.objects.create(user=self.user, profile_image='profile_images/avatar.jpg')
+        content, queries = self.profile_queries()
+        self.assertEqual(len(queries), 1)
+        self.assertIn('src="/media/profile_images/avatar.jpg"', content)
+        self.user.username = 'renamed'
+        self.user.save()
+        content, _ = self.profile_queries()
+        self.assertIn('<span>renamed</span>', content)
+
+    def test_anonymous_users_get_no_display_data(self):
+        self.client.logout()
+        response = self.client.get(reverse('about'))
+        self.assertIsNone(response.context['user_display'])
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.category = Category.objects.create(name='技术', is_predefined=True)
+        cls.post = Post.objects.create(title='文章', content='正文', author=cls.admin, category=cls.category)
+        cls.comment = Comment.objects.create(post=cls.post, author=cls.admin, content='一楼')
+        reconcile_comment_counts()
+
+    def setUp(self):
+        cache.clear()
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_unchanged_pages_return_304_without_rendering(self):
+        post_url = reverse('post_detail', args=[self.post.pk])
+        for url in (reverse('home'), post_url, reverse('archive'), reverse('categories')):
+            etag = self.etag(url)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response.content, b'')
+            self.assertFalse([query for query in queries if '"blog_comment"' in query['sql']], url)
+        # 详情页同时提供 Last-Modified
+        last_modified = self.client.get(post_url)['Last-Modified']
+        self.assertEqual(self.client.get(post_url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_comment_writes_change_post_validators(self):
+        url = reverse('post_detail', args=[self.post.pk])
+        etag = self.etag(url)
+        self.client.force_login(self.admin)
+        self.client.post(reverse('add_comment', args=[self.post.pk]), {'content': '二楼'})
+        self.client.logout()
+        changed = self.etag(url)
+        self.assertNotEqual(changed, etag)
+        self.client.force_login(self.admin)
+        self.client.post(reverse('admin_comment_delete', args=[self.comment.pk]))
+        self.client.logout()
+        self.assertNotEqual(self.etag(url), changed)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comment_count, 1)
+
+    def test_deleting_post_cascades_comments_in_constant_queries(self):
+        def delete_queries(comments):
+            post = Post.objects.create(title='待删除', content='正文', author=self.admin, category=self.category)
+            parent = None
+            for i in range(comments):
+                parent = Comment.objects.create(post=post, author=self.admin, content=f'第 {i} 楼', parent=parent if i % 2 else None)
+            with CaptureQueriesContext(connection) as queries:
+                post.delete()
+            self.assertFalse(Comment.objects.filter(post_id=post.pk).exists())
+            return len(queries)
+
+        self.assertEqual(delete_queries(30), delete_queries(3))
+
+    def test_django_admin_keeps_counts_and_validators(self):
+        url = reverse('post_detail', args=[self.post.pk])
+        etag = self.etag(url)
+        admin_client = Client()
+        admin_client.force_login(self.admin)
+        admin_client.post(reverse('admin:blog_comment_add'), {
+            'post': self.post.pk, 'author': self.admin.pk, 'content': '后台添加', 'parent': '', 'root': '',
+        })
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comment_count, 2)
+        self.assertNotEqual(self.etag(url), etag)
+        admin_client.post(reverse('admin:blog_comment_changelist'), {
+            'action': 'delete_selected', 'post': 'yes', '_selected_action': list(Comment.objects.values_list('pk', flat=True)),
+        })
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comment_count, 0)
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class PageCacheEvictionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='password')
+        cls.category = Category.objects.create(name='技术', is_predefined=True)
+        # 首页每页 6 篇，最早的两篇在第二页
+        cls.posts = [
+            Post.objects.create(title=f'文章{i}', content='正文', author=cls.author, category=cls.category, tags='python')
+            for i in range(8)
+        ]
+        cls.oldest, cls.newest = cls.posts[0], cls.posts[-1]
+
+    def setUp(self):
+        cache.clear()
+        self.commenter = Client()
+        self.commenter.force_login(self.author)
+
+    def cache_status(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response['X-Page-Cache']
+
+    def assertEvicted(self, urls, write):
+        for url in urls:
+            self.assertEqual(self.cache_status(url), 'miss', url)
+            self.assertEqual(self.cache_status(url), 'hit', url)
+        write()
+        for url in urls:
+            self.assertEqual(self.cache_status(url), 'miss', url)
+
+    def comment_on(self, post):
+        self.commenter.post(reverse('add_comment', args=[post.pk]), {'content': '评论'})
+
+    def test_comment_evicts_only_pages_showing_the_post(self):
+        home = reverse('home')
+        other_detail = reverse('post_detail', args=[self.newest.pk])
+        self.cache_status(home)
+        self.cache_status(other_detail)
+        self.assertEvicted([reverse('post_detail', args=[self.oldest.pk])], lambda: self.comment_on(self.oldest))
+        # 首页第一页与其他文章的详情页没有显示这篇文章
+        self.assertEqual(self.cache_status(home), 'hit')
+        self.assertEqual(self.cache_status(other_detail), 'hit')
+        self.comment_on(self.newest)
+        self.assertEqual(self.cache_status(home), 'miss')
+
+    def test_comment_evicts_comment_count_listing(self):
+        self.assertEvicted([reverse('home') + '?sort=comments'], lambda: self.comment_on(self.oldest))
+
+    def test_post_save_keeps_other_detail_pages(self):
+        other_detail = reverse('post_detail', args=[self.oldest.pk])
+        self.cache_status(other_detail)
+        self.assertEvicted([reverse('home'), reverse('post_detail', args=[self.newest.pk])],
+                           lambda: Post.objects.get(pk=self.newest.pk).save())
+        self.assertEqual(self.cache_status(other_detail), 'hit')
+
+    def test_category_rename_evicts_pages_showing_category_name(self):
+        def rename():
+            self.category.name = '编程'
+            self.category.save()
+
+        urls = [reverse('post_detail', args=[self.oldest.pk]), reverse('tag_detail', args=['python']), reverse('categories')]
+        self.assertEvicted(urls, rename)
+        self.assertContains(self.client.get(urls[0]), '编程')
+        self.assertContains(self.client.get(urls[1]), '编程')
+
+    def test_username_change_evicts_author_pages(self):
+        def rename():
+            self.author.username = 'writer'
+            self.author.save()
+
+        urls = [reverse('home'), reverse('post_detail', args=[self.newest.pk])]
+        self.assertEvicted(urls, rename)
+        self.assertContains(self.client.get(urls[1]), 'writer')
+
+    def test_login_does_not_evict_author_pages(self):
+        url = reverse('post_detail', args=[self.newest.pk])
+        self.cache_status(url)
+        Client().login(username='author', password='password')
+        self.assertEqual(self.cache_status(url), 'hit')
+
+    def test_category_counts_follow_post_writes(self):
+        url = reverse('categories')
+        self.assertEqual(self.cache_status(url), 'miss')
+        self.assertEqual(self.cache_status(url), 'hit')
+        Post.objects.create(title='新文章', content='正文', author=self.author, category=self.category)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertEqual(response.context['page_obj'][0]['post_count'], 9)
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class NavigationSidebarTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', password='password')
+        for i in range(ANIME_NAVIGATION_SIZE + 1):
+            AnimeNavigation.objects.create(title=f'动漫{i}', url=f'https://example.com/anime/{i}')
+        cls.website = WebsiteNavigation.objects.create(title='文档站', url='https://example.com/docs', description='参考文档')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fragment_is_cached_and_shared_with_async_version(self):
+        html = async_to_sync(anavigation_sidebar)()
+        self.assertIn('文档站', html)
+        # 只显示最新的几条动漫导航
+        self.assertIn(f'动漫{ANIME_NAVIGATION_SIZE}', html)
+        self.assertNotIn('动漫0<', html)
+        with self.assertNumQueries(0):
+            self.assertEqual(navigation_sidebar(), html)
+            self.assertEqual(async_to_sync(anavigation_sidebar)(), html)
+
+    def test_navigation_writes_refresh_fragment(self):
+        self.assertIn('文档站', navigation_sidebar())
+        self.website.title = '开发者文档'
+        self.website.save()
+        self.assertIn('开发者文档', navigation_sidebar())
+        WebsiteNavigation.objects.create(title='镜像站', url='https://example.com/mirror', description='下载镜像')
+        self.assertIn('镜像站', navigation_sidebar())
+        AnimeNavigation.objects.order_by('-created_at').first().delete()
+        html = navigation_sidebar()
+        self.assertNotIn(f'动漫{ANIME_NAVIGATION_SIZE}<', html)
+        self.assertIn('动漫0', html)
+
+    def test_home_does_not_query_navigation_tables_when_cached(self):
+        # 登录用户绕过整页缓存，侧边栏仍走片段缓存
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(reverse('home')), '文档站')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertContains(self.client.get(reverse('home')), '文档站')
+        self.assertFalse([query for query in queries if 'navigation' in query['sql']])
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class CommentCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.category = Category.objects.create(name='技术', is_predefined=True)
+        cls.post = Post.objects.create(title='文章', content='正文', author=cls.user, category=cls.category)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def comment(self, parent=None):
+        data = {'content': '评论'}
+        if parent:
+            data['parent_id'] = parent.pk
+        self.client.post(reverse('add_comment', args=[self.post.pk]), data)
+        return Comment.objects.latest('id')
+
+    def counts(self, floor):
+        return Post.objects.get(pk=self.post.pk).comment_count, Comment.objects.get(pk=floor.pk).reply_count
+
+    def test_writes_maintain_counts(self):
+        floor = self.comment()
+        reply = self.comment(parent=floor)
+        # 回复的回复计入所在楼层
+        self.comment(parent=reply)
+        self.assertEqual(self.counts(floor), (3, 2))
+        self.client.post(reverse('admin_comment_delete', args=[reply.pk]))
+        self.assertEqual(self.counts(floor), (1, 0))
+        self.client.post(reverse('admin_comment_delete', args=[floor.pk]))
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comment_count, 0)
+
+    def test_stale_instances_do_not_overwrite_counts(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        self.comment()
+        self.comment()
+        stale.title = '改名'
+        stale.save(update_fields=['title'])
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comment_count, 2)
+
+    def test_decrements_are_clamped_at_zero(self):
+        apply_count_deltas(Post, 'comment_count', {self.post.pk: -5})
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comment_count, 0)
+
+    def test_reconcile_repairs_drift(self):
+        floor = self.comment()
+        self.comment(parent=floor)
+        Post.objects.filter(pk=self.post.pk).update(comment_count=7)
+        Comment.objects.filter(pk=floor.pk).update(reply_count=0)
+        self.assertEqual(reconcile_comment_counts(chunk_size=1), (1, 1))
+        self.assertEqual(self.counts(floor), (2, 1))
+        # 没有偏差时不改写任何行
+        self.assertEqual(reconcile_comment_counts(), (0, 0))
+        Post.objects.filter(pk=self.post.pk).update(comment_count=0)
+        out = io.StringIO()
+        call_command('reconcile_comment_counts', stdout=out)
+        self.assertIn('1 篇文章', out.getvalue())
+        self.assertEqual(self.counts(floor), (2, 1))
+
+    def test_listings_sort_by_comment_count(self):
+        posts = [self.post] + [
+            Post.objects.create(title=f'文章{i}', content='正文', author=self.user, category=self.category) for i in range(7)
+        ]
+        for post, count in zip(posts, [3, 0, 5, 1, 1, 0, 2, 4]):
+            Post.objects.filter(pk=post.pk).update(comment_count=count)
+        # 评论数相同的按 id 倒序
+        expected = [posts[i].pk for i in (2, 7, 0, 6, 4, 3, 5, 1)]
+        for url, per_page in ((reverse('admin_post_list'), 10), (reverse('home'), 6)):
+            page_obj = self.client.get(url, {'sort': 'comments'}).context['page_obj']
+            pks = [post.pk for post in page_obj]
+            if page_obj.has_next():
+                next_page = self.client.get(url, {'sort': 'comments', 'cursor': page_obj.next_cursor}).context['page_obj']
+                pks += [post.pk for post in next_page]
+            self.assertEqual(pks, expected, url)
+            self.assertEqual(len(page_obj), min(per_page, len(expected)))
+
+
+# 需要走索引的热点表；分类、标签等小表不做检查
+PLAN_CHECKED_TABLES = ('blog_post', 'blog_comment', 'blog_animenavigation', 'blog_websitenavigation')
+SQLITE_FULL_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)$')
+
+
+def sqlite_plan_problems(sql):
+    """EXPLAIN QUERY PLAN：不带索引的 SCAN 即全表扫描，USE TEMP B-TREE FOR ORDER BY 即额外排序。"""
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        details = [row[-1] for row in cursor.fetchall()]
+    problems = []
+    for detail in details:
+        match = SQLITE_FULL_SCAN_RE.match(detail)
+        if match and match.group(1) in PLAN_CHECKED_TABLES:
+            problems.append(detail)
+        elif 'TEMP B-TREE' in detail and 'ORDER BY' in detail:
+            problems.append(detail)
+    return problems
+
+
+def postgresql_plan_problems(sql):
+    """
+    EXPLAIN (FORMAT JSON)：关闭顺序扫描与排序后，计划中仍出现 Seq Scan 或 Sort 说明没有可用的索引。
+
+    测试数据量很小，不关闭时规划器本来就倾向于顺序扫描。
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute('SET LOCAL enable_sort = off')
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+        plan = cursor.fetchone()[0]
+        cursor.execute('RESET enable_seqscan')
+        cursor.execute('RESET enable_sort')
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    problems = []
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in PLAN_CHECKED_TABLES:
+            problems.append(f"Seq Scan on {node['Relation Name']}")
+        elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+            problems.append(f"{node['Node Type']} by {', '.join(node.get('Sort Key', []))}")
+        nodes.extend(node.get('Plans', []))
+    return problems
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class QueryPlanTests(TestCase):
+    """
+    对各视图实际执行的主要查询运行 EXPLAIN，出现全表扫描或额外排序（filesort）时失败。
+
+    以超级用户身份请求，绕过匿名整页缓存；每次请求前清空缓存，使导航、总数等缓存的查询也被执行。
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.category = Category.objects.create(name='技术', is_predefined=True)
+        now = timezone.now()
+        cls.posts = [
+            Post.objects.create(
+                title=f'文章 {i}', content='正文' * 20, author=cls.user, category=cls.category,
+                tags='Django, 性能', created_date=now - timedelta(days=i),
+            )
+            for i in range(15)
+        ]
+        post = cls.posts[0]
+        for i in range(3):
+            parent = Comment.objects.create(post=post, author=cls.user, content=f'评论 {i}')
+            Comment.objects.create(post=post, author=cls.user, content=f'回复 {i}', parent=parent)
+        for i in range(12):
+            AnimeNavigation.objects.create(title=f'动漫 {i}', url='https://example.com/')
+            WebsiteNavigation.objects.create(title=f'网站 {i}', url='https://example.com/', description='简介')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def plan_problems(self, sql):
+        if connection.vendor == 'postgresql':
+            return postgresql_plan_problems(sql)
+        if connection.vendor == 'sqlite':
+            return sqlite_plan_problems(sql)
+        self.skipTest(f'不支持检查 {connection.vendor} 的执行计划')
+
+    def assertIndexedQueries(self, url, next_page=False):
+        """请求 url（可选再翻到下一页），对涉及热点表的 SELECT 逐条检查执行计划。"""
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            if next_page:
+                cursor = response.context['page_obj'].next_cursor
+                self.assertTrue(cursor)
+                separator = '&' if '?' in url else '?'
+                self.assertEqual(self.client.get(f'{url}{separator}cursor={cursor}').status_code, 200)
+        checked = 0
+        for query in captured.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or not any(f'"{table}"' in sql for table in PLAN_CHECKED_TABLES):
+                continue
+            checked += 1
+            problems = self.plan_problems(sql)
+            self.assertFalse(problems, f'{url} 的查询没有走索引：{problems}\n{sql}')
+        self.assertTrue(checked, f'{url} 没有执行需要检查的查询')
+
+    def test_home(self):
+        self.assertIndexedQueries(reverse('home'), next_page=True)
+
+    def test_home_by_category(self):
+        self.assertIndexedQueries(f"{reverse('home')}?category={self.category.pk}", next_page=True)
+
+    def test_home_by_comment_count(self):
+        self.assertIndexedQueries(f"{reverse('home')}?sort=comments", next_page=True)
+
+    def test_post_detail(self):
+        self.assertIndexedQueries(reverse('post_detail', args=[self.posts[0].pk]))
+
+    def test_archive(self):
+        self.assertIndexedQueries(reverse('archive'))
+
+    def test_tag_detail(self):
+        self.assertIndexedQueries(reverse('tag_detail', args=[Tag.objects.get(name='Django').slug]))
+
+    def test_categories(self):
+        self.assertIndexedQueries(reverse('categories'))
+
+    def test_search(self):
+        self.assertIndexedQueries(f"{reverse('search')}?q=正文")
+
+    def test_archive_month(self):
+        month = self.posts[0].created_date
+        self.assertIndexedQueries(reverse('archive_month', args=[month.year, month.month]))
+
+    def test_archive_all(self):
+        self.assertIndexedQueries(reverse('archive_all'))
+
+    def test_admin_post_list(self):
+        self.assertIndexedQueries(reverse('admin_post_list'), next_page=True)
+        self.assertIndexedQueries(f"{reverse('admin_post_list')}?sort=comments")
+
+    def test_admin_comment_list(self):
+        self.assertIndexedQueries(reverse('admin_comment_list'))
+        self.assertIndexedQueries(f"{reverse('admin_comment_list')}?author=admin")
+        self.assertIndexedQueries(f"{reverse('admin_comment_list')}?post={self.posts[0].pk}")
+
+    def test_admin_navigation_lists(self):
+        self.assertIndexedQueries(reverse('admin_anime_navigation_list'), next_page=True)
+        self.assertIndexedQueries(reverse('admin_website_navigation_list'), next_page=True)
+
+
+def seed(**options):
+    options.setdefault('stdout', io.StringIO())
+    call_command('seed_blog', **options)
+
+
+class SeedBlogTests(TestCase):
+    def snapshot(self):
+        return (
+            list(Post.objects.order_by('pk').values_list('title', 'content', 'created_date', 'author__username', 'category__name', 'tags')),
+            list(Comment.objects.order_by('pk').values_list('content', 'created_at', 'author__username', 'parent__content')),
+        )
+
+    def test_same_seed_generates_same_data(self):
+        seed(posts=20, users=5, categories=3, comments=6, navigation=2, seed=7)
+        first = self.snapshot()
+        Post.objects.all().delete()
+        seed(posts=20, users=5, categories=3, comments=6, navigation=2, seed=7)
+        self.assertEqual(self.snapshot(), first)
+        Post.objects.all().delete()
+        seed(posts=20, users=5, categories=3, comments=6, navigation=2, seed=8)
+        self.assertNotEqual(self.snapshot()[0], first[0])
+
+    def test_comment_trees_and_counts(self):
+        seed(posts=30, users=5, categories=3, comments=15, max_depth=4, navigation=2)
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(User.objects.filter(username__startswith='seed_user_').count(), 5)
+        parents = dict(Comment.objects.values_list('pk', 'parent_id'))
+        depths = []
+        for pk in parents:
+            depth = 1
+            while parents[pk]:
+                pk, depth = parents[pk], depth + 1
+            depths.append(depth)
+        self.assertEqual(max(depths), 4)
+        for post in Post.objects.all():
+            self.assertEqual(post.comment_count, post.comments.count())
+        for comment in Comment.objects.filter(parent__isnull=True):
+            self.assertEqual(comment.reply_count, Comment.objects.filter(root=comment).count())
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class BenchmarkTests(TestCase):
+    def test_every_view_renders(self):
+        seed(posts=15, users=5, categories=3, comments=5, navigation=2)
+        results = run_benchmark(iterations=1, warmup=0)
+        self.assertGreater(len(results), 30)
+        for result in results:
+            self.assertEqual(result['status'], 200, result['view'])
+            self.assertGreater(result['bytes'], 0, result['view'])
+            self.assertEqual(set(result['latency_ms']), {'min', 'max', 'mean', 'p50', 'p90', 'p95', 'p99'})
+
+    def test_compare_results(self):
+        def item(queries, p50):
+            return {'size': 100, 'view': 'home', 'queries': queries, 'latency_ms': {'p50': p50}}
+        self.assertEqual(compare_results([item(4, 10.0)], [item(4, 9.0)], threshold=20), [])
+        self.assertEqual(len(compare_results([item(5, 10.0)], [item(4, 5.0)], threshold=20)), 2)
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class RequestTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        cls.category = Category.objects.create(name='技术', is_predefined=True)
+        cls.post = Post.objects.create(title='文章', content='正文', author=cls.admin, category=cls.category)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_server_timing_only_for_superusers(self):
+        url = reverse('post_detail', args=[self.post.pk])
+        self.assertNotIn('Server-Timing', self.client.get(url))
+        self.client.force_login(self.user)
+        self.assertNotIn('Server-Timing', self.client.get(url))
+        self.client.force_login(self.admin)
+        header = self.client.get(url)['Server-Timing']
+        self.assertRegex(header, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertRegex(header, r'tpl;dur=[\d.]+')
+        self.assertRegex(header, r'cache;desc="\d+ hits, [1-9]\d* misses"')
+        self.assertRegex(header, r'total;dur=[\d.]+')
+
+    def test_slow_request_log(self):
+        self.client.force_login(self.user)
+        with self.settings(SLOW_REQUEST_THRESHOLD_MS=0), self.assertLogs('blog.slow_requests') as logs:
+            self.client.get(reverse('home'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record['method'], record['path'], record['status']), ('GET', '/', 200))
+        self.assertEqual(record['user_id'], self.user.pk)
+        self.assertGreater(record['sql_count'], 0)
+        self.assertTrue(all(statement['sql'] and statement['count'] for statement in record['sql']))
+        self.assertEqual(sum(statement['count'] for statement in record['sql']), record['sql_count'])
+
+    def test_cache_counts_from_threads(self):
+        install_timing()
+        cache.set_many({'hit-a': 1, 'hit-b': 2})
+
+        def read():
+            for _ in range(200):
+                cache.get('hit-a')
+                cache.get('missing')
+                cache.get_many(['hit-a', 'hit-b', 'missing'])
+
+        with RequestTiming().activate() as timing:
+            threads = [threading.Thread(target=contextvars.copy_context().run, args=(read,)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual((timing.cache_hits, timing.cache_misses), (8 * 200 * 3, 8 * 200 * 2))
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        cls.category = Category.objects.create(name='技术', is_predefined=True)
+        cls.post = Post.objects.create(title='异步文章', content='正文', author=cls.user, category=cls.category)
+        Comment.objects.create(post=cls.post, author=cls.user, content='第一条评论')
+        AnimeNavigation.objects.create(title='动漫导航', url='https://example.com/')
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_asgi_views(self):
+        client = AsyncClient()
+        response = await client.get(reverse('home'))
+        self.assertContains(response, '异步文章')
+        self.assertContains(response, '动漫导航')
+        response = await client.get(reverse('post_detail', args=[self.post.pk]))
+        self.assertContains(response, '第一条评论')
+        self.assertIn('ETag', response)
+        not_modified = await client.get(reverse('post_detail', args=[self.post.pk]), headers={'If-None-Match': response['ETag']})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual((await client.get(reverse('post_detail', args=[self.post.pk + 1]))).status_code, 404)
+        self.assertEqual((await client.get(f"{reverse('home')}?category={self.category.pk + 1}")).status_code, 404)
+        response = await client.get(reverse('archive_all'))
+        self.assertIn('异步文章', b''.join([chunk async for chunk in response.streaming_content]).decode())
+
+    def test_wsgi_views(self):
+        self.assertContains(self.client.get(reverse('home')), '动漫导航')
+        self.assertContains(self.client.get(reverse('post_detail', args=[self.post.pk])), '第一条评论')
+        self.assertEqual(self.client.get(reverse('post_detail', args=[self.post.pk + 1])).status_code, 404)
+
+
+class WarmUpTests(TestCase):
+    def test_project_templates_compile(self):
+        # 预热会编译项目下的全部模板，这里同时保证没有语法错误
+        engine = engines['django']
+        names = project_template_names(engine)
+        self.assertIn('blog/home.html', names)
+        self.assertNotIn('admin/base.html', names)
+        for name in names:
+            engine.get_template(name)
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """以 SQLite 文件数据库代替 PostgreSQL，在多个线程中验证连接池的上限、健康检查与最长使用时间。"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'pool.sqlite3')
+
+    def make_pool(self, **options):
+        pool = db_pool.ConnectionPool(lambda: sqlite3.connect(self.path, check_same_thread=False), **options)
+        self.addCleanup(pool.close_idle)
+        return pool
+
+    def test_concurrent_threads_share_limited_connections(self):
+        pool = self.make_pool(max_size=4, timeout=5, check_idle=0)
+        lock = threading.Lock()
+        active, peak, errors = [0], [0], []
+
+        def work():
+            for _ in range(5):
+                raw = pool.acquire()
+                try:
+                    with lock:
+                        active[0] += 1
+                        peak[0] = max(peak[0], active[0])
+                    raw.execute('SELECT 1').fetchone()
+                    time.sleep(0.005)
+                    with lock:
+                        active[0] -= 1
+                except Exception as exc:
+                    errors.append(exc)
+                finally:
+                    pool.release(raw)
+
+        threads = [threading.Thread(target=work) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = pool.stats()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(peak[0], 4)
+        self.assertLessEqual(stats['created'], 4)
+        self.assertEqual(stats['checkouts'], 80)
+        self.assertEqual((stats['in_use'], stats['idle']), (0, stats['size']))
+        self.assertGreater(stats['waits'], 0)
+
+    def test_health_check_replaces_broken_connection(self):
+        pool = self.make_pool(check_idle=0)
+        raw = pool.acquire()
+        pool.release(raw)
+        raw.close()
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, raw)
+        self.assertEqual(replacement.execute('SELECT 1').fetchone(), (1,))
+        pool.release(replacement)
+        stats = pool.stats()
+        self.assertEqual((stats['health_check_failures'], stats['created'], stats['size']), (1, 2, 1))
+
+    def test_max_lifetime_and_timeout(self):
+        pool = self.make_pool(max_size=1, max_lifetime=0.05, timeout=0.05)
+        raw = pool.acquire()
+        with self.assertRaises(db_pool.PoolTimeout):
+            pool.acquire()
+        pool.release(raw)
+        time.sleep(0.06)
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, raw)
+        pool.release(replacement)
+        stats = pool.stats()
+        self.assertEqual((stats['timeouts'], stats['expired'], stats['created']), (1, 1, 2))
+
+    def test_database_wrapper_returns_connections_to_pool(self):
+        alias = 'pool_test'
+        self.addCleanup(lambda: db_pool._pools.pop(alias).close_idle())
+        settings_dict = {
+            **connection.settings_dict, 'ENGINE': 'blog.db.backends.sqlite3', 'NAME': self.path,
+            'CONN_MAX_AGE': 0, 'POOL': {'MAX_SIZE': 3, 'CHECK_IDLE': 0},
+        }
+        wrapper_class = load_backend(settings_dict['ENGINE']).DatabaseWrapper
+        errors = []
+
+        def request():
+            # 与 Django 的连接管理相同：每个线程有自己的 DatabaseWrapper，请求结束时关闭
+            wrapper = wrapper_class(settings_dict, alias)
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    time.sleep(0.005)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                wrapper.close()
+
+        threads = [threading.Thread(target=request) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = db_pool.pool_stats()[alias]
+        self.assertEqual(errors, [])
+        self.assertLessEqual(stats['created'], 3)
+        self.assertEqual(stats['checkouts'], 12)
+        self.assertEqual(stats['in_use'], 0)
+        self.assertEqual(stats['idle'], stats['size'])
+
+    def test_close_inside_atomic_block_rolls_back_and_releases(self):
+        alias = 'pool_test'
+        connections.settings[alias] = {
+            **connection.settings_dict, 'ENGINE': 'blog.db.backends.sqlite3', 'NAME': self.path,
+            'CONN_MAX_AGE': 0, 'POOL': {'MAX_SIZE': 1, 'CHECK_IDLE': 0},
+        }
+
+        def cleanup():
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+            db_pool._pools.pop(alias).close_idle()
+        self.addCleanup(cleanup)
+        wrapper = connections[alias]
+        with wrapper.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+        with transaction.atomic(using=alias):
+            with wrapper.cursor() as cursor:
+                cursor.execute('INSERT INTO item VALUES (1)')
+            raw = wrapper.connection
+            wrapper.close()
+            self.assertIsNone(wrapper.connection)
+            with self.assertRaisesMessage(ProgrammingError, 'Cannot open a new connection in an atomic block.'):
+                wrapper.ensure_connection()
+        stats = db_pool.pool_stats()[alias]
+        self.assertEqual((stats['in_use'], stats['idle'], stats['closed']), (0, 1, 0))
+        # 未提交的插入已回滚，连接归还后可以被再次借出
+        with wrapper.cursor() as cursor:
+            self.assertEqual(cursor.execute('SELECT COUNT(*) FROM item').fetchone(), (0,))
+        self.assertIs(wrapper.connection, raw)
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+    DATABASE_REPLICAS=['replica'],
+    DATABASE_ROUTERS=['blog.db.routers.ReplicaRouter'],
+)
+class ReplicaRouterTests(TransactionTestCase):
+    """
+    用两个 SQLite 数据库分别代替主库与只读副本。副本是测试运行期间临时注册的数据库别名，
+    其中的数据只在 setUp 里从主库手动“复制”一次，之后写入主库的数据在副本中看不到，相当于复制延迟。
+
+    主库事务中的读取一律走主库，因此不使用把每个测试包在事务中的 TestCase。
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # 在建立数据库访问限制之后再注册副本，测试结束时删除整个文件
+        cls.replica_dir = tempfile.TemporaryDirectory()
+        connections.settings['replica'] = {
+            **connections.settings['default'], 'NAME': os.path.join(cls.replica_dir.name, 'replica.sqlite3'),
+        }
+        # ReplicaRouter 不允许在副本上执行迁移（生产环境由复制同步表结构），这里临时关闭路由
+        with override_settings(DATABASE_ROUTERS=[]):
+            call_command('migrate', database='replica', verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.replica_dir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        self.category = Category.objects.create(name='技术', is_predefined=True)
+        self.post = Post.objects.create(title='已同步的文章', content='正文', author=self.user, category=self.category)
+        for instance in (self.user, self.category, self.post):
+            instance.save(using='replica')
+            instance._state.db = 'default'
+        Post.objects.create(title='尚未同步的文章', content='正文', author=self.user, category=self.category)
+
+    def tearDown(self):
+        with override_settings(DATABASE_ROUTERS=[]):
+            call_command('flush', database='replica', interactive=False, verbosity=0)
+
+    def test_reads_use_replica_unless_pinned(self):
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, '已同步的文章')
+        self.assertNotContains(response, '尚未同步的文章')
+        cache.clear()
+        self.client.cookies['use_primary_db'] = '1'
+        self.assertContains(self.client.get(reverse('home')), '尚未同步的文章')
+
+    def test_writes_go_to_primary_and_pin_reads(self):
+        self.client.force_login(self.user)
+        detail = reverse('post_detail', args=[self.post.pk])
+        response = self.client.post(reverse('add_comment', args=[self.post.pk]), {'content': '刚发表的评论'})
+        self.assertEqual(Comment.objects.using('default').filter(content='刚发表的评论').count(), 1)
+        self.assertFalse(Comment.objects.using('replica').exists())
+        self.assertIn('use_primary_db', response.cookies)
+        self.assertEqual(response.cookies['use_primary_db']['max-age'], 5)
+        # 写入者带着 Cookie 从主库读取，立即看到自己的评论
+        self.assertContains(self.client.get(detail), '刚发表的评论')
+        # 其他用户仍读副本；最近写入的标记有效期内，从副本读到的页面不写入整页缓存，也不带验证器
+        for _ in range(2):
+            response = Client().get(detail)
+            self.assertNotContains(response, '刚发表的评论')
+            self.assertNotIn('X-Page-Cache', response)
+            self.assertNotIn('ETag', response)
+            self.assertNotIn('Last-Modified', response)
+        # 标记过期、Cookie 失效之后回到副本，页面照常缓存
+        cache.delete(RECENT_WRITE_KEY)
+        del self.client.cookies['use_primary_db']
+        self.client.logout()
+        response = self.client.get(detail)
+        self.assertNotContains(response, '刚发表的评论')
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertIn('ETag', response)
+
+    def test_reads_outside_requests_and_in_transactions_use_primary(self):
+        unsynced = Post.objects.filter(title='尚未同步的文章')
+        self.assertTrue(unsynced.exists())
+        with routing():
+            self.assertFalse(unsynced.exists())
+            with transaction.atomic():
+                self.assertTrue(unsynced.exists())
+
+    def test_comment_deletion_reads_descendants_from_primary(self):
+        floor = Comment.objects.create(post=self.post, author=self.user, content='一楼')
+        reply = Comment.objects.create(post=self.post, author=self.user, content='回复', parent=floor)
+        reconcile_comment_counts()
+        with routing():
+            self.assertEqual(collect_descendants([floor.pk]), {floor.pk})
+            self.assertEqual(collect_descendants([floor.pk], 'default'), {floor.pk, reply.pk})
+            self.assertEqual(delete_comments([floor.pk])[0], 2)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comment_count, 0)
+
+    def test_stale_replica_reads_are_not_cached(self):
+        # 请求之外（例如管理命令）的写入同样设置最近写入标记
+        Post.objects.create(title='命令导入的文章', content='正文', author=self.user, category=self.category)
+        self.assertTrue(cache.get(RECENT_WRITE_KEY))
+        calls = []
+
+        def titles():
+            calls.append(1)
+            return list(Post.objects.values_list('title', flat=True))
+
+        with routing():
+            self.assertNotIn('命令导入的文章', get_or_set('posts', ['titles'], titles))
+            get_or_set('posts', ['titles'], titles)
+        self.assertEqual(len(calls), 2)
+        cache.delete(RECENT_WRITE_KEY)
+        with routing():
+            get_or_set('posts', ['titles'], titles)
+            get_or_set('posts', ['titles'], titles)
+        self.assertEqual(len(calls), 3)
+
+    def test_without_replicas_everything_uses_default(self):
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertContains(self.client.get(reverse('home')), '尚未同步的文章')
+            self.assertNotIn('use_primary_db', self.client.get(reverse('home')).cookies)
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SECURE_SSL_REDIRECT=False,
+)
+class SessionStorageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        cache.clear()
+
+    def session_queries(self, queries):
+        return [query['sql'] for query in queries if 'django_session' in query['sql']]
+
+    def test_anonymous_requests_do_not_touch_sessions(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('home'))
+            response = self.client.get(reverse('admin_dashboard'), follow=True)
+        self.assertEqual(self.session_queries(queries), [])
+        self.assertNotIn('sessionid', self.client.cookies)
+        self.assertIn('messages', self.client.cookies)
+        self.assertEqual([str(message) for message in response.context['messages']],
+                         ['您需要使用超级账户登录才能访问后台管理系统。'])
+
+    def test_anonymous_messages_never_fall_back_to_session(self):
+        def store_messages(user):
+            request = RequestFactory().get('/')
+            request.session, request.user = SessionStore(), user
+            storage = AnonymousCookieStorage(request)
+            # Cookie 中的消息会被压缩，使用随机内容才能超出 Cookie 大小
+            for _ in range(100):
+                storage.add(20, os.urandom(32).hex())
+            response = HttpResponse()
+            storage.update(response)
+            return request, response
+
+        # 匿名用户 Cookie 放不下的消息直接丢弃，不创建会话
+        request, response = store_messages(AnonymousUser())
+        self.assertIn('messages', response.cookies)
+        self.assertFalse(request.session.modified)
+        # 登录用户与 FallbackStorage 相同，放不下的消息存入会话
+        request, response = store_messages(self.admin)
+        self.assertTrue(request.session.modified)
+        self.assertIn('_messages', request.session)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_signed_cookie_sessions(self):
+        self.client.login(username='admin', password='password')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse('admin_dashboard')).status_code, 200)
+            response = self.client.get(reverse('logout'), follow=True)
+        self.assertEqual(self.session_queries(queries), [])
+        self.assertFalse(response.context['user'].is_authenticated)
+        self.assertEqual([str(message) for message in response.context['messages']], ['您已成功退出。'])
+        self.assertFalse(Session.objects.exists())
+
+    def test_clear_expired_sessions_in_batches(self):
+        now = timezone.now()
+        for number in range(5):
+            Session.objects.create(session_key=f'expired{number}', session_data='', expire_date=now - timedelta(days=1))
+        for number in range(2):
+            Session.objects.create(session_key=f'valid{number}', session_data='', expire_date=now + timedelta(days=1))
+        out = io.StringIO()
+        call_command('clear_expired_sessions', '--dry-run', stdout=out)
+        self.assertIn('共有 5 个过期会话', out.getvalue())
+        self.assertEqual(Session.objects.count(), 7)
+
+        out = io.StringIO()
+        call_command('clear_expired_sessions', '--batch-size', '2', stdout=out)
+        self.assertEqual(out.getvalue().count('已删除'), 3)
+        self.assertIn('共删除 5 个过期会话', out.getvalue())
+        self.assertEqual(sorted(Session.objects.values_list('session_key', flat=True)), ['valid0', 'valid1'])
+
+# 修改记录：
+# 1. 添加 QueryPlanTests：对首页、文章详情、归档、管理列表等视图实际执行的查询运行 EXPLAIN
+#    （SQLite 与 PostgreSQL），出现热点表全表扫描或额外排序时失败。
+# 2. 添加 seed_blog 命令的可重复性与评论树测试，以及基准测试覆盖的全部页面都能正常渲染的测试。
+# 3. 添加 RequestTimingMiddleware 的 Server-Timing 响应头与慢请求日志测试。
+# 4. 添加异步视图在 ASGI（AsyncClient）与 WSGI 下的渲染、404、条件请求与流式归档测试。
+# 5. 添加 gunicorn 预热用到的项目模板列表与模板编译测试。
+# 6. 添加数据库连接池在多线程下的连接数上限、健康检查、最长使用时间与 Django 后端归还连接的测试。
+# 7. 添加只读副本路由测试：以两个 SQLite 数据库代替主库与副本，验证读取走副本、写入走主库以及写入后改读主库。
+# 8. 添加会话与提示消息存储测试：匿名请求不读写会话表、匿名用户的消息只用 Cookie、签名 Cookie 会话，以及过期会话的分批清理。
+# 9. 添加评论树加载测试：整篇文章的评论一次查询取出并按楼层分组，详情页的查询数不随评论数量增长。
+# 10. 添加文章摘要测试：摘要随正文保存更新，列表页不读取正文且查询数不随文章的作者与分类数量增长。
+# 11. 添加归档测试：年/月索引由一次聚合查询得到，按月页面只列出该月文章，全部文章归档以流式响应按时间倒序输出。
+# 12. 添加全文搜索测试：中日韩文本的二元组切分、按相关度排序的结果、索引随文章保存与删除更新以及批量重建。
+# 13. 添加标签测试：多种分隔符的解析、标签文章数随文章增删改维护、标签文章列表页、标签云缓存与发布文章时的逗号输入。
+# 14. 添加分类测试：首页按分类筛选，分类页的文章数量由一次聚合查询得到，并随文章与分类的修改更新。
+# 15. 添加键集分页测试：游标前后翻页不重复不遗漏、页码窗口与末页游标、无效游标退回第一页、深页只需一次查询且总数走缓存。
+# 16. 添加评论审核测试：批量删除连同回复并扣减计数，删除全部筛选结果只删除匹配的评论，无效或空条件不删除任何评论，日期条件为 created_at 上的左闭右开范围。
+# 17. 添加 import_posts 测试：超长的作者与分类名称截断后跨批次一致，评论保留原始时间与楼层关系，计数与标签随导入写入，--offset 续传。
+# 18. 添加数据导出测试：按类型分块输出 NDJSON，export_blog 命令写出 gzip 文件并拒绝未知类型，后台下载为仅超级用户可用的流式响应。
+# 19. 添加上传图片派生图测试：按 EXIF 修正方向并去除元数据、不放大窄图，responsive_image 在派生图就绪前后的输出，上传提交后在后台线程生成并随删除清理。
+# 20. 添加打包图片测试：模板引用的静态文件都存在，侧边栏使用同名封面或站点图标，collectstatic 生成带哈希的宽度与格式变体并由 static_picture 与 static_image_set 输出。
+# 21. 添加导航栏用户展示数据测试：头像只查询一次后走缓存，头像或用户名修改后缓存失效，匿名用户没有展示数据。
+# 22. 添加条件请求测试：首页、详情页、归档与分类页未变化时返回 304 且不查询评论表，评论增删改变详情页验证器，删除文章时级联删除评论的查询数恒定，Django admin 中的评论增删维护计数。
+# 23. 添加 PageCacheEvictionTests：评论、文章保存、分类改名、用户改名只使显示相关数据的页面缓存失效。
+# 24. 添加侧边栏导航片段缓存测试：同步与异步版本共用缓存、导航增删改后片段刷新、缓存后首页不查询导航表。
+# 25. 添加评论计数测试：发表与删除评论以 F() 维护文章评论数与楼层回复数，旧实例保存不覆盖计数，扣减以 0 为下限，
+#     reconcile_comment_counts 与同名命令修复偏差，首页与文章管理列表按评论数排序翻页。
+# 26. 添加标签页排序测试：按关联行中冗余的发布时间排序，修改文章发布时间后随之更新。
+# 27. 为标签页、归档、分类与搜索页添加执行计划检查。
+# 28. 副本路由测试改为：写入后只有写入者改读主库，其他用户读副本且页面不写入整页缓存，标记过期后照常缓存。
+# 29. 副本路由测试：最近写入标记有效期内从副本读取的页面不带验证器，请求之外的写入也设置标记，版本化缓存不保存副本读到的数据。
+# 30. ReplicaRouterTests 改为 TransactionTestCase，每个测试重新“复制”副本数据；检查请求之外与事务中的读取走主库。
+# 31. 添加标签文章数量扣减以 0 为下限的测试。
+# 32. 添加迁移 0011 为升级前已有文章分批建立搜索索引的测试。
+# 33. 添加删除评论时在主库收集后代回复的副本路由测试。
+# 34. 慢请求日志改由设置在运行测试时统一关闭，去掉各测试类中的 SLOW_REQUEST_THRESHOLD_MS=None。
+# 35. 末页测试改为与向后翻页的页边界一致：末页只有余数篇，往前翻一页不重复。
+# 36. 新增多线程并发读取缓存时命中与未命中次数不丢失的测试。
+# 37. 新增在事务块中关闭连接时先回滚、归还连接池并解除引用的测试。
@@ -0,0 +1,182 @@
+import contextlib
+import contextvars
+import threading
+import time
+from functools import wraps
+
+from django.core.cache import caches
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template
+
+# 当前请求的统计对象；用 ContextVar 保存，线程与协程之间互不干扰
+_current = contextvars.ContextVar('blog_request_timing', default=None)
+_MISSING = object()
+_installed = False
+# get_many 执行期间置位：部分后端（如 LocMemCache）的 get_many 逐个调用 get，由 get_many 统一计数
+_in_get_many = threading.local()
+
+
+class RequestTiming:
+    """
+    一次请求的耗时统计：SQL 条数与耗时、模板渲染耗时、缓存命中与未命中次数。
+
+    统计可以嵌套（例如基准测试在请求外层再统计一次），内层记录的 SQL 同时计入外层。
+    """
+
+    def __init__(self):
+        self.parent = None
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.total_ms = 0.0
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        # {SQL 文本: [执行次数, 累计耗时]}；不记录参数，避免把密码等敏感数据写入日志
+        self.statements = {}
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self.start) * 1000
+
+    def record_sql(self, sql, elapsed_ms):
+        # 异步视图的并发查询在多个线程中同时完成
+        with self.lock:
+            self.sql_count += 1
+            self.sql_ms += elapsed_ms
+            entry = self.statements.setdefault(sql, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed_ms
+        if self.parent is not None:
+            self.parent.record_sql(sql, elapsed_ms)
+
+    def record_cache(self, hits, misses):
+        # 与 record_sql 相同，线程池中并发执行的缓存读取需要加锁累加
+        with self.lock:
+            self.cache_hits += hits
+            self.cache_misses += misses
+
+    def slowest_statements(self, limit):
+        """按累计耗时倒序返回 SQL，重复执行的语句（N+1 查询）合并为一条并给出次数。"""
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)
+        return [{'sql': sql, 'count': count, 'ms': round(ms, 3)} for sql, (count, ms) in ranked[:limit]]
+
+    def server_timing(self):
+        """Server-Timing 响应头的值，浏览器开发者工具的网络面板会直接显示。"""
+        return ', '.join([
+            f'db;dur={self.sql_ms:.1f};desc="{self.sql_count} queries"',
+            f'tpl;dur={self.template_ms:.1f};desc="templates"',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'total;dur={self.total_ms:.1f}',
+        ])
+
+    @contextlib.contextmanager
+    def activate(self):
+        """
+        在 with 块内让 SQL、模板与缓存的统计生效。
+
+        统计对象保存在 ContextVar 中，sync_to_async 会把它带入执行查询的线程，
+        因此异步视图在线程池中并发执行的查询也会被记录。
+        """
+        for connection in connections.all():
+            _add_sql_recorder(connection)
+        self.parent = _current.get()
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+            self.finish()
+
+
+def _record_sql(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.record_sql(sql, (time.perf_counter() - start) * 1000)
+
+
+def _add_sql_recorder(connection, **kwargs):
+    # 数据库连接按线程创建，每个连接对象只需添加一次
+    if _record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_sql)
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, *args, **kwargs):
+        timing = _current.get()
+        if timing is None:
+            return render(self, *args, **kwargs)
+        # 只统计最外层的渲染，模板内嵌套调用 render_to_string 的耗时已包含在外层之中
+        timing.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            timing.template_depth -= 1
+            if not timing.template_depth:
+                timing.template_ms += (time.perf_counter() - start) * 1000
+    return wrapper
+
+
+def _counted_get(get):
+    @wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        value = get(self, key, _MISSING, version=version)
+        timing = _current.get()
+        if timing is not None and not getattr(_in_get_many, 'active', False):
+            missed = value is _MISSING
+            timing.record_cache(int(not missed), int(missed))
+        return default if value is _MISSING else value
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    @wraps(get_many)
+    def wrapper(self, keys, version=None):
+        keys = list(keys)
+        timing = _current.get()
+        if timing is None:
+            return get_many(self, keys, version=version)
+        _in_get_many.active = True
+        try:
+            values = get_many(self, keys, version=version)
+        finally:
+            _in_get_many.active = False
+        timing.record_cache(len(values), len(keys) - len(values))
+        return values
+    return wrapper
+
+
+def install():
+    """
+    为新建的数据库连接添加 SQL 记录器，为模板后端的 render 与默认缓存后端的 get/get_many
+    加上计时与计数，只执行一次。
+
+    Django 没有为模板渲染（测试环境之外）和缓存读取提供信号，只能包装这几个方法；
+    没有处于统计中的请求时包装函数直接调用原方法。
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    connection_created.connect(_add_sql_recorder, dispatch_uid='blog.timing.sql_recorder')
+    Template.render = _timed_render(Template.render)
+    backend = type(caches['default'])
+    backend.get = _counted_get(backend.get)
+    backend.get_many = _counted_get_many(backend.get_many)
+
+# 修改记录：
+# 1. 新建 timing.py，按请求统计 SQL 条数与耗时（connection.execute_wrapper）、模板渲染耗时与缓存命中次数，
+#    供 RequestTimingMiddleware 输出 Server-Timing 响应头与慢请求日志。
+# 2. SQL 记录器改为在每个数据库连接创建时添加，通过 ContextVar 找到当前请求的统计对象，
+#    异步视图在线程池中并发执行的查询同样计入；统计对象支持嵌套。
+# 3. 缓存命中与未命中次数改为加锁累加（record_cache），get_many 内部逐个调用的 get 不再计数，
+#    不再先读出计数再整体写回，多个线程并发读取缓存时不会丢失计数。
@@ -15,6 +15,10 @@ urlpatterns = [
     path('contact/', views.contact, name='contact'),
     path('categories/', views.categories, name='categories'),
     path('archive/', views.archive, name='archive'),
+    path('search/', views.search, name='search'),
+    path('tag/<str:slug>/', views.tag_detail, name='tag_detail'),
+    path('archive/all/', views.archive_all, name='archive_all'),
+    path('archive/<int:year>/<int:month>/', views.archive_month, name='archive_month'),
     # 密码修改路由 (Frontend)
     path('password_change/', PasswordChangeView.as_view(template_name='auth/password_change.html'), name='password_change'),
     path('password_change/done/', PasswordChangeDoneView.as_view(template_name='auth/password_change_done.html'), name='password_change_done'),
@@ -36,6 +40,8 @@ urlpatterns = [
     path('custom-admin/category/<int:pk>/delete/', views.category_delete, name='admin_category_delete'),
     path('custom-admin/comments/', views.comment_list, name='admin_comment_list'),
     path('custom-admin/comment/<int:pk>/delete/', views.comment_delete, name='admin_comment_delete'),
+    path('custom-admin/comments/bulk-delete/', views.comment_bulk_delete, name='admin_comment_bulk_delete'),
+    path('custom-admin/export/', views.export_data, name='admin_export_data'),
     path('custom-admin/about/update/', views.about_update, name='admin_about_update'),
     path('custom-admin/contact/update/', views.contact_update, name='admin_contact_update'),
     path('custom-admin/anime-navigation/', views.anime_navigation_list, name='admin_anime_navigation_list'),
@@ -50,4 +56,9 @@ urlpatterns = [
 
 # 修改记录：
 # 1. 修正语法错误，添加缺失的逗号和适当的格式。
-# 2. 之前记录：添加了 upload-profile-image 路由。
\ No newline at end of file
+# 2. 之前记录：添加了 upload-profile-image 路由。
+# 3. 添加 archive_all 和 archive_month 归档路由。
+# 4. 添加 search 全文搜索路由。
+# 5. 添加 tag_detail 标签页路由。
+# 6. 添加 comment_bulk_delete 评论批量删除路由。
+# 7. 添加 admin_export_data 数据导出下载路由。
@@ -2,11 +2,31 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import login, logout
 from django.contrib import messages
-from .forms import CommentForm, PostForm, CategoryForm, AboutForm, ContactForm, AnimeNavigationForm, WebsiteNavigationForm
-from .models import Post, Category, About, Contact, Comment, AnimeNavigation, WebsiteNavigation, UserProfile
+from .forms import CommentForm, CommentFilterForm, PostForm, CategoryForm, AboutForm, ContactForm, AnimeNavigationForm, WebsiteNavigationForm
+from .models import Post, Category, About, Contact, Comment, AnimeNavigation, WebsiteNavigation, UserProfile, Tag
+from .comments import load_comment_thread, delete_comments, record_new_comment
+from .search import SearchResults
+from .caching import get_or_set, get_version, post_namespace
+from .pagination import KeysetPaginator
+from .export import export_stream
+from .conditional import namespaces_condition, post_condition
+from .middleware import cache_anonymous_page, depend_on
+from .aio import concurrent, streaming_content
+from .templatetags.navigation import anavigation_sidebar
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.http import HttpResponseForbidden
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.http import HttpResponseForbidden, Http404, QueryDict, StreamingHttpResponse
+from django.urls import reverse
+from django.template.loader import get_template, render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+from django.utils.http import urlencode
+from datetime import datetime
+import asyncio
 
 # Custom decorator to ensure user is a superuser
 def superuser_required(view_func):
@@ -20,18 +40,50 @@ def superuser_required(view_func):
         return view_func(request, *args, **kwargs)
     return wrapper
 
-# 首页视图：显示分页的文章列表 (Frontend)
-def home(request):
-    posts = Post.objects.all().order_by('-created_date')
-    paginator = Paginator(posts, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    anime_navs = AnimeNavigation.objects.all().order_by('-created_at')[:3]
-    website_navs = WebsiteNavigation.objects.all().order_by('-created_at')
-    return render(request, 'blog/home.html', {
+# 首页视图：显示分页的文章列表，异步视图，分类、文章列表与侧边栏导航同时查询 (Frontend)
+# 整页缓存只依赖本页显示的文章（评论数随 'post:<id>' 失效），按评论数排序时才依赖全局的 'comments'
+@cache_anonymous_page('posts', 'categories', 'navigation', 'authors')
+@namespaces_condition('posts', 'categories', 'navigation', 'authors', 'comments')
+async def home(request):
+    posts = Post.objects.select_related('author', 'category').defer('content')
+    # 按分类筛选：直接使用 category_id 外键索引过滤，分类是否存在与文章列表一起查询
+    category_id = request.GET.get('category', '')
+    if category_id.isdigit():
+        posts = posts.filter(category_id=category_id)
+    # 按评论数排序时以 (comment_count, id) 作为键集
+    sort = 'comments' if request.GET.get('sort') == 'comments' else ''
+    paginator = KeysetPaginator(posts, 6, field='comment_count' if sort else 'created_date')
+
+    def get_page(cursor):
+        page_obj = paginator.page(cursor)
+        depend_on(request, *(post_namespace(post.pk) for post in page_obj), *(['comments'] if sort else []))
+        return page_obj
+
+    async def get_category():
+        if not category_id.isdigit():
+            return None
+        try:
+            return await Category.objects.only('id', 'name').aget(pk=category_id)
+        except Category.DoesNotExist:
+            raise Http404("分类不存在")
+
+    category, page_obj, sidebar = await asyncio.gather(
+        get_category(),
+        concurrent(get_page, request.GET.get('cursor', '')),
+        anavigation_sidebar(),
+    )
+    extra_query = {}
+    if category:
+        extra_query['category'] = category.id
+    if sort:
+        extra_query['sort'] = sort
+    # 模板中的总页数等仍可能查询数据库，在线程中渲染
+    return await sync_to_async(render)(request, 'blog/home.html', {
         'page_obj': page_obj,
-        'anime_navs': anime_navs,
-        'website_navs': website_navs
+        'category': category,
+        'sort': sort,
+        'extra_query': urlencode(extra_query),
+        'navigation_sidebar': sidebar,
     })
 
 # 头像上传视图
@@ -108,22 +160,18 @@ def logout_view(request):
         return redirect('home')
 
 # 文章详情视图：显示文章及相关评论 (Frontend)
-def post_detail(request, pk):
-    post = get_object_or_404(Post, pk=pk)
-    parent_comments = post.comments.filter(parent__isnull=True).order_by('-created_at')
-    print(f"Debug - parent_comments for post {pk}: {[comment.id for comment in parent_comments]}")  # Debug parent comment IDs
-    # Fetch all replies and flatten them under their top-level parent
-    replies_dict = {}
-    for parent in parent_comments:
-        replies = []
-        def collect_replies(comment):
-            for reply in comment.replies.all().order_by('created_at'):
-                replies.append(reply)
-                collect_replies(reply)
-        collect_replies(parent)
-        replies_dict[parent.id] = replies
-    print(f"Debug - replies_dict for post {pk}: {replies_dict}")
-    return render(request, 'blog/post_detail.html', {
+@cache_anonymous_page('post:{pk}', 'categories', 'authors')
+@post_condition()
+async def post_detail(request, pk):
+    # 文章与评论树互不依赖，按主键同时查询
+    try:
+        post, (parent_comments, replies_dict) = await asyncio.gather(
+            Post.objects.select_related('author', 'category').aget(pk=pk),
+            concurrent(load_comment_thread, pk),
+        )
+    except Post.DoesNotExist:
+        raise Http404("文章不存在")
+    return await sync_to_async(render)(request, 'blog/post_detail.html', {
         'post': post,
         'parent_comments': parent_comments,
         'replies_dict': replies_dict
@@ -190,12 +238,36 @@ def add_comment(request, post_id):
                 except Comment.DoesNotExist:
                     messages.error(request, "回复的评论不存在。")
                     return redirect('post_detail', pk=post_id)
-            comment.save()
+            with transaction.atomic():
+                comment.save()
+                record_new_comment(comment)
             messages.success(request, "评论发布成功！")
         else:
             messages.error(request, "评论发布失败，请检查输入。")
     return redirect('post_detail', pk=post_id)
 
+# 标签文章列表：通过标签关联表连接查询 (Frontend)
+@cache_anonymous_page('posts', 'tags', 'categories', 'authors')
+def tag_detail(request, slug):
+    tag = get_object_or_404(Tag, slug=slug)
+    # 按关联行中冗余的发布时间排序，沿 (tag, created_date, post) 索引倒序读取
+    posts = (
+        Post.objects.filter(posttag__tag=tag).select_related('author', 'category').defer('content')
+        .order_by('-posttag__created_date', '-posttag__post')
+    )
+    paginator = Paginator(posts, 10)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'blog/tag_detail.html', {'tag': tag, 'page_obj': page_obj})
+
+# 全文搜索页面：按相关度排序并分页 (Frontend)
+def search(request):
+    query = request.GET.get('q', '').strip()[:100]
+    page_obj = None
+    if query:
+        paginator = Paginator(SearchResults(query), 10)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'blog/search.html', {'query': query, 'page_obj': page_obj})
+
 # 关于我们页面 (Frontend)
 def about(request):
     about = About.objects.first()
@@ -211,28 +283,115 @@ def contact(request):
     return render(request, 'blog/contact.html', {'contact': contact})
 
 # 分类列表页面 (Frontend)
-def categories(request):
-    categories = Category.objects.all()
-    return render(request, 'blog/categories.html', {'categories': categories})
+CATEGORIES_PER_PAGE = 30
+
+def build_category_counts():
+    # 一次聚合查询统计所有分类的文章数量（按分类逐个查找 category 索引），预定义分类排在前面。
+    # 按聚合结果排序无法利用索引，分类表很小，取出后在内存中排序
+    categories = Category.objects.annotate(post_count=Count('post')).order_by().values('id', 'name', 'is_predefined', 'post_count')
+    return sorted(categories, key=lambda category: (not category['is_predefined'], -category['post_count'], category['name']))
 
-# 文章归档页面 (Frontend)
+# 文章数量随文章的增删与改分类变化：计数缓存键带上 'posts' 的版本号，文章保存时不必递增 'categories'
+@cache_anonymous_page('categories', 'tags', 'posts')
+@namespaces_condition('categories', 'tags', 'posts')
+def categories(request):
+    category_counts = get_or_set('categories', ['counts', get_version('posts')], build_category_counts)
+    paginator = Paginator(category_counts, CATEGORIES_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'blog/categories.html', {'page_obj': page_obj})
+
+# 文章归档页面：按年/月汇总文章数量 (Frontend)
+@cache_anonymous_page('posts')
+@namespaces_condition('posts')
 def archive(request):
-    posts = Post.objects.all().order_by('-created_date')
-    return render(request, 'blog/archive.html', {'posts': posts})
+    buckets = (
+        Post.objects.annotate(month=TruncMonth('created_date'))
+        .values('month')
+        .annotate(count=Count('id'))
+        .order_by('-month')
+    )
+    years = []
+    for bucket in buckets:
+        month = bucket['month']
+        if not years or years[-1]['year'] != month.year:
+            years.append({'year': month.year, 'total': 0, 'months': []})
+        years[-1]['total'] += bucket['count']
+        years[-1]['months'].append(bucket)
+    return render(request, 'blog/archive.html', {'years': years})
+
+# 按月归档页面：只查询该月的文章，走 created_date 索引 (Frontend)
+@cache_anonymous_page('posts')
+@namespaces_condition('posts')
+def archive_month(request, year, month):
+    if not 1 <= month <= 12 or not 1 <= year < 9999:
+        raise Http404("归档月份不存在")
+    start = timezone.make_aware(datetime(year, month, 1))
+    end = timezone.make_aware(datetime(year + month // 12, month % 12 + 1, 1))
+    posts = (
+        Post.objects.filter(created_date__gte=start, created_date__lt=end)
+        .only('id', 'title', 'excerpt', 'created_date')
+        .order_by('-created_date')
+    )
+    return render(request, 'blog/archive_month.html', {'posts': posts, 'month': start})
+
+# 全部文章归档：流式输出，内存占用不随文章数量增长 (Frontend)
+ARCHIVE_ROWS_MARKER = '<!-- archive-rows -->'
+ARCHIVE_STREAM_CHUNK_SIZE = 500
+
+@namespaces_condition('posts')
+def archive_all(request):
+    page = render_to_string('blog/archive_all.html', {'archive_rows': mark_safe(ARCHIVE_ROWS_MARKER)}, request=request)
+    head, tail = page.split(ARCHIVE_ROWS_MARKER, 1)
+    rows_template = get_template('blog/archive_rows.html')
+    posts = (
+        Post.objects.only('id', 'title', 'created_date')
+        .order_by('-created_date')
+        .iterator(chunk_size=ARCHIVE_STREAM_CHUNK_SIZE)
+    )
+
+    def stream():
+        yield head
+        chunk = []
+        for post in posts:
+            chunk.append(post)
+            if len(chunk) >= ARCHIVE_STREAM_CHUNK_SIZE:
+                yield rows_template.render({'posts': chunk})
+                chunk = []
+        if chunk:
+            yield rows_template.render({'posts': chunk})
+        yield tail
+
+    return StreamingHttpResponse(streaming_content(request, stream()), content_type='text/html; charset=utf-8')
 
 # 管理仪表板（需登录且为超级用户）
 @superuser_required
 def admin_dashboard(request):
     return render(request, 'blog/admin/dashboard.html')
 
+# 导出博客数据：以 NDJSON（可选 gzip）流式下载，内存占用与数据量无关（需登录且为超级用户）
+@superuser_required
+def export_data(request):
+    compress = request.GET.get('gzip') == '1'
+    filename = timezone.localtime().strftime('cyt-blog-%Y%m%d-%H%M%S.ndjson') + ('.gz' if compress else '')
+    response = StreamingHttpResponse(
+        streaming_content(request, export_stream(compress=compress)),
+        content_type='application/gzip' if compress else 'application/x-ndjson; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 # 文章管理列表（需登录且为超级用户）
 @superuser_required
 def post_list(request):
-    posts = Post.objects.all().order_by('-created_date')
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return render(request, 'blog/admin/post_list.html', {'page_obj': page_obj})
+    posts = Post.objects.select_related('author', 'category').defer('content')
+    sort = 'comments' if request.GET.get('sort') == 'comments' else ''
+    paginator = KeysetPaginator(posts, 10, field='comment_count' if sort else 'created_date')
+    page_obj = paginator.page(request.GET.get('cursor', ''))
+    return render(request, 'blog/admin/post_list.html', {
+        'page_obj': page_obj,
+        'sort': sort,
+        'extra_query': urlencode({'sort': sort}) if sort else '',
+    })
 
 # 创建文章（管理员，需登录且为超级用户）
 @superuser_required
@@ -324,18 +483,56 @@ def category_delete(request, pk):
         return redirect('admin_category_list')
     return render(request, 'blog/admin/category_delete.html', {'category': category})
 
-# 评论管理列表（需登录且为超级用户）
+COMMENTS_PER_PAGE = 20
+
+# 评论审核列表：筛选、键集分页与批量删除（需登录且为超级用户）
 @superuser_required
 def comment_list(request):
-    comments = Comment.objects.all().order_by('-created_at')
-    return render(request, 'blog/admin/comment_list.html', {'comments': comments})
+    filter_form = CommentFilterForm(request.GET or None)
+    comments = filter_form.filter(
+        Comment.objects.select_related('author', 'post').only(
+            'id', 'content', 'created_at', 'parent_id', 'author__username', 'post__title'
+        )
+    )
+    paginator = KeysetPaginator(comments, COMMENTS_PER_PAGE, field='created_at')
+    page_obj = paginator.page(request.GET.get('cursor', ''))
+    filter_query = request.GET.copy()
+    filter_query.pop('cursor', None)
+    return render(request, 'blog/admin/comment_list.html', {
+        'page_obj': page_obj,
+        'filter_form': filter_form,
+        'extra_query': filter_query.urlencode(),
+    })
+
+# 批量删除评论（管理员，需登录且为超级用户）
+@superuser_required
+def comment_bulk_delete(request):
+    if request.method != 'POST':
+        return redirect('admin_comment_list')
+    next_query = request.POST.get('next_query', '')
+    if request.POST.get('select_all_matching'):
+        # 删除当前筛选条件下的全部评论；条件无效或为空时筛选结果就是全表，拒绝执行
+        filter_form = CommentFilterForm(QueryDict(next_query))
+        if not filter_form.has_filters():
+            messages.error(request, "请先填写有效的筛选条件，再删除全部筛选结果。")
+            return redirect(reverse('admin_comment_list') + (f'?{next_query}' if next_query else ''))
+        comment_ids = filter_form.filter(Comment.objects.all()).values_list('id', flat=True)
+    else:
+        comment_ids = [int(pk) for pk in request.POST.getlist('comment_ids') if pk.isdigit()]
+    if not comment_ids:
+        messages.error(request, "请至少选择一条评论。")
+    else:
+        deleted, post_ids = delete_comments(comment_ids)
+        messages.success(request, f"已删除 {deleted} 条评论（含回复）。")
+    return redirect(reverse('admin_comment_list') + (f'?{next_query}' if next_query else ''))
 
 # 删除评论（管理员，需登录且为超级用户）
 @superuser_required
 def comment_delete(request, pk):
     comment = get_object_or_404(Comment, pk=pk)
     if request.method == 'POST':
-        comment.delete()
+        # 连同回复一起集合式删除，并扣减文章评论数与楼层回复数
+        delete_comments([comment.pk])
         messages.success(request, "评论删除成功！")
         return redirect('admin_comment_list')
     return render(request, 'blog/admin/comment_delete.html', {'comment': comment})
@@ -375,10 +572,8 @@ def contact_update(request):
 # 热门动漫导航管理列表（需登录且为超级用户）
 @superuser_required
 def anime_navigation_list(request):
-    anime_navs = AnimeNavigation.objects.all().order_by('-created_at')
-    paginator = Paginator(anime_navs, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(AnimeNavigation.objects.all(), 10, field='created_at')
+    page_obj = paginator.page(request.GET.get('cursor', ''))
     return render(request, 'blog/admin/anime_navigation_list.html', {'page_obj': page_obj})
 
 # 创建热门动漫导航（管理员，需登录且为超级用户）
@@ -426,10 +621,8 @@ def anime_navigation_delete(request, pk):
 # 常用网站导航管理列表（需登录且为超级用户）
 @superuser_required
 def website_navigation_list(request):
-    website_navs = WebsiteNavigation.objects.all().order_by('-created_at')
-    paginator = Paginator(website_navs, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(WebsiteNavigation.objects.all(), 10, field='created_at')
+    page_obj = paginator.page(request.GET.get('cursor', ''))
     return render(request, 'blog/admin/website_navigation_list.html', {'page_obj': page_obj})
 
 # 创建常用网站导航（管理员，需登录且为超级用户）
@@ -484,4 +677,24 @@ def website_navigation_delete(request, pk):
 # 8. 优化 post_detail 视图中的 replies_dict 逻辑，使用递归函数 collect_replies，确保所有嵌套回复都展平到父评论下。
 # 9. 添加 debug 打印语句以检查 replies_dict 的内容，排查回复未显示的问题。
 # 10. 添加 debug 打印语句以检查 parent_comments 的 ID，确保父评论与 replies_dict 匹配。
-# 11. 恢复 anime_navigation_list 视图，修复 AttributeError 错误。
\ No newline at end of file
+# 11. 恢复 anime_navigation_list 视图，修复 AttributeError 错误。
+# 12. 重写 post_detail 视图：改用 load_comment_thread 一次性加载评论并在内存中分组，移除递归 collect_replies 与 debug 打印语句，消除 N+1 查询。
+# 13. home、archive、post_list 改用 defer('content') 并预取 author/category，列表卡片改为显示持久化的 excerpt 摘要。
+# 14. archive 改为按年/月汇总的归档索引（一次 TruncMonth 聚合查询），新增 archive_month 按月查看和 archive_all 流式输出全部文章。
+# 15. 新增 search 视图，基于倒排索引（SQLite FTS5 / PostgreSQL tsvector）返回按相关度排序的分页搜索结果。
+# 16. 新增 tag_detail 视图，按规范化标签列出文章。
+# 17. home 支持 ?category=<id> 分类筛选；categories 改为显示各分类文章数量，数据来自一次聚合查询并缓存，分页展示。
+# 18. home、post_list、anime_navigation_list、website_navigation_list 改用 KeysetPaginator 键集分页，以游标令牌翻页，避免 COUNT(*) 与深分页 OFFSET 扫描。
+# 19. comment_list 改为评论审核页面：支持按文章、作者、日期范围筛选，键集分页并预取 author/post；新增 comment_bulk_delete 以集合式 SQL 批量删除选中或全部筛选结果。
+# 20. 新增 export_data 后台视图，以 StreamingHttpResponse 流式下载 NDJSON（可选 gzip）格式的博客数据导出。
+# 21. home、post_detail、categories 与归档页面支持条件请求：ETag/Last-Modified 未变化时直接返回 304，不渲染模板也不查询评论表。
+# 22. home、post_detail、categories、归档与标签页面标记为可由 AnonymousPageCacheMiddleware 整页缓存，并声明依赖的缓存命名空间。
+# 23. home 不再查询动漫导航与网站导航，侧边栏改由 navigation_sidebar 模板标签输出按版本号缓存的 HTML 片段。
+# 24. add_comment 与 comment_delete 以 F() 表达式原子维护 Post.comment_count 与楼层 reply_count；home 与 post_list 显示评论数并支持 ?sort=comments 按评论数排序。
+# 25. home 与 post_detail 改为异步视图：以异步 ORM（aget、async for）和 concurrent 同时执行互不依赖的查询，侧边栏导航由 anavigation_sidebar 异步取得；
+#     archive_all 与 export_data 在 ASGI 下以异步迭代器逐块输出，不把全部内容读入内存。
+# 26. comment_bulk_delete 删除“全部筛选结果”前要求筛选表单有效且至少有一个条件，避免空条件删除全部评论。
+# 27. 整页缓存的依赖更精确：首页只依赖本页文章的 'post:<id>'（按评论数排序时另依赖 'comments'），详情页与标签页依赖 'categories'
+#     与 'authors'，分类页的文章数量随 'posts' 版本号失效。
+# 28. tag_detail 改为按 PostTag 中冗余的发布时间沿索引排序。
+# 29. 分类数量聚合查询不再在 SQL 中按聚合结果排序，取出后在内存中排序。
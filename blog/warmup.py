@@ -0,0 +1,69 @@
+import logging
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+_warmed = False
+
+
+def project_template_names(engine):
+    """列出项目目录（BASE_DIR）下各模板目录中的全部模板名称，不包括 Django 自带应用的模板。"""
+    loaders = []
+    for loader in engine.engine.template_loaders:
+        loaders.extend(getattr(loader, 'loaders', [loader]))
+    names = set()
+    for loader in loaders:
+        for directory in loader.get_dirs():
+            directory = os.fspath(directory)
+            if not directory.startswith(os.fspath(settings.BASE_DIR)) or not os.path.isdir(directory):
+                continue
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    if filename.endswith(('.html', '.txt', '.xml')):
+                        names.add(os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/'))
+    return sorted(names)
+
+
+def warm_up():
+    """
+    预先完成首个请求才会做的初始化：导入全部 URL 配置与视图模块并建立反向解析表、
+    编译项目模板（存入缓存加载器）、读取静态文件 manifest。只执行一次。
+
+    在 gunicorn 主进程中执行（preload_app）时，这些对象随 fork 由各 worker 共享；
+    不访问数据库，不会在主进程中留下数据库连接。
+
+    返回：
+        (URL 模式数, 编译的模板数)。
+    """
+    global _warmed
+    if _warmed:
+        return 0, 0
+    _warmed = True
+
+    resolver = get_resolver()
+    patterns = len(resolver.reverse_dict)
+    resolver.resolve('/')
+
+    compiled = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for name in project_template_names(engine):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError:
+                logger.exception('预编译模板失败：%s', name)
+            else:
+                compiled += 1
+
+    # staticfiles_storage 是惰性对象，首次访问时才创建存储并读取 staticfiles.json 与图片变体清单
+    staticfiles_storage.base_location
+    return patterns, compiled
+
+# 修改记录：新建 warmup.py，在 gunicorn 主进程或 worker 初始化时预先建立 URL 反向解析表、编译项目模板并读取静态文件 manifest。